@@ -1,16 +1,48 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
+from datetime import datetime
+import duckdb
+from app.core.sse import SSE_HEADERS, sse_event
+from app.services.anomaly_detection import detect_frame
+from app.services.batch_forecast import forecast_dataset
+from app.services.datasets import load_time_series
 from app.services.groq_service import groq_service
+from app.services.llm_gateway import gateway_stats
 
 router = APIRouter()
 
+# Handlers that may call the LLM are plain defs: the governor, gateway and
+# latency budget block while they wait, so FastAPI runs them in its threadpool
+# instead of on the event loop
+
 class PredictionRequest(BaseModel):
     historical_data: List[Dict[str, Any]]
     months_ahead: int = 6
+    season_length: Optional[int] = 12
+    narrate: bool = False  # ask the LLM to explain the computed forecast
+
+class BatchPredictionRequest(BaseModel):
+    dataset_id: str
+    date_field: str
+    measure: str
+    group_by: Optional[str] = None
+    horizon: int = 6
+    freq: Optional[str] = None  # day/week/month/quarter/year; inferred from the dates when omitted
+    season_length: Optional[int] = None  # defaults from freq
+    level: float = 0.95
 
 class AnomalyRequest(BaseModel):
-    data: List[Dict[str, Any]]
+    data: Optional[List[Dict[str, Any]]] = None
+    # or analyse an uploaded dataset aggregated per period
+    dataset_id: Optional[str] = None
+    date_field: Optional[str] = None
+    measures: Optional[List[str]] = None
+    freq: Optional[str] = None
+    period: Optional[int] = 12  # season length; None disables the seasonal check
+    threshold: float = 3.5
+    explain: bool = False  # ask the LLM to describe the flagged points
 
 class RecommendationRequest(BaseModel):
     business_data: Dict[str, Any]
@@ -21,32 +53,78 @@ class DocumentAnalysisRequest(BaseModel):
     document_type: str
 
 @router.post("/ai/predictions")
-async def get_predictions(request: PredictionRequest):
+def get_predictions(request: PredictionRequest):
     """
-    Get AI-powered financial predictions
+    Get financial predictions from the local forecasting engine
+    (optionally narrated by the LLM)
     """
     try:
         predictions = groq_service.generate_predictions(
             request.historical_data,
-            request.months_ahead
+            request.months_ahead,
+            narrate=request.narrate,
+            season_length=request.season_length
         )
         return predictions
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/ai/predictions/batch")
+def batch_predictions(request: BatchPredictionRequest):
+    """
+    Forecast a measure for every group of an uploaded dataset
+    The forecast is stored as a derived dataset (returned dataset_id)
+    """
+    if request.horizon < 1 or not 0 < request.level < 1:
+        raise HTTPException(status_code=400, detail="horizon must be >= 1 and level between 0 and 1")
+    try:
+        return forecast_dataset(
+            request.dataset_id,
+            request.date_field,
+            request.measure,
+            group_by=request.group_by,
+            horizon=request.horizon,
+            freq=request.freq,
+            season_length=request.season_length,
+            level=request.level,
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (ValueError, duckdb.Error) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/ai/anomalies")
-async def detect_anomalies(request: AnomalyRequest):
+def detect_anomalies(request: AnomalyRequest):
     """
-    Detect anomalies in financial data
+    Detect anomalies in financial data or an uploaded dataset
+    (optionally explained by the LLM)
     """
+    options = {"period": request.period, "threshold": request.threshold}
     try:
-        anomalies = groq_service.detect_anomalies(request.data)
-        return anomalies
+        if request.dataset_id:
+            if not request.date_field:
+                raise HTTPException(status_code=400, detail="date_field is required with dataset_id")
+            series = load_time_series(request.dataset_id, request.date_field, request.measures, request.freq)
+            anomalies = detect_frame(series, "period", **options)
+            if request.explain and anomalies["anomalies"]:
+                anomalies = groq_service.explain_anomalies(anomalies)
+            return anomalies
+        if request.data is None:
+            raise HTTPException(status_code=400, detail="Provide data or dataset_id")
+        return groq_service.detect_anomalies(request.data, explain=request.explain, **options)
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (ValueError, duckdb.Error) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/ai/recommendations")
-async def get_recommendations(request: RecommendationRequest):
+def get_recommendations(request: RecommendationRequest):
     """
     Get AI-powered business recommendations
     """
@@ -60,7 +138,7 @@ async def get_recommendations(request: RecommendationRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/ai/analyze-document")
-async def analyze_document(request: DocumentAnalysisRequest):
+def analyze_document(request: DocumentAnalysisRequest):
     """
     Analyze document content with AI
     """
@@ -73,25 +151,24 @@ async def analyze_document(request: DocumentAnalysisRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+CHAT_SYSTEM_PROMPT = 'You are Elas AI, an intelligent ERP assistant helping with business analytics and insights.'
+
+def _chat_messages(message: str, context: Optional[List[Dict]]) -> List[Dict]:
+    messages = [{'role': 'system', 'content': CHAT_SYSTEM_PROMPT}]
+    if context:
+        messages.extend(context)
+    messages.append({'role': 'user', 'content': message})
+    return messages
+
 @router.post("/ai/chat")
-async def ai_chat(message: str, context: Optional[List[Dict]] = None):
+def ai_chat(message: str, context: Optional[List[Dict]] = None):
     """
     General AI chat endpoint
     """
     try:
-        messages = [
-            {
-                'role': 'system',
-                'content': 'You are Elas AI, an intelligent ERP assistant helping with business analytics and insights.'
-            }
-        ]
-        
-        if context:
-            messages.extend(context)
+        messages = _chat_messages(message, context)
         
-        messages.append({'role': 'user', 'content': message})
-        
-        response = groq_service._call_groq(messages, temperature=0.7, max_tokens=512)
+        response = groq_service._call_groq(messages, temperature=0.7, max_tokens=512, priority='interactive')
         
         return {
             "response": response,
@@ -100,3 +177,33 @@ async def ai_chat(message: str, context: Optional[List[Dict]] = None):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/ai/chat/stream")
+def ai_chat_stream(message: str, context: Optional[List[Dict]] = None):
+    """
+    Streaming chat over Server-Sent Events.
+    Emits a "token" event per chunk, then "done" with the full response.
+    """
+    messages = _chat_messages(message, context)
+    
+    def events() -> Iterator[str]:
+        parts: List[str] = []
+        try:
+            for text in groq_service.stream_groq(messages, temperature=0.7, max_tokens=512):
+                parts.append(text)
+                yield sse_event("token", {"text": text})
+        except Exception as e:
+            yield sse_event("error", {"detail": str(e)})
+        yield sse_event("done", {
+            "response": "".join(parts),
+            "timestamp": datetime.utcnow().isoformat() + "Z"
+        })
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.get("/ai/llm/stats")
+async def llm_stats():
+    """
+    LLM gateway health: circuit breaker state (0 closed, 1 half-open, 2 open),
+    hedging and timeout counters, recent latency and rate limiter counters
+    """
+    return gateway_stats()
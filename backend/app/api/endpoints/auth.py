@@ -2,11 +2,15 @@
 Authentication API endpoints
 Handles signup, login, logout, and user management
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, status, Header, UploadFile, File, Form
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
 from app.services.auth_service import AuthService
-from app.services.invitation_service import InvitationService
+from app.services.invitation_service import InvitationService, parse_invitees_csv
+from app.services.jobs import jobs
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
@@ -37,11 +41,26 @@ class UpdatePasswordRequest(BaseModel):
     new_password: str
 
 
+class UpdateProfileRequest(BaseModel):
+    full_name: Optional[str] = None
+    avatar_url: Optional[str] = None
+
+
 class InviteUserRequest(BaseModel):
     email: EmailStr
     role: str
 
 
+class BulkInvitee(BaseModel):
+    email: str
+    role: Optional[str] = None
+
+
+class BulkInviteRequest(BaseModel):
+    invitees: List[BulkInvitee]
+    default_role: Optional[str] = None
+
+
 class AcceptInviteRequest(BaseModel):
     token: str
     email: EmailStr
@@ -173,6 +192,19 @@ async def get_me(
     }
 
 
+@router.patch("/me")
+async def update_me(
+    request: UpdateProfileRequest,
+    current_user: dict = Depends(get_current_user_from_header)
+):
+    """Update current user profile (name, avatar)"""
+    changes = {k: v for k, v in request.dict().items() if v is not None}
+    if not changes:
+        return {"user": current_user}
+    profile = await AuthService.update_profile(current_user["id"], changes)
+    return {"user": profile}
+
+
 @router.post("/password-reset")
 async def request_password_reset(request: PasswordResetRequest):
     """Send password reset email"""
@@ -227,6 +259,80 @@ async def invite_team_member(
     }
 
 
+def _require_inviter(current_user: dict) -> None:
+    if current_user["role"] not in ["admin", "manager"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins and managers can invite team members"
+        )
+
+
+def _bulk_invite_job(business_id: str, invitees: List[Dict[str, Any]], invited_by: str, default_role: Optional[str]):
+    return asyncio.run(InvitationService.create_invitations_bulk(business_id, invitees, invited_by, default_role))
+
+
+async def _bulk_invite(current_user: dict, invitees: List[Dict[str, Any]], default_role: Optional[str]):
+    """Invite inline, or as a background job when the list is very large"""
+    if len(invitees) > settings.bulk_invite_job_threshold:
+        job = jobs.submit(
+            "bulk_invite", _bulk_invite_job,
+            current_user["business_id"], invitees, current_user["id"], default_role
+        )
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content={
+            "message": f"Inviting {len(invitees)} people in the background",
+            "job_id": job.id,
+            "status_url": f"/api/jobs/{job.id}",
+            "events_url": f"/api/jobs/{job.id}/events",
+        })
+    
+    result = await InvitationService.create_invitations_bulk(
+        business_id=current_user["business_id"],
+        invitees=invitees,
+        invited_by_user_id=current_user["id"],
+        default_role=default_role
+    )
+    return {
+        "message": f"{result['invited']} of {result['total']} invitations sent",
+        **result
+    }
+
+
+@router.post("/invite/bulk")
+async def invite_team_members_bulk(
+    request: BulkInviteRequest,
+    current_user: dict = Depends(get_current_user_from_header)
+):
+    """
+    Invite many team members at once (admin/manager only)
+    Returns a status per row: invited, already_member, already_invited,
+    duplicate, invalid_email, invalid_role or error
+    """
+    _require_inviter(current_user)
+    invitees = [i.dict() for i in request.invitees]
+    return await _bulk_invite(current_user, invitees, request.default_role)
+
+
+@router.post("/invite/bulk/csv")
+async def invite_team_members_csv(
+    file: UploadFile = File(...),
+    default_role: Optional[str] = Form(None),
+    current_user: dict = Depends(get_current_user_from_header)
+):
+    """
+    Invite team members from a CSV with an email column and an optional
+    role column (default_role fills rows without one)
+    """
+    _require_inviter(current_user)
+    try:
+        invitees = parse_invitees_csv(await file.read())
+    except (UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not read CSV: {str(e)}"
+        )
+    return await _bulk_invite(current_user, invitees, default_role)
+
+
 @router.get("/invite/{token}")
 async def get_invitation_details(token: str):
     """
@@ -1,19 +1,24 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Any, Dict, List, Optional
-import os, json, uuid
-
-router = APIRouter()
+from typing import Any, AsyncIterator, Dict, List, Optional
+import time
 
+from app.core.http_cache import DASHBOARD_CACHE_CONTROL, conditional_json, strong_etag
+from app.core.sse import SSE_HEADERS, SSE_KEEPALIVE, sse_event
+from app.services.dashboard_store import VersionConflict, dashboards
+from app.services.dataset_refresh import feed
+from app.services.datasets import dataset_fingerprint
 
-@router.get("/dashboard")
-def get_dashboard():
-    return {"widgets": []}
+router = APIRouter()
 
+# Dashboards saved as JSON files before the SQLite store; imported on startup
+LEGACY_STORE_DIR = "app/tmp/dashboards"
 
-# Simple JSON-file persistence for demo
-STORE_DIR = "app/tmp/dashboards"
-os.makedirs(STORE_DIR, exist_ok=True)
+# Longest a client stays subscribed to one dashboard before reconnecting
+STREAM_TIMEOUT = 300.0
+KEEPALIVE_INTERVAL = 15.0
 
 
 class SaveDashboardRequest(BaseModel):
@@ -21,32 +26,131 @@ class SaveDashboardRequest(BaseModel):
     widgets: List[Dict[str, Any]]
     dataset_id: Optional[str] = None
     meta: Optional[Dict[str, Any]] = None
+    business_id: Optional[str] = None
+    owner: Optional[str] = None
+
+
+class UpdateDashboardRequest(BaseModel):
+    version: int  # version the client loaded; 409 if someone saved since
+    name: Optional[str] = None
+    widgets: Optional[List[Dict[str, Any]]] = None
+    dataset_id: Optional[str] = None
+    meta: Optional[Dict[str, Any]] = None
+
+
+def import_legacy_dashboards() -> int:
+    return dashboards.import_json_dir(LEGACY_STORE_DIR)
+
+
+@router.get("/dashboard")
+def list_dashboards(
+    business_id: Optional[str] = None,
+    owner: Optional[str] = None,
+    dataset_id: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+):
+    """Dashboard summaries, newest first; follow next_cursor for more"""
+    try:
+        page = dashboards.list(business_id=business_id, owner=owner, dataset_id=dataset_id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return page
 
 
 @router.post("/dashboard/save")
-def save_dashboard(req: SaveDashboardRequest):
+def save_dashboard(
+    req: SaveDashboardRequest,
+    x_business_id: Optional[str] = Header(None),
+    x_user_email: Optional[str] = Header(None),
+):
     try:
-        dash_id = str(uuid.uuid4())
-        doc = {
-            "id": dash_id,
-            "name": req.name,
-            "widgets": req.widgets,
-            "dataset_id": req.dataset_id,
-            "meta": req.meta or {},
-        }
-        path = os.path.join(STORE_DIR, f"{dash_id}.json")
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(doc, f, indent=2)
-        return {"success": True, "id": dash_id}
+        saved = dashboards.create(
+            req.name, req.widgets, req.dataset_id, req.meta,
+            business_id=req.business_id or x_business_id,
+            owner=req.owner or x_user_email,
+        )
+        return {"success": True, **saved}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _dataset_hash(dataset_id: Optional[str]) -> Optional[str]:
+    if not dataset_id:
+        return None
+    try:
+        return dataset_fingerprint(dataset_id)
+    except (ValueError, FileNotFoundError):
+        return None
+
+
 @router.get("/dashboard/{dash_id}")
-def get_dashboard_by_id(dash_id: str):
-    path = os.path.join(STORE_DIR, f"{dash_id}.json")
-    if not os.path.exists(path):
+def get_dashboard_by_id(dash_id: str, request: Request):
+    """Conditional GET: ETag covers the dashboard version and its dataset's content"""
+    validator = dashboards.validator(dash_id)
+    if validator is None:
+        raise HTTPException(status_code=404, detail="Dashboard not found")
+    version, dataset_id = validator
+    etag = strong_etag("dashboard", dash_id, version, _dataset_hash(dataset_id))
+
+    def load():
+        doc = dashboards.get(dash_id)
+        if doc is None:
+            raise HTTPException(status_code=404, detail="Dashboard not found")
+        return doc
+
+    return conditional_json(request, etag, load, DASHBOARD_CACHE_CONTROL, cache="http_dashboard")
+
+
+@router.get("/dashboard/{dash_id}/events")
+async def dashboard_events(dash_id: str, request: Request):
+    """
+    Subscribe to widget updates over Server-Sent Events
+
+    Events: "widget_data" with the changed rows of an aggregate widget
+    ("partial": true means only the changed groups), "widget_stale" for
+    widgets the client should refetch. Reconnect with Last-Event-ID to
+    receive what was published meanwhile.
+    """
+    if await run_in_threadpool(dashboards.validator, dash_id) is None:
+        raise HTTPException(status_code=404, detail="Dashboard not found")
+    last_id = request.headers.get("last-event-id", "")
+    after = int(last_id) if last_id.isdigit() else feed.last_seq
+
+    async def events() -> AsyncIterator[str]:
+        nonlocal after
+        deadline = time.monotonic() + STREAM_TIMEOUT
+        while time.monotonic() < deadline:
+            published = await feed.wait_async(dash_id, after, timeout=KEEPALIVE_INTERVAL)
+            if not published:
+                yield SSE_KEEPALIVE
+                continue
+            for seq, event, data in published:
+                yield f"id: {seq}\n" + sse_event(event, data)
+                after = seq
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.put("/dashboard/{dash_id}")
+def update_dashboard(dash_id: str, req: UpdateDashboardRequest):
+    try:
+        saved = dashboards.update(
+            dash_id, req.version, name=req.name, widgets=req.widgets, dataset_id=req.dataset_id, meta=req.meta,
+        )
+    except KeyError:
         raise HTTPException(status_code=404, detail="Dashboard not found")
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    except VersionConflict as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "current_version": e.current_version})
+    return {"success": True, **saved}
+
 
+@router.delete("/dashboard/{dash_id}")
+def delete_dashboard(dash_id: str, version: Optional[int] = None):
+    try:
+        dashboards.delete(dash_id, expected_version=version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Dashboard not found")
+    except VersionConflict as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "current_version": e.current_version})
+    return {"success": True, "id": dash_id}
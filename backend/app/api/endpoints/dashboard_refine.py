@@ -2,12 +2,15 @@
 Dashboard refinement endpoint for AI-powered dashboard updates
 """
 from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from typing import Optional, List, Any
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import Optional, List, Any, Iterator
 import json
 import logging
-from app.services.llm_service import refine_widgets_with_groq
+from app.services.llm_service import refine_widgets_with_groq, stream_refined_widgets
 from app.core.config import settings
+from app.core.sse import SSE_HEADERS, sse_event
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
@@ -57,29 +60,16 @@ async def refine_dashboard(request: RefineWidgetsRequest):
             f"chart_type={request.constraints.get('chartType')}"
         )
 
-        # Validate request
-        if not request.user_instruction or not request.user_instruction.strip():
-            raise HTTPException(status_code=400, detail="User instruction is required")
-
-        if not request.current_widgets:
-            raise HTTPException(status_code=400, detail="Current widgets list is required")
-
-        # Prepare context for LLM
-        context = {
-            "role": request.role,
-            "domain": request.constraints.get("domain", "general"),
-            "intent": request.constraints.get("intent", "analyze"),
-            "chart_type": request.constraints.get("chartType", "auto"),
-            "time_range": request.constraints.get("timeRange", "30d"),
-            "user_instruction": request.user_instruction,
-            "current_widget_count": len(request.current_widgets),
-        }
+        _validate_request(request)
+        context = _build_context(request)
 
         # Try to use Groq if API key is configured
         if settings.groq_api_key and settings.groq_mode == "live":
             try:
                 logger.info("Using Groq LLM for widget refinement")
-                widgets, mode_used = await refine_widgets_with_groq(
+                # blocking LLM call (governor, gateway, budget): keep it off the event loop
+                widgets, mode_used = await run_in_threadpool(
+                    refine_widgets_with_groq,
                     instruction=request.user_instruction,
                     current_widgets=[w.dict() for w in request.current_widgets],
                     context=context,
@@ -112,6 +102,83 @@ async def refine_dashboard(request: RefineWidgetsRequest):
         raise HTTPException(status_code=500, detail="Failed to refine dashboard widgets")
 
 
+@router.post("/refine/stream")
+def refine_dashboard_stream(request: RefineWidgetsRequest):
+    """
+    Streaming variant of /refine over Server-Sent Events.
+
+    Events:
+        token:  {"text": str} raw model output as it arrives
+        widget: WidgetSpec emitted as soon as each array element is complete
+        done:   {"success", "mode", "count", "message"}
+    """
+    _validate_request(request)
+    context = _build_context(request)
+
+    def events() -> Iterator[str]:
+        count = 0
+        if settings.groq_api_key and settings.groq_mode == "live":
+            try:
+                for event, data in stream_refined_widgets(
+                    instruction=request.user_instruction,
+                    current_widgets=[w.dict() for w in request.current_widgets],
+                    context=context,
+                ):
+                    if event == "token":
+                        yield sse_event("token", {"text": data})
+                        continue
+                    try:
+                        widget = WidgetSpec(**data)
+                    except ValidationError:
+                        continue
+                    count += 1
+                    yield sse_event("widget", widget.dict())
+            except Exception as e:
+                logger.warning(f"Groq streaming refinement failed: {str(e)}, falling back to deterministic")
+
+            if count:
+                yield sse_event("done", {
+                    "success": True,
+                    "mode": "groq",
+                    "count": count,
+                    "message": "Widgets refined successfully using AI",
+                })
+                return
+
+        for widget in _generate_fallback_widgets(request, context):
+            count += 1
+            yield sse_event("widget", widget.dict())
+        yield sse_event("done", {
+            "success": True,
+            "mode": "fallback",
+            "count": count,
+            "message": "Widgets refined using deterministic strategy",
+        })
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+def _validate_request(request: RefineWidgetsRequest) -> None:
+    if not request.user_instruction or not request.user_instruction.strip():
+        raise HTTPException(status_code=400, detail="User instruction is required")
+
+    if not request.current_widgets:
+        raise HTTPException(status_code=400, detail="Current widgets list is required")
+
+
+def _build_context(request: RefineWidgetsRequest) -> dict:
+    """Prepare constraint context for the LLM and the fallback strategy"""
+    return {
+        "role": request.role,
+        "domain": request.constraints.get("domain", "general"),
+        "intent": request.constraints.get("intent", "analyze"),
+        "chart_type": request.constraints.get("chartType", "auto"),
+        "time_range": request.constraints.get("timeRange", "30d"),
+        "user_instruction": request.user_instruction,
+        "current_widget_count": len(request.current_widgets),
+    }
+
+
 def _generate_fallback_widgets(request: RefineWidgetsRequest, context: dict) -> List[WidgetSpec]:
     """
     Generate deterministic fallback widgets when Groq is unavailable.
@@ -164,7 +231,7 @@ def _generate_fallback_widgets(request: RefineWidgetsRequest, context: dict) ->
     return refined
 
 
-async def refine_widgets_with_groq(
+def refine_widgets_with_groq(
     instruction: str,
     current_widgets: List[dict],
     context: dict,
@@ -175,4 +242,4 @@ async def refine_widgets_with_groq(
     """
     from app.services.llm_service import refine_widgets_with_groq as _refine
 
-    return await _refine(instruction, current_widgets, context)
+    return _refine(instruction, current_widgets, context)
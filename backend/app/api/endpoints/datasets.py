@@ -0,0 +1,88 @@
+import os
+import shutil
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, File, HTTPException, Query, Request, UploadFile
+
+from app.core.http_cache import conditional_json, dataset_cache_control, strong_etag
+from app.services.dataset_refresh import append_rows
+from app.services.datasets import AGGREGATE, UPLOAD_DIR, dataset_fingerprint, dataset_path, preview_rows, widget_data
+from app.services.rollups import WidgetQuery, rollups
+
+router = APIRouter()
+
+
+def _fingerprint(dataset_id: str) -> str:
+    _check(dataset_id)
+    return dataset_fingerprint(dataset_id)
+
+
+def _check(dataset_id: str) -> None:
+    try:
+        dataset_path(dataset_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+
+@router.get("/datasets/{dataset_id}/preview")
+def get_preview(dataset_id: str, request: Request, limit: int = Query(200, ge=1, le=5000)):
+    """First rows of an uploaded dataset; 304 while the dataset is unchanged"""
+    etag = strong_etag("preview", _fingerprint(dataset_id), limit)
+    return conditional_json(
+        request, etag,
+        lambda: {"dataset_id": dataset_id, "rows": preview_rows(dataset_id, limit)},
+        dataset_cache_control(), cache="http_dataset",
+    )
+
+
+@router.get("/datasets/{dataset_id}/widget-data")
+def get_widget_data(
+    dataset_id: str,
+    request: Request,
+    x: Optional[str] = None,
+    y: Optional[str] = None,
+    group_by: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=10000),
+):
+    """
+    Data for one widget (its config x_column / y_column / group_by)
+
+    y may be an aggregate such as SUM(revenue) or COUNT(*); those are served
+    from mergeable rollups that appends update incrementally.
+    """
+    etag = strong_etag("widget-data", _fingerprint(dataset_id), x, y, group_by, limit)
+
+    def load():
+        try:
+            if y and AGGREGATE.match(y.strip()):
+                rows = rollups.widget_rows(dataset_id, WidgetQuery(x, y, group_by), limit=limit)
+            else:
+                rows = widget_data(dataset_id, x, y, group_by, limit)
+            return {"dataset_id": dataset_id, "rows": rows}
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Widget query failed: {e}")
+
+    return conditional_json(request, etag, load, dataset_cache_control(), cache="http_dataset")
+
+
+@router.post("/datasets/{dataset_id}/append")
+def append_dataset(dataset_id: str, file: UploadFile = File(...)):
+    """
+    Append a file with the same columns (e.g. today's rows) to a dataset
+
+    Widgets of dashboards on this dataset are refreshed from the delta only
+    and pushed to /api/dashboard/{id}/events subscribers.
+    """
+    _check(dataset_id)
+    upload_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4()}_{os.path.basename(file.filename or 'delta.csv')}")
+    with open(upload_path, "wb") as out:
+        shutil.copyfileobj(file.file, out)
+    try:
+        return append_rows(dataset_id, upload_path)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        os.remove(upload_path)
@@ -3,7 +3,6 @@ import io
 import json
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from typing import List, Dict, Any
-import PyPDF2
 import pandas as pd
 from pathlib import Path
 
@@ -59,6 +58,8 @@ async def upload_documents(files: List[UploadFile] = File(...)):
 
 def process_pdf(content: bytes) -> Dict[str, Any]:
     """Extract text and tables from PDF"""
+    import PyPDF2  # imported on first PDF, not at startup
+    
     try:
         pdf_file = io.BytesIO(content)
         pdf_reader = PyPDF2.PdfReader(pdf_file)
@@ -0,0 +1,60 @@
+from typing import AsyncIterator
+import time
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.core.sse import SSE_HEADERS, SSE_KEEPALIVE, sse_event
+from app.services.jobs import FINISHED, jobs
+
+router = APIRouter()
+
+# Longest a client stays subscribed to one job
+STREAM_TIMEOUT = 300.0
+KEEPALIVE_INTERVAL = 15.0
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Poll a background job; result is set once status is "done"
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Subscribe to a background job over Server-Sent Events
+
+    Events: "status" on every change, then "result" or "error", then "done".
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+
+    async def events() -> AsyncIterator[str]:
+        deadline = time.monotonic() + STREAM_TIMEOUT
+        seen = -1
+        while time.monotonic() < deadline:
+            current = await jobs.wait_async(job_id, seen_version=seen, timeout=KEEPALIVE_INTERVAL)
+            if current is None:
+                yield sse_event("error", {"detail": "Job expired"})
+                break
+            if current.version == seen:
+                yield SSE_KEEPALIVE
+                continue
+            seen = current.version
+            yield sse_event("status", {"job_id": job_id, "status": current.status})
+            if current.status in FINISHED:
+                if current.error:
+                    yield sse_event("error", {"detail": current.error})
+                else:
+                    yield sse_event("result", current.result)
+                break
+        yield sse_event("done", {"job_id": job_id})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
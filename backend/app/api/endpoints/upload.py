@@ -1,44 +1,48 @@
 import os, uuid, shutil, json
 from typing import List, Dict, Any
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
 from fastapi.responses import JSONResponse
-import duckdb
 import numpy as np
 import pandas as pd
-from datetime import datetime
-from pathlib import Path
+from app.core.config import settings
+from app.core.logging import get_logger, log_event, log_payload
+from app.core.metrics import bytes_ingested, stage
+from app.core.resources import Resources, get_resources
+from app.core.tracing import current_span, span, traced
 from app.services.dashboard_generator import generate_quick_viz
+from app.services.datasets import UPLOAD_DIR
 from app.services.file_parsers import parse_file, validate_dataframe
+from app.services.jobs import jobs
 
 router = APIRouter()
 
-UPLOAD_DIR = "app/tmp/uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-# Log file in PROJECT ROOT
-ROOT_DIR = Path(__file__).parent.parent.parent.parent  # Go up to project root
-GROQ_LOG_FILE = ROOT_DIR / "GROQ_DEBUG.log"
+_log = get_logger(__name__)
 
 
 def log_upload_info(message: str):
-    """Write upload info to Groq debug log file in project root"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(GROQ_LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(f"[{timestamp}] {message}\n")
+    """Log upload info to the Groq debug log (buffered JSON records, see app.core.logging)"""
+    _log.info(message.strip())
+
+
+@traced("upload.llm_widgets")
+def _llm_widgets(csv_path: str, domain: str, intent: str, engine: str) -> Dict[str, Any]:
+    """Background phase of an upload: LLM-ranked or LLM-proposed widgets"""
+    widgets, groq_input, groq_response = generate_quick_viz(csv_path=csv_path, domain=domain, intent=intent, engine=engine)
+    return {"widgets": widgets, "groq_input": groq_input, "groq_response": groq_response}
 
 
 @router.post("/upload")
-async def upload_file(
+def upload_file(
     file: UploadFile = File(...),
     domain: str = Form(...),
     intent: str = Form(...),
+    res: Resources = Depends(get_resources),
 ):
-    log_upload_info("\n" + "="*80)
-    log_upload_info("📤 NEW UPLOAD REQUEST")
-    log_upload_info("="*80)
-    log_upload_info(f"📁 File: {file.filename}")
-    log_upload_info(f"🏢 Domain: {domain}")
-    log_upload_info(f"🎯 Intent: {intent}")
+    # Plain def: the save, parse, local widgets and DuckDB preview all block,
+    # so FastAPI runs the handler in its threadpool instead of on the event loop
+    log_upload_info(f"📤 NEW UPLOAD REQUEST: {file.filename} (domain: {domain}, intent: {intent})")
     
     print("\n" + "="*80)
     print("📤 UPLOAD ENDPOINT CALLED")
@@ -64,8 +68,12 @@ async def upload_file(
     print(f"📎 File type: {file_ext.upper()}")
 
     fpath = os.path.join(UPLOAD_DIR, f"{uuid.uuid4()}_{file.filename}")
-    with open(fpath, "wb") as out:
-        shutil.copyfileobj(file.file, out)
+    with stage("save"):
+        with open(fpath, "wb") as out:
+            shutil.copyfileobj(file.file, out)
+    file_bytes = os.path.getsize(fpath)
+    bytes_ingested.inc(file_bytes, type=file_ext)
+    current_span().set_attributes(file_ext=file_ext, bytes=file_bytes, domain=domain, intent=intent)
     
     log_upload_info(f"💾 Saved to: {fpath}")
     print(f"💾 Saved to: {fpath}")
@@ -88,12 +96,8 @@ async def upload_file(
         df_parsed.to_csv(temp_csv_path, index=False)
         fpath = temp_csv_path  # Use parsed CSV for downstream processing
         
-        # Log preview
-        preview_df = df_parsed.head(5)
-        log_upload_info(f"\n📊 PARSED DATA PREVIEW (first 5 rows):")
-        log_upload_info("-"*80)
-        log_upload_info(preview_df.to_string())
-        log_upload_info("-"*80)
+        # Log preview (sampled; only rendered when it is actually logged)
+        log_payload(_log, "📊 Parsed data preview (first 5 rows)", lambda: df_parsed.head(5).to_string())
         
     except Exception as e:
         error_msg = str(e)
@@ -101,33 +105,42 @@ async def upload_file(
         print(f"❌ Parsing failed: {error_msg}")
         raise HTTPException(status_code=400, detail=f"Failed to parse file: {error_msg}")
 
-    # Generate widget proposals
-    log_upload_info("\n🤖 Calling generate_quick_viz...")
-    print("\n🤖 Calling generate_quick_viz...")
-    widgets, groq_input, groq_response = generate_quick_viz(csv_path=fpath, domain=domain, intent=intent)
+    # Phase 1: local widgets answer the upload right away
+    log_upload_info("\n🤖 Calling generate_quick_viz (local)...")
+    print("\n🤖 Calling generate_quick_viz (local)...")
+    widgets, groq_input, groq_response = generate_quick_viz(csv_path=fpath, domain=domain, intent=intent, engine="local")
     log_upload_info(f"✅ Generated {len(widgets)} widgets")
     print(f"✅ Generated {len(widgets)} widgets")
 
+    # Phase 2: LLM proposals run in the background; the client polls or subscribes
+    llm_job = None
+    if settings.widget_engine != "local":
+        job = jobs.submit("widgets", _llm_widgets, fpath, domain, intent, settings.widget_engine)
+        llm_job = {
+            "job_id": job.id,
+            "status_url": f"/api/jobs/{job.id}",
+            "events_url": f"/api/jobs/{job.id}/events",
+        }
+        log_upload_info(f"🕒 LLM widget job queued: {job.id}")
+        print(f"🕒 LLM widget job queued: {job.id}")
+
     # Return a small preview sample so the client can render Vega-Lite immediately
     preview_rows: List[Dict[str, Any]] = []
     try:
-        print("\n📊 Loading preview data with DuckDB...")
-        con = duckdb.connect()
-        # read_csv_auto also handles TSV/TXT
-        df = con.execute(f"SELECT * FROM read_csv_auto('{fpath}') LIMIT 200").fetch_df()
-        
-        # Convert to JSON-serializable format (handle NaN, Timestamp, etc.)
-        df = df.replace({np.nan: None})  # Replace NaN with None
-        preview_rows = json.loads(df.to_json(orient="records", date_format="iso"))
+        with stage("preview"), span("duckdb.preview", limit=200) as s:
+            # read_csv_auto also handles TSV/TXT
+            with res.duckdb() as con:
+                df = con.execute(f"SELECT * FROM read_csv_auto('{fpath}') LIMIT 200").fetch_df()
+            
+            # Convert to JSON-serializable format (handle NaN, Timestamp, etc.)
+            df = df.replace({np.nan: None})  # Replace NaN with None
+            preview_rows = json.loads(df.to_json(orient="records", date_format="iso"))
+            s.set_attribute("rows", len(preview_rows))
         
-        print(f"✅ Loaded {len(preview_rows)} preview rows")
-        if preview_rows:
-            print(f"📋 Columns: {list(preview_rows[0].keys())}")
+        log_event(_log, "📊 Preview loaded", rows=len(preview_rows), columns=list(preview_rows[0]) if preview_rows else [])
     except Exception as e:
         # ignore preview failure; widgets can still be shown with empty data
-        print(f"⚠️ Preview failed: {e}")
-        import traceback
-        traceback.print_exc()
+        _log.warning(f"⚠️ Preview failed: {e}", exc_info=True)
         preview_rows = []
 
     response_data = {
@@ -138,15 +151,15 @@ async def upload_file(
         "intent": intent,
         "groq_input": groq_input,
         "groq_response": groq_response,
+        "llm_job": llm_job,
     }
     
-    print("\n📦 Response summary:")
-    print(f"   - Dataset ID: {response_data['dataset_id']}")
-    print(f"   - Widgets: {len(response_data['widgets'])}")
-    print(f"   - Preview rows: {len(response_data['preview'])}")
-    print(f"   - Groq input: {len(str(groq_input))} chars")
-    print(f"   - Groq response: {len(groq_response)} chars")
-    print("="*80 + "\n")
+    log_event(
+        _log, "📦 Upload response",
+        dataset_id=response_data["dataset_id"], widgets=len(widgets), preview_rows=len(preview_rows),
+        groq_input_chars=len(str(groq_input)), groq_response_chars=len(groq_response),
+    )
     
-    return JSONResponse(response_data)
+    with stage("serialize"):
+        return JSONResponse(response_data)
 
@@ -7,19 +7,77 @@ class Settings(BaseSettings):
     app_env: str = Field(default="dev", alias="APP_ENV")
     app_host: str = Field(default="0.0.0.0", alias="APP_HOST")
     app_port: int = Field(default=8000, alias="APP_PORT")
+    warmup_on_startup: bool = Field(default=False, alias="WARMUP_ON_STARTUP")  # preload LLM client/parsers in the background
+    shutdown_grace: float = Field(default=10.0, alias="SHUTDOWN_GRACE")  # seconds running background work may finish on shutdown
+    http_max_connections: int = Field(default=20, alias="HTTP_MAX_CONNECTIONS")  # pooled outbound HTTP connections (shared client)
+    duckdb_pool_size: int = Field(default=8, alias="DUCKDB_POOL_SIZE")  # idle DuckDB cursors kept for reuse
 
     # Supabase
     supabase_url: str = Field(default="", alias="SUPABASE_URL")
     supabase_anon_key: str = Field(default="", alias="SUPABASE_ANON_KEY")
     supabase_service_role_key: str = Field(default="", alias="SUPABASE_SERVICE_ROLE_KEY")
+    supabase_max_workers: int = Field(default=16, alias="SUPABASE_MAX_WORKERS")  # threads running blocking Supabase calls
+    supabase_db_url: str = Field(default="", alias="SUPABASE_DB_URL")  # direct Postgres URL for hot reads; empty = REST only
+    db_pool_size: int = Field(default=5, alias="DB_POOL_SIZE")  # pooled connections kept open to SUPABASE_DB_URL
+    db_max_overflow: int = Field(default=10, alias="DB_MAX_OVERFLOW")  # extra connections allowed under burst load
 
     # LLM
     groq_api_key: str = Field(default="", alias="GROQ_API_KEY")
     groq_model: str = Field(default="llama-3.3-70b-versatile", alias="GROQ_MODEL")  # Updated: llama-3.1 was decommissioned
     groq_mode: str = Field(default="live", alias="GROQ_MODE")  # "live" or "mock" for testing
+    groq_base_url: str = Field(default="https://api.groq.com", alias="GROQ_BASE_URL")  # point at mock_llm_server.py for offline load tests
+    groq_rpm: int = Field(default=30, alias="GROQ_RPM")  # provider requests-per-minute limit
+    groq_tpm: int = Field(default=6000, alias="GROQ_TPM")  # provider tokens-per-minute limit
+    groq_max_concurrency: int = Field(default=4, alias="GROQ_MAX_CONCURRENCY")
+    groq_queue_size: int = Field(default=64, alias="GROQ_QUEUE_SIZE")
+    groq_queue_timeout: float = Field(default=20.0, alias="GROQ_QUEUE_TIMEOUT")  # seconds
+    llm_input_token_budget: int = Field(default=2000, alias="LLM_INPUT_TOKEN_BUDGET")  # per data block in a prompt
+    llm_request_timeout: float = Field(default=20.0, alias="LLM_REQUEST_TIMEOUT")  # HTTP timeout per attempt, no retries
+    llm_budget_interactive: float = Field(default=10.0, alias="LLM_BUDGET_INTERACTIVE")  # seconds before falling back
+    llm_budget_default: float = Field(default=20.0, alias="LLM_BUDGET_DEFAULT")
+    llm_budget_background: float = Field(default=45.0, alias="LLM_BUDGET_BACKGROUND")
+    llm_hedging: bool = Field(default=True, alias="LLM_HEDGING")
+    llm_hedge_after: float = Field(default=4.0, alias="LLM_HEDGE_AFTER")  # until enough samples for a measured p95
+    llm_breaker_failures: int = Field(default=5, alias="LLM_BREAKER_FAILURES")  # consecutive failures that open the breaker
+    llm_breaker_cooldown: float = Field(default=30.0, alias="LLM_BREAKER_COOLDOWN")  # seconds before a probe call
+    widget_engine: str = Field(default="local", alias="WIDGET_ENGINE")  # "local", "rerank" (LLM orders local candidates) or "llm"
+
+    # Forecasting
+    forecast_workers: int = Field(default=0, alias="FORECAST_WORKERS")  # processes for batch fits; 0 = CPU count, 1 = in-process
+    forecast_chunk_size: int = Field(default=2000, alias="FORECAST_CHUNK_SIZE")  # series per process-pool task
+
+    # Background jobs (LLM widget proposals after upload, bulk work)
+    job_workers: int = Field(default=4, alias="JOB_WORKERS")
+    job_ttl_seconds: float = Field(default=900.0, alias="JOB_TTL_SECONDS")  # how long finished results stay pollable
+
+    # Observability
+    metrics_enabled: bool = Field(default=True, alias="METRICS_ENABLED")  # Prometheus text at GET /metrics
+    log_level: str = Field(default="INFO", alias="LOG_LEVEL")
+    log_file: str = Field(default="", alias="LOG_FILE")  # JSON lines; default GROQ_DEBUG.log in the project root
+    log_max_bytes: int = Field(default=10 * 1024 * 1024, alias="LOG_MAX_BYTES")  # size-based rotation
+    log_rotate_when: str = Field(default="", alias="LOG_ROTATE_WHEN")  # e.g. "midnight" or "H" for time-based rotation instead
+    log_backup_count: int = Field(default=5, alias="LOG_BACKUP_COUNT")
+    log_queue_size: int = Field(default=10000, alias="LOG_QUEUE_SIZE")  # records buffered before new ones are dropped
+    log_payload_sample_rate: float = Field(default=0.1, alias="LOG_PAYLOAD_SAMPLE_RATE")  # share of large payload dumps written
+    log_payload_max_chars: int = Field(default=4000, alias="LOG_PAYLOAD_MAX_CHARS")
+    log_llm_exchanges: bool = Field(default=False, alias="LOG_LLM_EXCHANGES")  # full prompts/completions in llm_response records (replay recordings; contain user data)
+    tracing_enabled: bool = Field(default=True, alias="TRACING_ENABLED")
+    trace_export: str = Field(default="file", alias="TRACE_EXPORT")  # "file" (JSON lines) or "memory" (recent spans only)
+    trace_file: str = Field(default="", alias="TRACE_FILE")  # default traces.jsonl in the project root
+    trace_sample_rate: float = Field(default=1.0, alias="TRACE_SAMPLE_RATE")  # share of new traces recorded
+
+    # HTTP caching
+    http_cache_max_age: int = Field(default=60, alias="HTTP_CACHE_MAX_AGE")  # seconds clients may reuse dataset reads before revalidating
 
     # Auth
     auth_mode: str = Field(default="live", alias="AUTH_MODE")  # "live" or "mock" for testing
+    supabase_jwt_secret: str = Field(default="", alias="SUPABASE_JWT_SECRET")  # HS256 projects; verifies tokens locally
+    jwt_jwks_url: str = Field(default="", alias="JWT_JWKS_URL")  # default {SUPABASE_URL}/auth/v1/.well-known/jwks.json
+    jwt_key_file: str = Field(default="", alias="JWT_KEY_FILE")  # local JWKS file used instead of the URL (tests, air-gapped)
+    jwt_keys_refresh: float = Field(default=3600.0, alias="JWT_KEYS_REFRESH")  # seconds between signing key reloads
+    jwt_audience: str = Field(default="authenticated", alias="JWT_AUDIENCE")
+    auth_profile_cache_ttl: float = Field(default=60.0, alias="AUTH_PROFILE_CACHE_TTL")  # seconds a user profile is reused
+    bulk_invite_job_threshold: int = Field(default=200, alias="BULK_INVITE_JOB_THRESHOLD")  # larger bulk invites run as background jobs
 
     # Storage
     aws_region: str = Field(default="us-east-1", alias="AWS_REGION")
@@ -30,6 +88,9 @@ class Settings(BaseSettings):
 
     # DB / cache
     database_url: str = Field(default="sqlite:///./vizpilot.db", alias="DATABASE_URL")
+    dashboard_db_url: str = Field(default="", alias="DASHBOARD_DB_URL")  # SQLite URL for dashboards; defaults to DATABASE_URL
+    business_db_url: str = Field(default="", alias="BUSINESS_DB_URL")  # SQLite URL for businesses and teams; defaults to DATABASE_URL
+    business_cache_ttl: float = Field(default=30.0, alias="BUSINESS_CACHE_TTL")  # seconds a cached business read may be served
     redis_url: str | None = Field(default=None, alias="REDIS_URL")
 
     class Config:
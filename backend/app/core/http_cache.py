@@ -0,0 +1,59 @@
+"""
+HTTP validators and conditional GET
+- strong ETags from whatever identifies a representation (dashboard id and
+  version, dataset fingerprint, query parameters)
+- If-None-Match handling: a matching request gets a bodyless 304 and the
+  payload is never built or serialized
+- Cache-Control policies per kind of resource
+"""
+import hashlib
+import json
+from typing import Any, Callable, Optional, Union
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.metrics import cache_hits, cache_misses
+
+# Shared dashboards change under their viewers: always revalidate (cheap with 304s)
+DASHBOARD_CACHE_CONTROL = "private, no-cache"
+
+
+def dataset_cache_control() -> str:
+    """Dataset reads may be reused briefly; the ETag covers revalidation afterwards"""
+    return f"private, max-age={settings.http_cache_max_age}, must-revalidate"
+
+
+def strong_etag(*parts: Any) -> str:
+    digest = hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison: W/ prefixes are ignored"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def conditional_json(
+    request: Request,
+    etag: str,
+    payload: Union[Any, Callable[[], Any]],
+    cache_control: str = DASHBOARD_CACHE_CONTROL,
+    cache: str = "http",
+) -> Response:
+    """
+    304 when the client's copy is current, otherwise the JSON payload
+
+    Pass a callable to build the payload only on a miss.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        cache_hits.inc(cache=cache)
+        return Response(status_code=304, headers=headers)
+    cache_misses.inc(cache=cache)
+    return JSONResponse(payload() if callable(payload) else payload, headers=headers)
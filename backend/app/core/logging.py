@@ -0,0 +1,227 @@
+"""
+Structured, non-blocking application logging
+Handlers only put records on a bounded in-memory queue; a background thread
+formats them as JSON lines and writes them to a rotating file, so a log call
+from a request handler costs a queue put. When the queue is full records are
+dropped and counted instead of blocking the request.
+
+- get_logger(name): a logger under "app" wired to the queue
+- log_event(): one record with structured fields
+- log_payload(): sampled, truncated and lazily rendered dump of a large payload
+- log_llm_exchange(): one "llm_response" record per model call
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from app.core.config import settings
+from app.core.tracing import current_span
+
+# Log file in PROJECT ROOT
+ROOT_DIR = Path(__file__).parent.parent.parent.parent
+DEFAULT_LOG_FILE = ROOT_DIR / "GROQ_DEBUG.log"
+
+# Every app logger ("app.services.llm_service", ...) inherits these handlers
+APP_LOGGER = "app"
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg plus structured fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        doc: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        tenant = getattr(record, "tenant", None)
+        if tenant and tenant != "anonymous":
+            doc["tenant"] = tenant
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id:
+            doc["trace_id"] = trace_id
+        fields = getattr(record, "fields", None)
+        if fields:
+            doc.update(fields)
+        if record.exc_text:
+            doc["exc"] = record.exc_text
+        return json.dumps(doc, ensure_ascii=False, default=str)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of waiting for queue space"""
+
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Runs on the caller's thread: resolve everything that depends on it,
+        # but leave JSON formatting to the writer thread
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.tenant = _current_tenant()
+        record.trace_id = current_span().trace_id
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_tenant_var = None
+
+
+def _current_tenant() -> Optional[str]:
+    # imported on first use: app.services modules import this one
+    global _tenant_var
+    if _tenant_var is None:
+        from app.services.rate_limiter import current_tenant
+        _tenant_var = current_tenant
+    return _tenant_var.get()
+
+
+def _file_handler(path: Path) -> logging.Handler:
+    """Time-based rotation when LOG_ROTATE_WHEN is set, size-based otherwise"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if settings.log_rotate_when:
+        handler: logging.Handler = logging.handlers.TimedRotatingFileHandler(
+            path, when=settings.log_rotate_when, backupCount=settings.log_backup_count, encoding="utf-8", delay=True,
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=settings.log_max_bytes, backupCount=settings.log_backup_count, encoding="utf-8", delay=True,
+        )
+    handler.setFormatter(JSONFormatter())
+    return handler
+
+
+class _Pipeline:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.handler: Optional[NonBlockingQueueHandler] = None
+        self.listener: Optional[logging.handlers.QueueListener] = None
+        self.sampled_out = 0
+
+    def setup(self) -> None:
+        with self._lock:
+            if self.handler is not None:
+                return
+            q: queue.Queue = queue.Queue(maxsize=settings.log_queue_size)
+            self.handler = NonBlockingQueueHandler(q)
+            path = Path(settings.log_file) if settings.log_file else DEFAULT_LOG_FILE
+            self.listener = logging.handlers.QueueListener(q, _file_handler(path), respect_handler_level=True)
+            self.listener.start()
+
+            logger = logging.getLogger(APP_LOGGER)
+            logger.setLevel(settings.log_level.upper())
+            logger.addHandler(self.handler)
+            logger.propagate = False
+            atexit.register(self.shutdown)
+
+    def shutdown(self) -> None:
+        """Flush queued records and stop the writer thread"""
+        with self._lock:
+            if self.listener is None:
+                return
+            logging.getLogger(APP_LOGGER).removeHandler(self.handler)
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+            self.listener = None
+            self.handler = None
+
+
+_pipeline = _Pipeline()
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger wired to the buffered JSON pipeline (name should start with "app.")"""
+    _pipeline.setup()
+    return logging.getLogger(name)
+
+
+def log_event(logger: logging.Logger, message: str, level: int = logging.INFO, **fields: Any) -> None:
+    """Log one record carrying structured fields"""
+    if logger.isEnabledFor(level):
+        logger.log(level, message, extra={"fields": fields} if fields else None)
+
+
+def log_payload(
+    logger: logging.Logger,
+    message: str,
+    payload: Union[Any, Callable[[], Any]],
+    level: int = logging.INFO,
+    **fields: Any,
+) -> None:
+    """
+    Log a large payload (prompt data, widget specs, data previews)
+
+    Only a LOG_PAYLOAD_SAMPLE_RATE share of calls is logged and the rendered
+    text is cut at LOG_PAYLOAD_MAX_CHARS. Pass a callable to defer rendering
+    (e.g. ``lambda: df.to_string()``) so sampled-out calls cost nothing.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if settings.log_payload_sample_rate < 1.0 and random.random() >= settings.log_payload_sample_rate:
+        _pipeline.sampled_out += 1
+        return
+    value = payload() if callable(payload) else payload
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+    limit = settings.log_payload_max_chars
+    if limit and len(text) > limit:
+        fields["truncated_chars"] = len(text) - limit
+        text = text[:limit]
+    logger.log(level, message, extra={"fields": {**fields, "payload": text}})
+
+
+def log_llm_exchange(
+    logger: logging.Logger,
+    model: str,
+    messages: List[Dict[str, Any]],
+    response: str,
+    tokens: Optional[int] = None,
+) -> None:
+    """
+    Log a model call as sizes and token count
+
+    With LOG_LLM_EXCHANGES the full messages and response are included too,
+    which is what mock_llm_server.py replays.
+    """
+    fields: Dict[str, Any] = {
+        "model": model,
+        "message_count": len(messages),
+        "prompt_chars": sum(len(m.get("content") or "") for m in messages),
+        "response_chars": len(response or ""),
+        "tokens": tokens,
+    }
+    if settings.log_llm_exchanges:
+        fields.update(messages=messages, response=response)
+    log_event(logger, "llm_response", **fields)
+
+
+def logging_stats() -> Dict[str, int]:
+    """Queue depth and records dropped or sampled out"""
+    handler = _pipeline.handler
+    return {
+        "queued": handler.queue.qsize() if handler else 0,
+        "dropped": handler.dropped if handler else 0,
+        "payloads_sampled_out": _pipeline.sampled_out,
+    }
+
+
+def shutdown() -> None:
+    _pipeline.shutdown()
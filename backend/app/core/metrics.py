@@ -0,0 +1,236 @@
+"""
+In-process metrics in the Prometheus text exposition format
+- Counter, Gauge and Histogram with labels; updates are a dict lookup and a
+  lock, so they are cheap enough for the request hot path
+- stage(): context manager and decorator timing a pipeline stage
+- collectors: callbacks run at scrape time (e.g. LLM gateway counters)
+
+Served at GET /metrics.
+"""
+import functools
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+from app.core.config import settings
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; covers a few ms of parsing up to long LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: counts per bucket (non-cumulative, +Inf last), sum
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][i] += 1
+            series[1][0] += value
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = [(k, list(counts), total[0]) for k, (counts, total) in self._series.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="%s"' % _number(bound)
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collect: Callable[[], None]) -> None:
+        """Run collect() before every scrape; it should set gauges"""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        for collect in self._collectors:
+            try:
+                collect()
+            except Exception as e:
+                print(f"⚠️ Metrics collector failed: {e}")
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(m.render() for m in metrics) + "\n"
+
+
+registry = Registry()
+
+# Request and pipeline timings
+http_requests = registry.counter("vizpilot_http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_latency = registry.histogram("vizpilot_http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+stage_latency = registry.histogram("vizpilot_stage_duration_seconds", "Time spent per pipeline stage", ("stage",))
+stage_errors = registry.counter("vizpilot_stage_errors_total", "Pipeline stages that raised", ("stage",))
+
+# Ingest
+files_parsed = registry.counter("vizpilot_files_parsed_total", "Uploaded files parsed, by detected parser type", ("type",))
+bytes_ingested = registry.counter("vizpilot_ingested_bytes_total", "Bytes of uploaded files saved, by file extension", ("type",))
+
+# Caches (hits and misses per cache name)
+cache_hits = registry.counter("vizpilot_cache_hits_total", "Cache hits", ("cache",))
+cache_misses = registry.counter("vizpilot_cache_misses_total", "Cache misses", ("cache",))
+
+# LLM
+llm_tokens = registry.counter("vizpilot_llm_tokens_total", "LLM tokens reported by the provider", ("priority",))
+llm_latency = registry.histogram("vizpilot_llm_request_duration_seconds", "LLM call latency through the gateway", ("priority", "outcome"))
+
+
+class stage:
+    """
+    Time a pipeline stage into vizpilot_stage_duration_seconds
+
+    Use as a context manager (``with stage("preview"): ...``) or as a
+    decorator on a service function (``@stage("parse")``).
+    """
+
+    __slots__ = ("name", "_start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> "stage":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if settings.metrics_enabled:
+            stage_latency.observe(time.perf_counter() - self._start, stage=self.name)
+            if exc_type is not None:
+                stage_errors.inc(stage=self.name)
+
+    def __call__(self, fn: Callable) -> Callable:
+        name = self.name
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    if not settings.metrics_enabled:
+        return
+    http_requests.inc(method=method, route=route, status=str(status))
+    http_latency.observe(seconds, method=method, route=route)
+
+
+def gauges_from(prefix: str, documentation: str, stats: Callable[[], Dict[str, float]]) -> None:
+    """Expose a stats() dict as one gauge per key, refreshed at scrape time"""
+    gauges: Dict[str, Gauge] = {}
+
+    def collect() -> None:
+        for key, value in stats().items():
+            gauge = gauges.get(key)
+            if gauge is None:
+                gauge = gauges[key] = registry.gauge(f"{prefix}_{key}", f"{documentation}: {key}")
+            gauge.set(float(value or 0))
+
+    registry.add_collector(collect)
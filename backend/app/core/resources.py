@@ -0,0 +1,188 @@
+"""
+Shared long-lived resources
+One container owns what requests share instead of building per call:
+- http(): httpx.AsyncClient with a keep-alive connection pool (Supabase Storage)
+- groq_session(): requests.Session keeping connections to the Groq API open
+- duckdb(): cursors from a pool over one in-memory DuckDB database
+- executor(name, workers): named thread pools (Supabase calls); pools owned
+  by other singletons (jobs, LLM attempts, forecast processes) register
+  with track_executor() so they are shut down with the rest
+
+Everything is created on first use, so cold starts stay cheap (see
+app.core.warmup), and closed by the app lifespan via aclose(). Clients,
+cursors and named pools used after aclose() are created again; tracked
+executors are shut down for good. Endpoints get the container
+through the get_resources dependency; services and background jobs use the
+module-level instance, which is the same object.
+"""
+import asyncio
+import contextlib
+import queue
+import threading
+import weakref
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, ContextManager, Dict, Iterator, List, Optional
+
+from fastapi import Request
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    import duckdb
+    import httpx
+    import requests
+
+
+class DuckDBPool:
+    """Cursors over one in-memory DuckDB database; a cursor is used by one thread at a time"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._root: Optional["duckdb.DuckDBPyConnection"] = None
+        self._idle: "queue.LifoQueue[duckdb.DuckDBPyConnection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    def _checkout(self) -> "duckdb.DuckDBPyConnection":
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._root is None:
+                import duckdb
+                self._root = duckdb.connect(":memory:")
+            return self._root.cursor()
+
+    @contextlib.contextmanager
+    def cursor(self) -> Iterator["duckdb.DuckDBPyConnection"]:
+        con = self._checkout()
+        try:
+            yield con
+        finally:
+            if self._root is not None and self._idle.qsize() < self.size:
+                self._idle.put(con)
+            else:
+                con.close()
+
+    def close(self) -> None:
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+            if self._root is not None:
+                self._root.close()
+                self._root = None
+
+
+class Resources:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._http: Optional["httpx.AsyncClient"] = None
+        self._groq_session: Optional["requests.Session"] = None
+        self._duckdb = DuckDBPool(settings.duckdb_pool_size)
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._tracked: "weakref.WeakSet[Executor]" = weakref.WeakSet()
+        self._closers: List[Callable[[], Any]] = []
+
+    def http(self) -> "httpx.AsyncClient":
+        """Shared async HTTP client (keep-alive pool bounded by HTTP_MAX_CONNECTIONS)"""
+        if self._http is None:
+            with self._lock:
+                if self._http is None:
+                    import httpx
+                    self._http = httpx.AsyncClient(
+                        timeout=30.0,
+                        limits=httpx.Limits(
+                            max_connections=settings.http_max_connections,
+                            max_keepalive_connections=settings.http_max_connections,
+                        ),
+                    )
+        return self._http
+
+    def groq_session(self) -> "requests.Session":
+        """Shared requests session for the Groq REST API"""
+        if self._groq_session is None:
+            with self._lock:
+                if self._groq_session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    # one host; enough sockets for every concurrent attempt (hedges included)
+                    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=max(8, settings.groq_max_concurrency * 4)))
+                    self._groq_session = session
+        return self._groq_session
+
+    def duckdb(self) -> ContextManager["duckdb.DuckDBPyConnection"]:
+        """
+        A pooled DuckDB cursor for the duration of a with block
+
+        Usage:
+            with resources.duckdb() as con:
+                df = con.execute("SELECT ...").fetch_df()
+        """
+        return self._duckdb.cursor()
+
+    def executor(self, name: str, max_workers: int) -> ThreadPoolExecutor:
+        """Named thread pool, created on first use (threads are named after it)"""
+        executor = self._executors.get(name)
+        if executor is None:
+            with self._lock:
+                executor = self._executors.get(name)
+                if executor is None:
+                    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+                    self._executors[name] = executor
+        return executor
+
+    def track_executor(self, executor: Executor) -> None:
+        """Shut an externally owned executor down with the container"""
+        self._tracked.add(executor)
+
+    def on_close(self, fn: Callable[[], Any]) -> None:
+        """Run fn (e.g. a pool's dispose) when the container closes"""
+        self._closers.append(fn)
+
+    async def aclose(self, grace: Optional[float] = None) -> None:
+        """
+        Close clients and pools, cancel queued executor work and wait up to
+        grace seconds (SHUTDOWN_GRACE) for running work to finish
+        """
+        grace = settings.shutdown_grace if grace is None else grace
+        with self._lock:
+            http, self._http = self._http, None
+            session, self._groq_session = self._groq_session, None
+            executors = list(self._executors.values()) + list(self._tracked)
+            self._executors = {}
+            self._tracked = weakref.WeakSet()
+            closers, self._closers = self._closers, []
+
+        if http is not None:
+            await http.aclose()
+        if session is not None:
+            session.close()
+        self._duckdb.close()
+        for fn in closers:
+            try:
+                fn()
+            except Exception as e:
+                print(f"⚠️ Resource close failed: {e}")
+
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if executors:
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(*(asyncio.to_thread(e.shutdown, wait=True) for e in executors)), grace
+                )
+            except asyncio.TimeoutError:
+                print(f"⚠️ Background work still running after {grace:.0f}s shutdown grace")
+
+
+def get_resources(request: Request) -> Resources:
+    """FastAPI dependency: the app's resource container"""
+    return request.app.state.resources
+
+
+# Global instance
+resources = Resources()
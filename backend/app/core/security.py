@@ -1,5 +1,151 @@
-"""Security helpers placeholder"""
+"""
+Security helpers
+- TokenVerifier: verifies Supabase access tokens (JWTs) locally against cached
+  signing keys instead of asking Supabase Auth on every request. Keys come
+  from SUPABASE_JWT_SECRET (HS256 projects), a JWKS endpoint (asymmetric
+  signing keys, default {SUPABASE_URL}/auth/v1/.well-known/jwks.json) or a
+  local JWKS file (JWT_KEY_FILE, e.g. for tests). The key set is reloaded
+  every JWT_KEYS_REFRESH seconds, and early when a token names an unknown
+  key id (rotation), at most once per KEY_MISS_INTERVAL.
+
+Async callers use verify_async(), which runs the verification in a worker
+thread when it may reload (fetch) keys. Without any keys (no
+SUPABASE_JWT_SECRET and no published JWKS) verify raises NoSigningKeys and
+the caller must ask Supabase Auth instead.
+"""
+import asyncio
+import json
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from jose import JWTError, jwk, jwt
+
+from app.core.config import settings
+
+# Default algorithm per JWK key type when the key does not name one
+DEFAULT_ALGORITHMS = {"oct": "HS256", "RSA": "RS256", "EC": "ES256"}
+
+# Shortest gap between reloads triggered by unknown key ids
+KEY_MISS_INTERVAL = 30.0
+
 
 def verify_token(token: str) -> bool:
     return token == "dev-token"
 
+
+class InvalidToken(Exception):
+    """The token is malformed, expired, for another audience or not signed by a known key"""
+
+
+class NoSigningKeys(InvalidToken):
+    """No signing keys are configured or published, so tokens cannot be verified locally"""
+
+
+class TokenVerifier:
+    def __init__(self):
+        self._keys: Dict[Optional[str], Tuple[str, Any]] = {}
+        self._loaded_at: Optional[float] = None
+        self._last_miss_reload = float("-inf")
+        self._lock = threading.Lock()
+
+    def _jwks_url(self) -> str:
+        if settings.jwt_jwks_url:
+            return settings.jwt_jwks_url
+        if settings.supabase_url:
+            return settings.supabase_url.rstrip("/") + "/auth/v1/.well-known/jwks.json"
+        return ""
+
+    def _fetch_jwks(self) -> Dict[str, Any]:
+        if settings.jwt_key_file:
+            with open(settings.jwt_key_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        url = self._jwks_url()
+        if not url:
+            return {"keys": []}
+        import httpx  # only needed for remote key sets, and only at reload
+        response = httpx.get(url, timeout=5.0)
+        response.raise_for_status()
+        return response.json()
+
+    def reload(self) -> None:
+        """Rebuild the key set; on failure the previous keys stay in use"""
+        keys: Dict[Optional[str], Tuple[str, Any]] = {}
+        if settings.supabase_jwt_secret:
+            keys[None] = ("HS256", jwk.construct(settings.supabase_jwt_secret, "HS256"))
+        try:
+            document = self._fetch_jwks()
+            for entry in document.get("keys", [document] if "kty" in document else []):
+                alg = entry.get("alg") or DEFAULT_ALGORITHMS.get(entry.get("kty", ""))
+                if alg:
+                    keys[entry.get("kid")] = (alg, jwk.construct(entry, alg))
+        except Exception as e:
+            print(f"⚠️ Could not load JWT signing keys: {e}")
+            if self._keys:
+                keys = {**self._keys, **keys}
+        if not keys:
+            print("⚠️ No JWT signing keys (set SUPABASE_JWT_SECRET or JWT_JWKS_URL); tokens are verified by Supabase Auth")
+        self._keys = keys
+        self._loaded_at = time.monotonic()
+
+    def _stale(self, now: float) -> bool:
+        return self._loaded_at is None or now - self._loaded_at > settings.jwt_keys_refresh
+
+    def _miss_reload_due(self, kid: Optional[str], now: float) -> bool:
+        return kid is not None and kid not in self._keys and now - self._last_miss_reload > KEY_MISS_INTERVAL
+
+    def _key(self, kid: Optional[str]) -> Optional[Tuple[str, Any]]:
+        now = time.monotonic()
+        if self._stale(now):
+            with self._lock:
+                if self._stale(now):
+                    self.reload()
+        key = self._keys.get(kid)
+        if key is None and self._miss_reload_due(kid, now):
+            with self._lock:
+                if self._miss_reload_due(kid, now):
+                    self._last_miss_reload = now
+                    self.reload()
+            key = self._keys.get(kid)
+        if key is None and kid is not None:
+            # HS256 tokens may carry a kid that is not published anywhere
+            key = self._keys.get(None)
+        return key
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """Claims of a valid token; raises InvalidToken otherwise"""
+        try:
+            header = jwt.get_unverified_header(token)
+        except JWTError as e:
+            raise InvalidToken(str(e))
+        key = self._key(header.get("kid"))
+        if key is None:
+            if not self._keys:
+                raise NoSigningKeys("No signing keys to verify tokens with")
+            raise InvalidToken("Unknown signing key")
+        alg, signing_key = key
+        if header.get("alg") != alg:
+            raise InvalidToken("Unexpected signing algorithm")
+        try:
+            return jwt.decode(
+                token, signing_key, algorithms=[alg],
+                audience=settings.jwt_audience or None,
+                options={"verify_aud": bool(settings.jwt_audience)},
+            )
+        except JWTError as e:
+            raise InvalidToken(str(e))
+
+    async def verify_async(self, token: str) -> Dict[str, Any]:
+        """verify() for async callers; runs in a thread when it may reload the key set"""
+        now = time.monotonic()
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+        except JWTError:
+            kid = None
+        if self._stale(now) or self._miss_reload_due(kid, now):
+            return await asyncio.to_thread(self.verify, token)
+        return self.verify(token)
+
+
+# Global instance
+token_verifier = TokenVerifier()
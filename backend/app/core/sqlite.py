@@ -0,0 +1,59 @@
+"""
+Embedded SQLite databases for the app's repositories
+- WAL journal: readers never block the writer and vice versa
+- one connection per thread, autocommit; use transaction() for multi-statement writes
+- schema (CREATE ... IF NOT EXISTS) applied on first connect
+"""
+import contextlib
+import os
+import sqlite3
+import threading
+from typing import Iterator
+
+
+def sqlite_path(url: str) -> str:
+    """File path of a sqlite:/// URL; non-SQLite URLs fall back to ./vizpilot.db"""
+    if url.startswith("sqlite:///"):
+        return url[len("sqlite:///"):] or "vizpilot.db"
+    print(f"⚠️ Embedded stores need SQLite; {url.split(':', 1)[0]} URL given, using ./vizpilot.db")
+    return "vizpilot.db"
+
+
+class SQLiteDatabase:
+    def __init__(self, path: str, schema: str):
+        self.path = path
+        self.schema = schema
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # durable across app crashes; fsync at checkpoints
+            conn.execute("PRAGMA busy_timeout=10000")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+            if not self._initialized:
+                with self._init_lock:
+                    if not self._initialized:
+                        conn.executescript(self.schema)
+                        self._initialized = True
+        return conn
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """BEGIN IMMEDIATE ... COMMIT: takes the write lock up front so concurrent writers queue instead of deadlocking"""
+        conn = self.conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
@@ -0,0 +1,65 @@
+"""Server-Sent Events helpers"""
+import asyncio
+import json
+import threading
+from typing import Any, Callable, Set, Tuple
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # stop nginx/Render proxies from buffering the stream
+}
+
+# Comment frame that keeps idle connections open through proxies
+SSE_KEEPALIVE = ": keep-alive\n\n"
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one SSE frame with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class AsyncNotifier:
+    """
+    Wakes coroutines when state changed by worker threads
+
+    Producers (job threads, refresh jobs) call notify_all(); SSE streams
+    await wait_for() on the event loop instead of holding a threadpool
+    worker in Condition.wait for the whole subscription.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    def notify_all(self) -> None:
+        """Safe to call from any thread"""
+        with self._lock:
+            waiters = list(self._waiters)
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # loop already closed
+
+    async def wait_for(self, predicate: Callable[[], bool], timeout: float) -> bool:
+        """Await until predicate() is true or timeout expires; returns its last value"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            waiter = (loop, asyncio.Event())
+            # register before checking so a notify in between is not lost
+            with self._lock:
+                self._waiters.add(waiter)
+            try:
+                if predicate():
+                    return True
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return False
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+            finally:
+                with self._lock:
+                    self._waiters.discard(waiter)
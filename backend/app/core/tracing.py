@@ -0,0 +1,254 @@
+"""
+Request tracing in the OpenTelemetry style, without the SDK dependency
+- spans carry trace/span/parent ids (W3C traceparent compatible), timings,
+  attributes and a status; the current span lives in a contextvar, so it
+  follows the request into threadpool handlers and background jobs
+- finished spans go to a bounded queue; an exporter thread appends them as
+  JSON lines to TRACE_FILE (one object per span, OTLP-like field names)
+- recent spans are also kept in memory (collector stand-in for tests/tools)
+
+Usage:
+    with span("duckdb.preview", rows=200) as s:
+        ...
+        s.set_attribute("bytes", n)
+
+    @traced("parse_file")
+    def parse_file(...): ...
+"""
+import atexit
+import contextvars
+import functools
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from app.core.config import settings
+
+# Trace file in PROJECT ROOT unless TRACE_FILE is set
+ROOT_DIR = Path(__file__).parent.parent.parent.parent
+DEFAULT_TRACE_FILE = ROOT_DIR / "traces.jsonl"
+
+RECENT_SPANS = 2000
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "sampled", "start_ns", "end_ns", "attributes", "status", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool, attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def record_error(self, error: BaseException) -> None:
+        self.status = "error"
+        self.error = f"{type(error).__name__}: {error}"
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "status": self.status,
+            **({"error": self.error} if self.error else {}),
+        }
+
+
+class _NoopSpan:
+    """Returned when tracing is off or the trace is not sampled"""
+    trace_id = span_id = traceparent = None
+    sampled = False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+class SpanExporter:
+    """Batches finished spans onto a background thread that appends them to a JSONL file"""
+
+    def __init__(self, path: Optional[Path], queue_size: int = 10000):
+        self.path = path
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=RECENT_SPANS)
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        record = span.to_dict()
+        self.recent.append(record)
+        if self.path is None:
+            return
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.shutdown)
+
+    def _run(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        stop = False
+        while not stop:
+            batch = [self._queue.get()]
+            while len(batch) < 512:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                stop = True
+                batch = [r for r in batch if r is not None]
+            if batch:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(r, default=str) + "\n" for r in batch))
+
+    def shutdown(self, timeout: float = 2.0) -> None:
+        """Flush pending spans"""
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join(timeout)
+        self._thread = None
+
+
+def _exporter_path() -> Optional[Path]:
+    if settings.trace_export != "file":
+        return None
+    return Path(settings.trace_file) if settings.trace_file else DEFAULT_TRACE_FILE
+
+
+exporter = SpanExporter(_exporter_path())
+
+
+def current_span():
+    """The active span, or a no-op span outside any (sampled) trace"""
+    return _current.get() or NOOP_SPAN
+
+
+def parse_traceparent(header: Optional[str]):
+    """(trace_id, parent_span_id, sampled) from a W3C traceparent header, or None"""
+    parts = (header or "").strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16), int(parts[3], 16)
+    except ValueError:
+        return None
+    return parts[1], parts[2], bool(int(parts[3], 16) & 1)
+
+
+class span:
+    """
+    Start a child of the current span (or a new trace) for the with-block
+
+    remote_parent: a traceparent header value continuing a caller's trace.
+    Exceptions mark the span as errored and propagate.
+    """
+
+    __slots__ = ("name", "attributes", "remote_parent", "_span", "_token")
+
+    def __init__(self, name: str, remote_parent: Optional[str] = None, **attributes: Any):
+        self.name = name
+        self.attributes = attributes
+        self.remote_parent = remote_parent
+
+    def __enter__(self):
+        self._span = None
+        if not settings.tracing_enabled:
+            return NOOP_SPAN
+        parent = _current.get()
+        if parent is not None:
+            trace_id, parent_id, sampled = parent.trace_id, parent.span_id, parent.sampled
+        else:
+            remote = parse_traceparent(self.remote_parent)
+            if remote:
+                trace_id, parent_id, sampled = remote
+            else:
+                trace_id, parent_id = os.urandom(16).hex(), None
+                sampled = random.random() < settings.trace_sample_rate
+        self._span = Span(self.name, trace_id, parent_id, sampled, dict(self.attributes))
+        self._token = _current.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        s = self._span
+        if s is None:
+            return
+        _current.reset(self._token)
+        s.end_ns = time.time_ns()
+        if exc is not None:
+            s.record_error(exc)
+        if s.sampled:
+            exporter.export(s)
+
+
+def traced(name: Optional[str] = None, **attributes: Any) -> Callable:
+    """Decorator: run the function inside a span (named after it by default)"""
+
+    def decorate(fn: Callable) -> Callable:
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name, **attributes):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def trace_spans(trace_id: str) -> List[Dict[str, Any]]:
+    """Recently finished spans of one trace, oldest first"""
+    return sorted((s for s in list(exporter.recent) if s["traceId"] == trace_id), key=lambda s: s["startTimeUnixNano"])
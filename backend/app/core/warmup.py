@@ -0,0 +1,71 @@
+"""
+Optional warm-up after startup
+Heavy dependencies (langchain_groq and the ChatGroq client, document parsers,
+the shared DuckDB/HTTP pools, the Supabase client, the Postgres pool) are loaded on first use so a cold
+instance starts serving quickly. With WARMUP_ON_STARTUP=true they are loaded
+in a background thread right after startup instead, so the first upload or
+LLM call does not pay for them either.
+
+Register more hooks with register_warmup(name, fn).
+"""
+import threading
+import time
+from typing import Callable, List, Tuple
+
+_hooks: List[Tuple[str, Callable[[], object]]] = []
+
+
+def register_warmup(name: str, fn: Callable[[], object]) -> None:
+    _hooks.append((name, fn))
+
+
+def run_warmup() -> None:
+    """Run every hook; failures are reported and skipped"""
+    for name, fn in _hooks:
+        start = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            print(f"⚠️ Warm-up {name} failed: {e}")
+            continue
+        print(f"🔥 Warm-up {name}: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+def start_warmup() -> threading.Thread:
+    thread = threading.Thread(target=run_warmup, name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def _llm_client():
+    from app.services.llm_service import chat_model
+    chat_model()
+
+
+def _document_parsers():
+    import docx  # noqa: F401
+    import openpyxl  # noqa: F401
+    import PyPDF2  # noqa: F401
+
+
+def _shared_clients():
+    from app.core.resources import resources
+    with resources.duckdb() as con:
+        con.execute("SELECT 1").fetchall()
+    resources.groq_session()
+
+
+def _database_clients():
+    from app.db.supabase_client import SUPABASE_KEY, SUPABASE_URL, get_postgres, get_supabase
+    if SUPABASE_URL and SUPABASE_KEY:
+        get_supabase()
+    postgres = get_postgres()
+    if postgres is not None:
+        with postgres.engine.connect():
+            pass
+
+
+register_warmup("llm_client", _llm_client)
+register_warmup("document_parsers", _document_parsers)
+register_warmup("shared_clients", _shared_clients)
+register_warmup("database_clients", _database_clients)
@@ -0,0 +1,148 @@
+"""
+Direct Postgres access for hot relational reads
+Every Supabase REST query is an HTTPS round trip through PostgREST. When
+SUPABASE_DB_URL is set (the project's Postgres connection string), the
+queries below run over a pooled SQLAlchemy engine instead: a checked-out
+socket and one statement. The statements are built once at import, so
+SQLAlchemy's compiled cache reuses them for every call.
+
+Tables mirror app/db/schema.sql. The schema_translate_map drops the
+"public" schema on SQLite so tests (or a local stand-in) can run the same
+statements against a SQLite file.
+
+Calls are blocking; async handlers use run_db() like the Supabase client.
+"""
+import datetime
+import uuid
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from sqlalchemy import (
+    JSON, Boolean, Column, DateTime, ForeignKey, MetaData, String, Table, Uuid,
+    bindparam, create_engine, select,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import Engine, RowMapping
+
+from app.core.config import settings
+from app.core.resources import resources
+
+metadata = MetaData(schema="public")
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+UUIDType = Uuid(as_uuid=False)
+
+businesses = Table(
+    "businesses", metadata,
+    Column("id", UUIDType, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("industry", String),
+    Column("size", String),
+    Column("domain", String),
+    Column("created_at", DateTime(timezone=True)),
+    Column("updated_at", DateTime(timezone=True)),
+    Column("settings", JSONType),
+    Column("is_active", Boolean),
+)
+
+users = Table(
+    "users", metadata,
+    Column("id", UUIDType, primary_key=True),
+    Column("business_id", UUIDType, ForeignKey("public.businesses.id")),
+    Column("email", String, nullable=False),
+    Column("full_name", String),
+    Column("role", String, nullable=False),
+    Column("avatar_url", String),
+    Column("created_at", DateTime(timezone=True)),
+    Column("updated_at", DateTime(timezone=True)),
+    Column("last_login", DateTime(timezone=True)),
+    Column("is_active", Boolean),
+    Column("metadata", JSONType),
+)
+
+invitations = Table(
+    "invitations", metadata,
+    Column("id", UUIDType, primary_key=True),
+    Column("business_id", UUIDType, ForeignKey("public.businesses.id")),
+    Column("email", String, nullable=False),
+    Column("role", String, nullable=False),
+    Column("invited_by", UUIDType),
+    Column("token", String, nullable=False, index=True),
+    Column("expires_at", DateTime(timezone=True), nullable=False),
+    Column("status", String, nullable=False),
+    Column("created_at", DateTime(timezone=True)),
+    Column("accepted_at", DateTime(timezone=True)),
+)
+
+# Hot statements (the same shapes the REST client asks PostgREST for)
+PROFILE_BY_ID = select(
+    users, *[c.label(f"business__{c.name}") for c in businesses.c]
+).select_from(
+    users.outerjoin(businesses, users.c.business_id == businesses.c.id)
+).where(users.c.id == bindparam("user_id"))
+
+INVITATION_BY_TOKEN = select(
+    invitations, businesses.c.name.label("business__name"), businesses.c.industry.label("business__industry")
+).select_from(
+    invitations.outerjoin(businesses, invitations.c.business_id == businesses.c.id)
+).where(invitations.c.token == bindparam("token"))
+
+
+def _value(value: Any) -> Any:
+    """Row values as PostgREST would serialize them"""
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _nest(row: RowMapping) -> Dict[str, Any]:
+    """Flat row -> dict with the joined business under "businesses" (like select("*, businesses(*)"))"""
+    record: Dict[str, Any] = {}
+    business: Dict[str, Any] = {}
+    for key, value in row.items():
+        if key.startswith("business__"):
+            business[key[len("business__"):]] = _value(value)
+        else:
+            record[key] = _value(value)
+    record["businesses"] = business if business.get("name") is not None else None
+    return record
+
+
+class PostgresRepository:
+    """Pooled reads against the application schema"""
+
+    def __init__(self, url: str, pool_size: int = 5, max_overflow: int = 10):
+        options: Dict[str, Any] = {"pool_pre_ping": True}
+        if url.startswith("sqlite"):
+            translate = {"public": None}
+        else:
+            translate = {}
+            options.update(pool_size=pool_size, max_overflow=max_overflow, pool_recycle=1800)
+        self.engine: Engine = create_engine(url, **options).execution_options(schema_translate_map=translate)
+
+    def profile_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """User row with its business nested under "businesses", or None"""
+        with self.engine.connect() as conn:
+            row = conn.execute(PROFILE_BY_ID, {"user_id": user_id}).mappings().first()
+        return _nest(row) if row else None
+
+    def invitation_by_token(self, token: str) -> Optional[Dict[str, Any]]:
+        """Invitation with the business name and industry nested under "businesses", or None"""
+        with self.engine.connect() as conn:
+            row = conn.execute(INVITATION_BY_TOKEN, {"token": token}).mappings().first()
+        return _nest(row) if row else None
+
+    def dispose(self) -> None:
+        self.engine.dispose()
+
+
+# Global instance (None without SUPABASE_DB_URL: everything goes through the REST client)
+postgres: Optional[PostgresRepository] = (
+    PostgresRepository(settings.supabase_db_url, settings.db_pool_size, settings.db_max_overflow)
+    if settings.supabase_db_url else None
+)
+if postgres is not None:
+    resources.on_close(postgres.dispose)
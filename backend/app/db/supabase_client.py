@@ -1,12 +1,25 @@
 """
 Supabase client configuration for VizPilot
 Handles authentication and database operations
+
+The supabase package and the clients are loaded on first use, so the app
+starts (and serves everything that does not need Supabase) without the
+SUPABASE_* variables; a missing variable is reported when a client is
+first requested.
 """
+import asyncio
+import contextvars
+import functools
 import os
-from typing import Optional
-from supabase import create_client, Client
+from typing import TYPE_CHECKING, Any, Callable, Optional, TypeVar
 from dotenv import load_dotenv
 
+from app.core.config import settings
+from app.core.resources import resources
+
+if TYPE_CHECKING:
+    from supabase import Client
+
 load_dotenv()
 
 # Supabase configuration
@@ -14,39 +27,71 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("SUPABASE_URL and SUPABASE_ANON_KEY must be set in environment variables")
-
 
 class SupabaseClient:
     """Singleton Supabase client"""
     
-    _client: Optional[Client] = None
-    _service_client: Optional[Client] = None
+    _client: Optional["Client"] = None
+    _service_client: Optional["Client"] = None
     
     @classmethod
-    def get_client(cls) -> Client:
+    def get_client(cls) -> "Client":
         """Get Supabase client for regular operations"""
         if cls._client is None:
+            if not SUPABASE_URL or not SUPABASE_KEY:
+                raise ValueError("SUPABASE_URL and SUPABASE_ANON_KEY must be set in environment variables")
+            from supabase import create_client
             cls._client = create_client(SUPABASE_URL, SUPABASE_KEY)
         return cls._client
     
     @classmethod
-    def get_service_client(cls) -> Client:
+    def get_service_client(cls) -> "Client":
         """Get Supabase client with service role (bypasses RLS)"""
         if cls._service_client is None:
-            if not SUPABASE_SERVICE_KEY:
-                raise ValueError("SUPABASE_SERVICE_ROLE_KEY must be set for admin operations")
+            if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
+                raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set for admin operations")
+            from supabase import create_client
             cls._service_client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
         return cls._service_client
 
 
 # Convenience functions
-def get_supabase() -> Client:
+def get_supabase() -> "Client":
     """Get Supabase client instance"""
     return SupabaseClient.get_client()
 
 
-def get_supabase_admin() -> Client:
+def get_supabase_admin() -> "Client":
     """Get Supabase client with admin privileges"""
     return SupabaseClient.get_service_client()
+
+
+def get_postgres():
+    """
+    Pooled Postgres repository (app/db/postgres.py) when SUPABASE_DB_URL is
+    set, else None; SQLAlchemy is only imported when it is configured
+    """
+    if not settings.supabase_db_url:
+        return None
+    from app.db.postgres import postgres
+    return postgres
+
+
+# The supabase client is synchronous: every .execute() / auth call is a
+# blocking HTTP round trip. Async handlers run them on the shared "supabase"
+# pool instead of on the event loop; its size bounds concurrent Supabase requests.
+T = TypeVar("T")
+
+
+async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking Supabase call off the event loop
+
+    Usage:
+        user = await run_db(supabase.table("users").select("*").eq("id", uid).execute)
+        a, b = await asyncio.gather(run_db(query_a.execute), run_db(query_b.execute))
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    executor = resources.executor("supabase", settings.supabase_max_workers)
+    return await loop.run_in_executor(executor, functools.partial(ctx.run, fn, *args, **kwargs))
@@ -1,10 +1,42 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from app.core.config import settings
-from app.api.endpoints import upload, chat, business, documents, ai, dashboard, dashboard_refine, auth
+from app.core import metrics
+from app.core.logging import logging_stats
+from app.core.resources import resources
+from app.core.tracing import span
+from app.core.warmup import start_warmup
+from app.services.llm_gateway import gateway_stats
+from app.services.rate_limiter import current_tenant
+from app.api.endpoints import upload, chat, business, documents, ai, dashboard, dashboard_refine, auth, jobs, datasets
+
+
+def import_legacy_json_stores():
+    """Move dashboards and businesses saved as JSON files into the SQLite stores (once)"""
+    dashboard.import_legacy_dashboards()
+    business.import_legacy_businesses()
+
 
-app = FastAPI(title=settings.app_name)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup: legacy store import and optional warm-up (WARMUP_ON_STARTUP)
+    Shutdown: close shared clients, pools and executors (app.core.resources)
+    """
+    import_legacy_json_stores()
+    if settings.warmup_on_startup:
+        start_warmup()
+    yield
+    await resources.aclose()
+
+
+app = FastAPI(title=settings.app_name, lifespan=lifespan)
+app.state.resources = resources
 
 app.add_middleware(
     CORSMiddleware,
@@ -12,6 +44,63 @@ app.add_middleware(
     allow_methods=["*"], allow_headers=["*"]
 )
 
+
+@app.middleware("http")
+async def tenant_context(request: Request, call_next):
+    """Tag the request with its tenant so LLM rate limiting can share capacity fairly"""
+    tenant = request.headers.get("X-Business-Id") or request.headers.get("X-User-Email") or "anonymous"
+    token = current_tenant.set(tenant)
+    try:
+        return await call_next(request)
+    finally:
+        current_tenant.reset(token)
+
+
+@app.middleware("http")
+async def request_metrics(request: Request, call_next):
+    """Count and time every request by its route template (not the raw path)"""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        metrics.observe_request(
+            request.method,
+            getattr(route, "path", "unmatched"),
+            status,
+            time.perf_counter() - start,
+        )
+
+
+@app.middleware("http")
+async def request_tracing(request: Request, call_next):
+    """Root span per request; continues the caller's trace when a traceparent header is sent"""
+    with span(f"{request.method} {request.url.path}", remote_parent=request.headers.get("traceparent"),
+              **{"http.method": request.method, "http.target": request.url.path}) as s:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            s.name = f"{request.method} {route.path}"
+            s.set_attribute("http.route", route.path)
+        s.set_attribute("http.status_code", response.status_code)
+        if s.traceparent:
+            response.headers["traceparent"] = s.traceparent
+        return response
+
+
+metrics.gauges_from("vizpilot_llm_gateway", "LLM gateway counter", gateway_stats)
+metrics.gauges_from("vizpilot_logging", "Log pipeline counter", logging_stats)
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    if not settings.metrics_enabled:
+        return PlainTextResponse("metrics disabled\n", status_code=404)
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 def health():
     return {"status": "ok", "service": "Vizpilot Backend", "version": "2.0"}
@@ -34,5 +123,8 @@ app.include_router(documents.router, prefix="/api", tags=["documents"])
 app.include_router(ai.router, prefix="/api", tags=["ai"])
 app.include_router(dashboard.router, prefix="/api", tags=["dashboard"])
 app.include_router(dashboard_refine.router, tags=["dashboard"])
+app.include_router(jobs.router, prefix="/api", tags=["jobs"])
+app.include_router(datasets.router, prefix="/api", tags=["datasets"])
+
 
 
@@ -0,0 +1,233 @@
+"""
+Local anomaly detection engine
+Vectorized over all metric columns at once (arrays are n_metrics x T):
+- seasonal decomposition (moving-average trend + per-phase offsets) so the
+  regular seasonal pattern is not flagged
+- rolling robust z-score (median / MAD) of the deseasonalized series for
+  spikes and drops
+- CUSUM binary segmentation for level shifts (changepoints)
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# 0.6745 scales MAD to the standard deviation of a normal distribution
+MAD_SCALE = 0.6745
+# 95% critical value of the Kolmogorov-Smirnov / Brownian bridge supremum
+CUSUM_CRITICAL = 1.358
+
+
+def rolling_robust_z(X: np.ndarray, window: int) -> np.ndarray:
+    """
+    Robust z-scores of deviations from a rolling median
+
+    Windows are centered and shifted inwards at the edges. Deviations are scaled
+    by the series noise level; per-window MADs of a handful of points are too
+    noisy and flag ordinary noise.
+    """
+    n, T = X.shape
+    window = max(3, min(window, T) | 1)  # odd, at least 3
+    if window > T:
+        window = T if T % 2 else T - 1
+    windows = sliding_window_view(X, window, axis=1)  # (n, T - window + 1, window)
+    starts = np.clip(np.arange(T) - window // 2, 0, T - window)
+    windows = windows[:, starts]  # (n, T, window)
+    return (X - np.median(windows, axis=2)) / noise_sigma(X)[:, None]
+
+
+def seasonal_component(X: np.ndarray, period: int) -> Optional[np.ndarray]:
+    """Per-phase seasonal offsets after removing a centered moving-average trend (None if too short)"""
+    n, T = X.shape
+    if period < 2 or T < 2 * period:
+        return None
+    # centered moving average (2 x m for even periods)
+    kernel = np.ones(period) / period
+    if period % 2 == 0:
+        kernel = np.convolve(kernel, np.ones(2) / 2)
+    k = len(kernel)
+    half = k // 2
+    trend = np.full_like(X, np.nan)
+    trend[:, half:T - half] = sliding_window_view(X, k, axis=1) @ kernel
+    detrended = X - trend
+
+    phase = np.arange(T) % period
+    seasonal = np.empty_like(X)
+    for p in range(period):
+        cols = phase == p
+        seasonal[:, cols] = np.nanmean(detrended[:, cols], axis=1, keepdims=True)
+    return seasonal - seasonal[:, :period].mean(axis=1, keepdims=True)
+
+
+def noise_sigma(X: np.ndarray) -> np.ndarray:
+    """Noise level per row from first differences; robust to level shifts and trends"""
+    diffs = np.diff(X, axis=-1)
+    dev = diffs - np.median(diffs, axis=-1, keepdims=True)
+    sigma = np.median(np.abs(dev), axis=-1) / MAD_SCALE / np.sqrt(2)
+    fallback = np.std(diffs, axis=-1) / np.sqrt(2)
+    sigma = np.where(sigma > 0, sigma, fallback)
+    return np.where(sigma > 0, sigma, 1.0)
+
+
+def changepoints(x: np.ndarray, min_size: int = 3, max_points: int = 5) -> List[int]:
+    """
+    Mean-shift changepoints of one series by CUSUM binary segmentation
+
+    Returns indices where a new level starts.
+    """
+    T = len(x)
+    if T < 2 * min_size:
+        return []
+    sigma = float(noise_sigma(x))
+
+    found: List[int] = []
+    segments = [(0, T)]
+    while segments and len(found) < max_points:
+        start, end = segments.pop()
+        seg = x[start:end]
+        m = len(seg)
+        if m < 2 * min_size:
+            continue
+        cusum = np.cumsum(seg - seg.mean())[:-1]
+        k = np.arange(1, m)
+        valid = (k >= min_size) & (k <= m - min_size)
+        stat = np.where(valid, np.abs(cusum), 0.0)
+        best = int(stat.argmax())
+        if stat[best] / (sigma * np.sqrt(m)) <= CUSUM_CRITICAL:
+            continue
+        split = start + best + 1
+        found.append(split)
+        segments.extend([(start, split), (split, end)])
+    return sorted(found)
+
+
+def _severity(score: float) -> str:
+    if score >= 6:
+        return "high"
+    if score >= 4.5:
+        return "medium"
+    return "low"
+
+
+def detect(
+    X: np.ndarray,
+    metrics: Sequence[str],
+    labels: Optional[Sequence[Any]] = None,
+    window: int = 7,
+    period: Optional[int] = 12,
+    threshold: float = 3.5,
+    max_results: int = 50,
+) -> Dict[str, Any]:
+    """
+    Detect anomalies in every row of X (n_metrics x T, oldest first)
+
+    Returns the /api/ai/anomalies payload: anomalies (strongest first, at most
+    max_results), overall_health, summary.
+    """
+    X = np.asarray(X, dtype=float)
+    if X.ndim == 1:
+        X = X[None, :]
+    n, T = X.shape
+    labels = list(labels) if labels is not None else list(range(T))
+    anomalies: List[Dict[str, Any]] = []
+    if T < 4:
+        return _report(anomalies, n, T)
+
+    X = np.where(np.isnan(X), np.nanmedian(X, axis=1, keepdims=True), X)
+    seasonal = seasonal_component(X, period) if period else None
+    if seasonal is None:
+        seasonal = np.zeros_like(X)
+    # judge every point against its deseasonalized neighbourhood
+    adjusted = X - seasonal
+    z = rolling_robust_z(adjusted, window)
+
+    rows, cols = np.nonzero(np.abs(z) > threshold)
+    for i, t in zip(rows.tolist(), cols.tolist()):
+        s = float(abs(z[i, t]))
+        direction = "spike" if z[i, t] > 0 else "drop"
+        neighbours = np.delete(adjusted[i, max(0, t - window):t + window + 1], min(t, window))
+        expected = float(np.median(neighbours) + seasonal[i, t]) if neighbours.size else float(X[i, t])
+        anomalies.append({
+            "type": direction,
+            "severity": _severity(s),
+            "month": str(labels[t]),
+            "metric": metrics[i],
+            "index": t,
+            "value": round(float(X[i, t]), 2),
+            "expected": round(expected, 2),
+            "score": round(s, 2),
+            "description": f"{metrics[i]} {'jumped' if direction == 'spike' else 'fell'} to {X[i, t]:,.2f} vs about {expected:,.2f} expected",
+            "recommendation": f"Review {metrics[i]} transactions for {labels[t]}",
+        })
+
+    sigmas = noise_sigma(adjusted)
+    for i in range(n):
+        for cp in changepoints(adjusted[i]):
+            before = float(np.median(adjusted[i, max(0, cp - window):cp]))
+            after = float(np.median(adjusted[i, cp:cp + window]))
+            s = abs(after - before) / float(sigmas[i])
+            if s <= threshold:
+                continue
+            anomalies.append({
+                "type": "level_shift",
+                "severity": _severity(s),
+                "month": str(labels[cp]),
+                "metric": metrics[i],
+                "index": cp,
+                "value": round(after, 2),
+                "expected": round(before, 2),
+                "score": round(s, 2),
+                "description": f"{metrics[i]} shifted from about {before:,.2f} to {after:,.2f} starting {labels[cp]}",
+                "recommendation": f"Confirm whether the change in {metrics[i]} from {labels[cp]} is expected",
+            })
+
+    anomalies.sort(key=lambda a: -a["score"])
+    return _report(anomalies, n, T, max_results)
+
+
+def _report(anomalies: List[Dict[str, Any]], n_metrics: int, T: int, max_results: int = 50) -> Dict[str, Any]:
+    high = sum(1 for a in anomalies if a["severity"] == "high")
+    medium = sum(1 for a in anomalies if a["severity"] == "medium")
+    if high >= 2:
+        health = "critical"
+    elif high or medium >= 2:
+        health = "concerning"
+    else:
+        health = "healthy"
+    if anomalies:
+        summary = f"{len(anomalies)} anomalies found across {n_metrics} metrics and {T} periods ({high} high, {medium} medium severity)"
+    else:
+        summary = "No significant anomalies detected"
+    return {
+        "anomalies": anomalies[:max_results],
+        "total_anomalies": len(anomalies),
+        "overall_health": health,
+        "summary": summary,
+    }
+
+
+def detect_records(rows: List[Dict[str, Any]], **kwargs) -> Dict[str, Any]:
+    """Run detect() on a list of period records; the first non-numeric field labels the periods"""
+    if not rows:
+        return _report([], 0, 0)
+    keys = list(dict.fromkeys(k for r in rows for k in r))
+    numeric = [
+        k for k in keys
+        if all(isinstance(r.get(k), (int, float)) and not isinstance(r.get(k), bool) for r in rows)
+    ]
+    label_key = next((k for k in keys if k not in numeric), None)
+    X = np.array([[r[k] for r in rows] for k in numeric], dtype=float)
+    labels = [r.get(label_key) for r in rows] if label_key else None
+    if not numeric:
+        return _report([], 0, len(rows))
+    return detect(X, numeric, labels, **kwargs)
+
+
+def detect_frame(df: pd.DataFrame, label_column: str, **kwargs) -> Dict[str, Any]:
+    """Run detect() on every numeric column of a period-ordered DataFrame"""
+    metrics = [c for c in df.columns if c != label_column and pd.api.types.is_numeric_dtype(df[c])]
+    if not metrics or df.empty:
+        return _report([], len(metrics), len(df))
+    labels = [v.date().isoformat() if isinstance(v, pd.Timestamp) else v for v in df[label_column]]
+    return detect(df[metrics].to_numpy(dtype=float).T, metrics, labels, **kwargs)
@@ -2,11 +2,66 @@
 Authentication service using Supabase Auth
 Handles signup, login, password reset, and session management
 """
+import asyncio
 import secrets
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from fastapi import HTTPException, status
-from app.db.supabase_client import get_supabase, get_supabase_admin
+from app.core.config import settings
+from app.core.metrics import cache_hits, cache_misses
+from app.core.security import InvalidToken, NoSigningKeys, token_verifier
+from app.db.supabase_client import get_postgres, get_supabase, get_supabase_admin, run_db
+
+
+class ProfileCache:
+    """User profiles by user id for AUTH_PROFILE_CACHE_TTL seconds; profile writes invalidate"""
+
+    def __init__(self, ttl: float, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            cache_hits.inc(cache="profile")
+            return entry[1]
+        cache_misses.inc(cache="profile")
+        return None
+
+    def put(self, user_id: str, profile: Dict[str, Any]) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                now = time.monotonic()
+                self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[user_id] = (time.monotonic() + self.ttl, profile)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+profiles = ProfileCache(settings.auth_profile_cache_ttl)
+
+
+def _profile(user_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": user_data["id"],
+        "email": user_data["email"],
+        "full_name": user_data["full_name"],
+        "role": user_data["role"],
+        "business_id": user_data["business_id"],
+        "business_name": user_data["businesses"]["name"],
+        "avatar_url": user_data.get("avatar_url"),
+        "is_active": user_data["is_active"]
+    }
 
 
 class AuthService:
@@ -28,42 +83,51 @@ class AuthService:
         try:
             supabase = get_supabase_admin()
             
-            # Step 1: Create auth user in Supabase Auth
-            auth_response = supabase.auth.sign_up({
-                "email": email,
-                "password": password,
-                "options": {
-                    "data": {
-                        "full_name": full_name
-                    }
-                }
-            })
-            
-            if not auth_response.user:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Failed to create user account"
-                )
-            
-            user_id = auth_response.user.id
-            
-            # Step 2: Create business
+            # Steps 1 and 2 are independent: create the auth user in Supabase
+            # Auth and the business concurrently, then undo whichever
+            # succeeded if the other failed
             business_data = {
                 "name": business_name,
                 "industry": industry,
                 "size": size,
                 "is_active": True
             }
-            business_response = supabase.table("businesses").insert(business_data).execute()
+            auth_response, business_response = await asyncio.gather(
+                run_db(supabase.auth.sign_up, {
+                    "email": email,
+                    "password": password,
+                    "options": {
+                        "data": {
+                            "full_name": full_name
+                        }
+                    }
+                }),
+                run_db(supabase.table("businesses").insert(business_data).execute),
+                return_exceptions=True,
+            )
+            user_ok = not isinstance(auth_response, BaseException) and auth_response.user
+            business_ok = not isinstance(business_response, BaseException) and business_response.data
             
-            if not business_response.data:
-                # Rollback: delete auth user if business creation fails
-                supabase.auth.admin.delete_user(user_id)
+            if not user_ok or not business_ok:
+                # Rollback: delete the half that was created
+                if user_ok:
+                    await run_db(supabase.auth.admin.delete_user, auth_response.user.id)
+                if business_ok:
+                    await run_db(supabase.table("businesses").delete().eq("id", business_response.data[0]["id"]).execute)
+                for result in (auth_response, business_response):
+                    if isinstance(result, BaseException):
+                        raise result
+                if not user_ok:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Failed to create user account"
+                    )
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail="Failed to create business"
                 )
             
+            user_id = auth_response.user.id
             business_id = business_response.data[0]["id"]
             
             # Step 3: Create user profile (links to auth.users)
@@ -76,12 +140,14 @@ class AuthService:
                 "is_active": True,
                 "last_login": datetime.utcnow().isoformat()
             }
-            user_response = supabase.table("users").insert(user_data).execute()
+            user_response = await run_db(supabase.table("users").insert(user_data).execute)
             
             if not user_response.data:
                 # Rollback: delete business and auth user
-                supabase.table("businesses").delete().eq("id", business_id).execute()
-                supabase.auth.admin.delete_user(user_id)
+                await asyncio.gather(
+                    run_db(supabase.table("businesses").delete().eq("id", business_id).execute),
+                    run_db(supabase.auth.admin.delete_user, user_id),
+                )
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail="Failed to create user profile"
@@ -109,7 +175,7 @@ class AuthService:
             supabase = get_supabase()
             
             # Authenticate with Supabase
-            auth_response = supabase.auth.sign_in_with_password({
+            auth_response = await run_db(supabase.auth.sign_in_with_password, {
                 "email": email,
                 "password": password
             })
@@ -122,10 +188,15 @@ class AuthService:
             
             user_id = auth_response.user.id
             
-            # Get user profile with business info
-            user_response = supabase.table("users").select(
-                "*, businesses(*)"
-            ).eq("id", user_id).single().execute()
+            # Get user profile with business info and update last login together
+            user_response, _ = await asyncio.gather(
+                run_db(supabase.table("users").select(
+                    "*, businesses(*)"
+                ).eq("id", user_id).single().execute),
+                run_db(supabase.table("users").update({
+                    "last_login": datetime.utcnow().isoformat()
+                }).eq("id", user_id).execute),
+            )
             
             if not user_response.data:
                 raise HTTPException(
@@ -133,12 +204,8 @@ class AuthService:
                     detail="User profile not found"
                 )
             
-            # Update last login
-            supabase.table("users").update({
-                "last_login": datetime.utcnow().isoformat()
-            }).eq("id", user_id).execute()
-            
             user_data = user_response.data
+            profiles.put(user_id, _profile(user_data))
             
             return {
                 "user": auth_response.user,
@@ -167,7 +234,7 @@ class AuthService:
         """Logout user (invalidate session)"""
         try:
             supabase = get_supabase()
-            supabase.auth.sign_out()
+            await run_db(supabase.auth.sign_out)
             return {"message": "Logged out successfully"}
         except Exception as e:
             raise HTTPException(
@@ -175,46 +242,69 @@ class AuthService:
                 detail=f"Logout failed: {str(e)}"
             )
     
+    @staticmethod
+    def load_profile(user_id: str) -> Optional[Dict[str, Any]]:
+        """User profile joined with its business (one query: pooled Postgres when configured, else REST)"""
+        postgres = get_postgres()
+        if postgres is not None:
+            user_data = postgres.profile_by_id(user_id)
+            return _profile(user_data) if user_data else None
+        supabase = get_supabase()
+        profile_response = supabase.table("users").select(
+            "*, businesses(*)"
+        ).eq("id", user_id).single().execute()
+        return _profile(profile_response.data) if profile_response.data else None
+    
+    @staticmethod
+    def verify_with_supabase(access_token: str) -> Dict[str, Any]:
+        """Claims ({"sub": user id}) from Supabase Auth, for projects without local signing keys"""
+        try:
+            user_response = get_supabase().auth.get_user(access_token)
+        except Exception as e:
+            raise InvalidToken(str(e))
+        if not user_response or not user_response.user:
+            raise InvalidToken("Invalid or expired token")
+        return {"sub": user_response.user.id}
+
     @staticmethod
     async def get_current_user(access_token: str) -> Dict[str, Any]:
-        """Get current user from access token"""
+        """
+        Get current user from access token
+        
+        The token is verified locally (see app.core.security); Supabase is
+        only queried for the profile on a profile cache miss, and for the
+        token itself when no signing keys are configured.
+        """
         try:
-            supabase = get_supabase()
-            
-            # Get user from token
-            user_response = supabase.auth.get_user(access_token)
-            
-            if not user_response.user:
+            try:
+                try:
+                    claims = await token_verifier.verify_async(access_token)
+                except NoSigningKeys:
+                    claims = await run_db(AuthService.verify_with_supabase, access_token)
+            except InvalidToken:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Invalid or expired token"
                 )
             
-            user_id = user_response.user.id
-            
-            # Get full profile
-            profile_response = supabase.table("users").select(
-                "*, businesses(*)"
-            ).eq("id", user_id).single().execute()
-            
-            if not profile_response.data:
+            user_id = claims.get("sub")
+            if not user_id:
                 raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="User profile not found"
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Invalid or expired token"
                 )
             
-            user_data = profile_response.data
+            profile = profiles.get(user_id)
+            if profile is None:
+                profile = await run_db(AuthService.load_profile, user_id)
+                if profile is None:
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail="User profile not found"
+                    )
+                profiles.put(user_id, profile)
             
-            return {
-                "id": user_data["id"],
-                "email": user_data["email"],
-                "full_name": user_data["full_name"],
-                "role": user_data["role"],
-                "business_id": user_data["business_id"],
-                "business_name": user_data["businesses"]["name"],
-                "avatar_url": user_data.get("avatar_url"),
-                "is_active": user_data["is_active"]
-            }
+            return profile
             
         except HTTPException:
             raise
@@ -224,12 +314,34 @@ class AuthService:
                 detail="Could not validate credentials"
             )
     
+    @staticmethod
+    async def update_profile(user_id: str, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """Update profile fields and drop the cached profile"""
+        try:
+            supabase = get_supabase()
+            await run_db(supabase.table("users").update(changes).eq("id", user_id).execute)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Failed to update profile: {str(e)}"
+            )
+        finally:
+            profiles.invalidate(user_id)
+        profile = await run_db(AuthService.load_profile, user_id)
+        if profile is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User profile not found"
+            )
+        profiles.put(user_id, profile)
+        return profile
+    
     @staticmethod
     async def send_password_reset(email: str) -> Dict[str, str]:
         """Send password reset email"""
         try:
             supabase = get_supabase()
-            supabase.auth.reset_password_email(email)
+            await run_db(supabase.auth.reset_password_email, email)
             return {"message": "Password reset email sent"}
         except Exception as e:
             # Don't reveal if email exists
@@ -240,7 +352,7 @@ class AuthService:
         """Update user password"""
         try:
             supabase = get_supabase()
-            supabase.auth.update_user({
+            await run_db(supabase.auth.update_user, {
                 "password": new_password
             })
             return {"message": "Password updated successfully"}
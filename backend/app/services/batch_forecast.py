@@ -0,0 +1,177 @@
+"""
+Batch forecasting over uploaded datasets
+DuckDB pivots a dataset to one series per group, all groups are forecast in
+one vectorized pass (row chunks go to a process pool when there are many),
+and the result is stored as a derived dataset that can be charted like any
+upload.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.core.resources import resources
+from app.services.dashboard_generator import vega_from_proposal
+from app.services.datasets import load_panel, write_derived
+from app.services.forecasting import confidence_label, forecast_batch
+
+# Default season length per period unit
+SEASON_BY_FREQ = {"day": 7, "week": 52, "month": 12, "quarter": 4, "year": None}
+
+# Median spacing in days -> period unit, used when no freq is given
+_SPACING_UNITS = ((1, 1, "day"), (7, 7, "week"), (28, 31, "month"), (89, 92, "quarter"), (365, 366, "year"))
+
+# Columns the derived dataset has besides the group, date and measure
+DERIVED_COLUMNS = ("lower", "upper", "kind")
+
+# Period unit -> (DateOffset keyword, multiple); stepping from the last date keeps
+# its day of month/week, where an anchored range would roll forward first
+_UNIT_STEPS = {"day": ("days", 1), "week": ("weeks", 1), "month": ("months", 1), "quarter": ("months", 3), "year": ("years", 1)}
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _executor() -> Optional[ProcessPoolExecutor]:
+    """Shared process pool for batch fits (None when configured for one process)"""
+    global _pool
+    workers = settings.forecast_workers or os.cpu_count() or 1
+    if workers <= 1:
+        return None
+    if _pool is None:
+        # spawn: workers only import the forecasting module, never a forked copy of the server
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        resources.track_executor(_pool)
+    return _pool
+
+
+def infer_unit(periods: pd.Index) -> Optional[str]:
+    """Guess day/week/month/quarter/year from the spacing of datetime periods"""
+    if len(periods) < 2 or not pd.api.types.is_datetime64_any_dtype(periods):
+        return None
+    days = float(np.median(np.diff(periods.values).astype("timedelta64[D]").astype(float)))
+    for low, high, unit in _SPACING_UNITS:
+        if low <= days <= high:
+            return unit
+    return None
+
+
+def future_periods(periods: pd.Index, horizon: int, unit: Optional[str]) -> List[Any]:
+    """Labels of the horizon periods after the last one"""
+    if pd.api.types.is_datetime64_any_dtype(periods) and len(periods):
+        if unit:
+            name, multiple = _UNIT_STEPS[unit]
+            return [periods[-1] + pd.DateOffset(**{name: multiple * k}) for k in range(1, horizon + 1)]
+        step = pd.Series(periods).diff().median() if len(periods) > 1 else pd.Timedelta(days=1)
+        return [periods[-1] + step * k for k in range(1, horizon + 1)]
+    if pd.api.types.is_numeric_dtype(periods) and len(periods):
+        step = float(np.median(np.diff(periods.values))) if len(periods) > 1 else 1.0
+        return [periods[-1] + step * k for k in range(1, horizon + 1)]
+    return [f"+{k}" for k in range(1, horizon + 1)]
+
+
+def _labels(values: List[Any]) -> List[Any]:
+    return [v.date().isoformat() if isinstance(v, pd.Timestamp) else v for v in values]
+
+
+def forecast_dataset(
+    dataset_id: str,
+    date_field: str,
+    measure: str,
+    group_by: Optional[str] = None,
+    horizon: int = 6,
+    freq: Optional[str] = None,
+    season_length: Optional[int] = None,
+    level: float = 0.95,
+) -> Dict[str, Any]:
+    """
+    Forecast a measure for every group of a dataset and store the result
+
+    The derived dataset is long-form: one row per group and period with the
+    measure, interval bounds and kind ("actual" or "forecast").
+
+    Returns:
+        Summary with the derived dataset_id, a chart widget and a preview
+
+    Raises ValueError when the group, date and measure columns are not
+    distinct or collide with the derived columns.
+    """
+    group_column = group_by or "series"
+    columns = [group_column, date_field, measure]
+    if len(set(columns)) < len(columns):
+        raise ValueError("date_field, measure and group_by must be different columns")
+    clashes = [c for c in columns if c in DERIVED_COLUMNS]
+    if clashes:
+        raise ValueError(f"Column names {', '.join(DERIVED_COLUMNS)} are reserved for the forecast output: {clashes}")
+
+    wide = load_panel(dataset_id, date_field, measure, group_by, freq)
+    periods = wide.columns
+    unit = freq or infer_unit(periods)
+    if season_length is None:
+        season_length = SEASON_BY_FREQ.get(unit, 12) if unit else 12
+
+    Y = wide.to_numpy(dtype=float)
+    n, T = Y.shape
+    executor = _executor() if n > settings.forecast_chunk_size else None
+    result = forecast_batch(
+        Y, horizon, season_length=season_length, level=level,
+        executor=executor, chunk_size=settings.forecast_chunk_size,
+    )
+
+    future = future_periods(periods, horizon, unit)
+    groups = np.asarray(wide.index.astype(str))
+    history = pd.DataFrame({
+        group_column: np.repeat(groups, T),
+        date_field: np.tile(np.asarray(_labels(list(periods)), dtype=object), n),
+        measure: Y.ravel(),
+        "lower": np.nan,
+        "upper": np.nan,
+        "kind": "actual",
+    })
+    projected = pd.DataFrame({
+        group_column: np.repeat(groups, horizon),
+        date_field: np.tile(np.asarray(_labels(future), dtype=object), n),
+        measure: result.point.ravel().round(4),
+        "lower": result.lower.ravel().round(4),
+        "upper": result.upper.ravel().round(4),
+        "kind": "forecast",
+    })
+    table = pd.concat([history, projected], ignore_index=True)
+    table = table.sort_values(group_column, kind="stable", ignore_index=True)
+    derived_id = write_derived(table, f"forecast_{measure}")
+
+    labels = [confidence_label(float(m)) for m in result.mape]
+    proposal = {
+        "title": f"{measure} forecast by {group_by}" if group_by else f"{measure} forecast",
+        "chart": "line",
+        "x": date_field,
+        "y": measure,
+        "group_by": group_column,
+        "explanation": f"{result.method.replace('_', ' ')} forecast {horizon} periods ahead",
+    }
+    widget = {
+        "id": "widget_forecast",
+        "type": "line_chart",
+        "title": proposal["title"],
+        "explanation": proposal["explanation"],
+        "vega_spec": vega_from_proposal(proposal),
+        "config": {"x_column": date_field, "y_column": measure, "group_by": group_column, "description": proposal["explanation"]},
+        "data": {},
+        "role": "auto",
+    }
+    return {
+        "dataset_id": derived_id,
+        "source_dataset_id": dataset_id,
+        "method": result.method,
+        "series": n,
+        "history_periods": T,
+        "horizon": horizon,
+        "season_length": season_length,
+        "periods": _labels(future),
+        "confidence": {c: labels.count(c) for c in ("high", "medium", "low")},
+        "widgets": [widget],
+        "preview": projected.head(50).replace({np.nan: None}).to_dict(orient="records"),
+    }
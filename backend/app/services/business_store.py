@@ -0,0 +1,221 @@
+"""
+Business and team repository on an embedded SQLite (WAL) database
+Replaces load-modify-save of app/tmp/business_data.json:
+- each write is one transaction touching only its own rows, so concurrent
+  setups and team changes no longer overwrite each other
+- owner and team member emails are indexed (case-insensitive), so finding a
+  user's business is an index lookup instead of a scan of every business
+- reads go through a small in-process cache (BUSINESS_CACHE_TTL seconds)
+  that this process's writes invalidate; the TTL bounds staleness when
+  several workers share the database
+
+Documents keep the JSON file's shape: businessInfo, teamMembers,
+uploadedFiles, useHistoricalData. Returned documents are shared with the
+cache and must not be mutated.
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import cache_hits, cache_misses
+from app.core.sqlite import SQLiteDatabase, sqlite_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS businesses (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    industry TEXT,
+    owner_email TEXT COLLATE NOCASE,
+    info TEXT NOT NULL,
+    uploaded_files TEXT NOT NULL,
+    use_historical_data INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_businesses_owner_email ON businesses (owner_email);
+CREATE INDEX IF NOT EXISTS ix_businesses_created ON businesses (created_at);
+CREATE TABLE IF NOT EXISTS team_members (
+    business_id TEXT NOT NULL REFERENCES businesses (id) ON DELETE CASCADE,
+    id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL COLLATE NOCASE,
+    role TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (business_id, id)
+);
+CREATE INDEX IF NOT EXISTS ix_team_members_email ON team_members (email);
+"""
+
+MISSING = object()
+
+
+class BusinessStore:
+    def __init__(self, path: str, cache_ttl: float):
+        self.db = SQLiteDatabase(path, SCHEMA)
+        self.cache_ttl = cache_ttl
+        self._docs: Dict[str, Tuple[float, Optional[Dict[str, Any]]]] = {}
+        self._by_email: Dict[str, Tuple[float, Optional[str]]] = {}
+        self._cache_lock = threading.Lock()
+        # bumped by every write; a read that raced a write does not cache its result
+        self._generation = 0
+
+    # --- cache -------------------------------------------------------------
+
+    def _cached(self, table: Dict, key: str) -> Any:
+        entry = table.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            cache_hits.inc(cache="business")
+            return entry[1]
+        cache_misses.inc(cache="business")
+        return MISSING
+
+    def _remember(self, table: Dict, key: str, value: Any, generation: int) -> None:
+        if self.cache_ttl > 0:
+            with self._cache_lock:
+                if generation == self._generation:
+                    table[key] = (time.monotonic() + self.cache_ttl, value)
+
+    def _invalidate(self, business_id: str) -> None:
+        with self._cache_lock:
+            self._generation += 1
+            self._docs.pop(business_id, None)
+            # any email may now point elsewhere (new member, changed owner)
+            self._by_email.clear()
+
+    # --- reads -------------------------------------------------------------
+
+    def get(self, business_id: str) -> Optional[Dict[str, Any]]:
+        doc = self._cached(self._docs, business_id)
+        if doc is not MISSING:
+            return doc
+        generation = self._generation
+        conn = self.db.conn()
+        row = conn.execute("SELECT * FROM businesses WHERE id = ?", (business_id,)).fetchone()
+        doc = None
+        if row is not None:
+            members = conn.execute(
+                "SELECT id, name, email, role FROM team_members WHERE business_id = ? ORDER BY position",
+                (business_id,),
+            ).fetchall()
+            doc = {
+                "businessInfo": json.loads(row["info"]),
+                "teamMembers": [dict(m) for m in members],
+                "uploadedFiles": json.loads(row["uploaded_files"]),
+                "useHistoricalData": bool(row["use_historical_data"]),
+            }
+        self._remember(self._docs, business_id, doc, generation)
+        return doc
+
+    def business_id_for_email(self, email: str) -> Optional[str]:
+        """Oldest business the email owns or is a team member of"""
+        key = email.lower()
+        business_id = self._cached(self._by_email, key)
+        if business_id is not MISSING:
+            return business_id
+        generation = self._generation
+        row = self.db.conn().execute(
+            "SELECT id FROM ("
+            " SELECT id, created_at FROM businesses WHERE owner_email = ?"
+            " UNION SELECT b.id, b.created_at FROM team_members m JOIN businesses b ON b.id = m.business_id WHERE m.email = ?"
+            ") ORDER BY created_at LIMIT 1",
+            (email, email),
+        ).fetchone()
+        business_id = row["id"] if row else None
+        self._remember(self._by_email, key, business_id, generation)
+        return business_id
+
+    def first_id(self) -> Optional[str]:
+        row = self.db.conn().execute("SELECT id FROM businesses ORDER BY created_at LIMIT 1").fetchone()
+        return row["id"] if row else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        rows = self.db.conn().execute("SELECT id, name, industry FROM businesses ORDER BY created_at").fetchall()
+        return [dict(r) for r in rows]
+
+    # --- writes ------------------------------------------------------------
+
+    def save(
+        self,
+        business_id: str,
+        info: Dict[str, Any],
+        team_members: List[Dict[str, Any]],
+        uploaded_files: List[str],
+        use_historical_data: bool,
+    ) -> None:
+        """Create or replace a business and its team in one transaction"""
+        now = time.time()
+        with self.db.transaction() as conn:
+            conn.execute(
+                "INSERT INTO businesses (id, name, industry, owner_email, info, uploaded_files, use_historical_data, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (id) DO UPDATE SET name = excluded.name, industry = excluded.industry,"
+                " owner_email = excluded.owner_email, info = excluded.info, uploaded_files = excluded.uploaded_files,"
+                " use_historical_data = excluded.use_historical_data, updated_at = excluded.updated_at",
+                (business_id, info.get("businessName", business_id), info.get("industry"), info.get("ownerEmail"),
+                 json.dumps(info), json.dumps(uploaded_files), int(use_historical_data), now, now),
+            )
+            conn.execute("DELETE FROM team_members WHERE business_id = ?", (business_id,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO team_members (business_id, id, name, email, role, position) VALUES (?, ?, ?, ?, ?, ?)",
+                [(business_id, m["id"], m["name"], m["email"], m["role"], i) for i, m in enumerate(team_members)],
+            )
+        self._invalidate(business_id)
+
+    def add_member(self, business_id: str, member: Dict[str, Any]) -> None:
+        """Append a team member (replacing one with the same id); KeyError if the business is unknown"""
+        with self.db.transaction() as conn:
+            if conn.execute("SELECT 1 FROM businesses WHERE id = ?", (business_id,)).fetchone() is None:
+                raise KeyError(business_id)
+            conn.execute(
+                "INSERT INTO team_members (business_id, id, name, email, role, position)"
+                " VALUES (?, ?, ?, ?, ?, (SELECT COALESCE(MAX(position), -1) + 1 FROM team_members WHERE business_id = ?))"
+                " ON CONFLICT (business_id, id) DO UPDATE SET name = excluded.name, email = excluded.email, role = excluded.role",
+                (business_id, member["id"], member["name"], member["email"], member["role"], business_id),
+            )
+            conn.execute("UPDATE businesses SET updated_at = ? WHERE id = ?", (time.time(), business_id))
+        self._invalidate(business_id)
+
+    def remove_member(self, business_id: str, member_id: str) -> None:
+        """KeyError if the business is unknown; removing an absent member is a no-op"""
+        with self.db.transaction() as conn:
+            if conn.execute("SELECT 1 FROM businesses WHERE id = ?", (business_id,)).fetchone() is None:
+                raise KeyError(business_id)
+            conn.execute("DELETE FROM team_members WHERE business_id = ? AND id = ?", (business_id, member_id))
+            conn.execute("UPDATE businesses SET updated_at = ? WHERE id = ?", (time.time(), business_id))
+        self._invalidate(business_id)
+
+    def import_json_file(self, path: str) -> int:
+        """One-off import of the legacy business_data.json; businesses already stored are kept"""
+        if not os.path.exists(path):
+            return 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except ValueError as e:
+            print(f"⚠️ Skipping legacy business data {path}: {e}")
+            return 0
+        imported = 0
+        for business_id, business in data.items():
+            if self.db.conn().execute("SELECT 1 FROM businesses WHERE id = ?", (business_id,)).fetchone():
+                continue
+            self.save(
+                business_id,
+                business.get("businessInfo") or {},
+                business.get("teamMembers") or [],
+                business.get("uploadedFiles") or [],
+                bool(business.get("useHistoricalData")),
+            )
+            imported += 1
+        if imported:
+            print(f"📥 Imported {imported} legacy businesses from {path}")
+        return imported
+
+
+# Global instance
+businesses = BusinessStore(
+    sqlite_path(settings.business_db_url or settings.database_url),
+    cache_ttl=settings.business_cache_ttl,
+)
@@ -1,14 +1,28 @@
-from typing import List, Dict, Tuple
-import duckdb
+import re
+from typing import List, Dict, Optional, Tuple
 import pandas as pd
 
+from app.core.resources import resources
+from app.core.tracing import span, traced
 from app.services.llm_service import propose_widgets
+from app.services.widget_recommender import profile_frame
 
 
+def read_sample(csv_path: str, sample_rows: int = 200) -> pd.DataFrame:
+    with span("duckdb.read_sample", limit=sample_rows) as s:
+        with resources.duckdb() as con:
+            df = con.execute(f"SELECT * FROM read_csv_auto('{csv_path}') LIMIT {sample_rows}").df()
+        s.set_attributes(rows=len(df), columns=len(df.columns))
+        return df
+
+
+@traced("infer_hints_from_csv")
 def infer_hints_from_csv(csv_path: str, sample_rows: int = 200) -> Dict:
     print(f"\n🔍 Inferring hints from CSV: {csv_path}")
-    con = duckdb.connect()
-    df = con.execute(f"SELECT * FROM read_csv_auto('{csv_path}') LIMIT {sample_rows}").df()
+    return hints_from_frame(read_sample(csv_path, sample_rows))
+
+
+def hints_from_frame(df: pd.DataFrame) -> Dict:
     cols = list(df.columns)
     print(f"   Columns found: {cols}")
     
@@ -42,9 +56,17 @@ def vega_from_proposal(proposal: Dict) -> Dict:
     y = proposal.get("y")
     group_by = proposal.get("group_by")
     mark = "bar" if chart in ["bar","funnel","treemap"] else "line" if chart=="line" else "area"
+    agg = re.match(r"^(SUM|AVG|COUNT|MIN|MAX)\((.*)\)$", y.strip(), re.I) if y else None
+    if agg and agg.group(2) == "*":
+        y_enc = {"aggregate": "count", "type": "quantitative"}
+    elif agg:
+        y_enc = {"field": agg.group(2), "type": "quantitative"}
+    else:
+        y_enc = {"field": y, "type": "quantitative"} if y else None
     enc = {
         "x": {"field": x, "type": "temporal" if x and "date" in x.lower() else "nominal"} if x else None,
-        "y": {"field": y.replace("SUM(","").replace(")","") , "type": "quantitative"} if y else None
+        "y": y_enc,
+        "color": {"field": group_by, "type": "nominal"} if group_by else None,
     }
     enc = {k:v for k,v in enc.items() if v}
     spec = {
@@ -57,24 +79,30 @@ def vega_from_proposal(proposal: Dict) -> Dict:
     return spec
 
 
-def generate_quick_viz(csv_path: str, domain: str, intent: str) -> Tuple[List[Dict], Dict, str]:
+@traced("generate_quick_viz")
+def generate_quick_viz(csv_path: str, domain: str, intent: str, engine: Optional[str] = None) -> Tuple[List[Dict], Dict, str]:
     """
     Returns: (widgets, groq_input, groq_response)
+    
+    engine overrides settings.widget_engine (see propose_widgets).
     """
     print(f"\n🚀 GENERATE_QUICK_VIZ called")
     print(f"   Domain: {domain}")
     print(f"   Intent: {intent}")
     
-    hints = infer_hints_from_csv(csv_path)
+    print(f"\n🔍 Inferring hints from CSV: {csv_path}")
+    sample = read_sample(csv_path)
+    hints = hints_from_frame(sample)
+    profile = profile_frame(sample)
     cols = list(hints.get("measures",[])) + list(hints.get("categories",[]))
     
-    print(f"\n🤖 Calling Groq AI with:")
+    print(f"\n🤖 Proposing widgets with:")
     print(f"   Columns: {cols}")
     print(f"   Hints: {hints}")
     
-    props, groq_input, groq_response = propose_widgets(domain=domain, intent=intent, columns=cols, hints=hints)
+    props, groq_input, groq_response = propose_widgets(domain=domain, intent=intent, columns=cols, hints=hints, profile=profile, engine=engine)
     
-    print(f"\n✨ Groq returned {len(props)} proposals:")
+    print(f"\n✨ {len(props)} proposals:")
     for i, p in enumerate(props[:6], 1):
         print(f"   {i}. {p.get('title')} ({p.get('chart')})")
     
@@ -84,7 +112,7 @@ def generate_quick_viz(csv_path: str, domain: str, intent: str) -> Tuple[List[Di
         chart_type = p.get("chart", "bar").lower()
         if chart_type in ["bar", "funnel", "treemap"]:
             widget_type = "bar_chart"
-        elif chart_type == "line":
+        elif chart_type in ["line", "area"]:
             widget_type = "line_chart"
         elif chart_type in ["pie", "donut"]:
             widget_type = "pie_chart"
@@ -104,6 +132,7 @@ def generate_quick_viz(csv_path: str, domain: str, intent: str) -> Tuple[List[Di
             "config": {
                 "x_column": p.get("x"),
                 "y_column": p.get("y"),
+                "group_by": p.get("group_by"),
                 "description": p.get("explanation","")
             },
             "data": {},  # Will be populated by frontend if needed
@@ -0,0 +1,233 @@
+"""
+Dashboard repository on an embedded SQLite (WAL) database
+- indexes on (business, updated_at), (owner, updated_at), dataset and
+  updated_at, so listing pages and loading by id are index lookups
+- keyset pagination (cursor = last updated_at/id), which stays O(log n) deep
+  into a tenant's dashboards unlike OFFSET
+- optimistic concurrency: every write bumps version and updates only match
+  the version the client loaded
+- widgets stored as zlib-compressed compact JSON
+"""
+import base64
+import json
+import os
+import sqlite3
+import time
+import uuid
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.sqlite import SQLiteDatabase, sqlite_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dashboards (
+    id TEXT PRIMARY KEY,
+    business_id TEXT,
+    owner TEXT,
+    dataset_id TEXT,
+    name TEXT NOT NULL,
+    widgets BLOB NOT NULL,
+    widget_count INTEGER NOT NULL,
+    meta TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_dashboards_business_updated ON dashboards (business_id, updated_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_dashboards_owner_updated ON dashboards (owner, updated_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_dashboards_dataset ON dashboards (dataset_id, updated_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_dashboards_updated ON dashboards (updated_at DESC, id DESC);
+"""
+
+# Columns returned by listings (no widget payload)
+SUMMARY_COLUMNS = "id, business_id, owner, dataset_id, name, widget_count, version, created_at, updated_at"
+
+MAX_PAGE_SIZE = 200
+
+
+class VersionConflict(Exception):
+    """Raised when a write's expected version no longer matches the stored one"""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"Dashboard was modified (current version {current_version})")
+        self.current_version = current_version
+
+
+def pack_widgets(widgets: List[Dict[str, Any]]) -> bytes:
+    return zlib.compress(json.dumps(widgets, separators=(",", ":"), ensure_ascii=False).encode("utf-8"), 6)
+
+
+def unpack_widgets(blob: bytes) -> List[Dict[str, Any]]:
+    return json.loads(zlib.decompress(blob))
+
+
+def encode_cursor(updated_at: float, dash_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{updated_at!r}|{dash_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        updated_at, dash_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return float(updated_at), dash_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+class DashboardStore:
+    def __init__(self, path: str):
+        self.db = SQLiteDatabase(path, SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        return self.db.conn()
+
+    @staticmethod
+    def _document(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "id": row["id"],
+            "name": row["name"],
+            "widgets": unpack_widgets(row["widgets"]),
+            "dataset_id": row["dataset_id"],
+            "meta": json.loads(row["meta"]),
+            "business_id": row["business_id"],
+            "owner": row["owner"],
+            "version": row["version"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+    def create(
+        self,
+        name: str,
+        widgets: List[Dict[str, Any]],
+        dataset_id: Optional[str] = None,
+        meta: Optional[Dict[str, Any]] = None,
+        business_id: Optional[str] = None,
+        owner: Optional[str] = None,
+        dash_id: Optional[str] = None,
+        created_at: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        now = time.time()
+        dash_id = dash_id or str(uuid.uuid4())
+        self._conn().execute(
+            "INSERT INTO dashboards (id, business_id, owner, dataset_id, name, widgets, widget_count, meta, version, created_at, updated_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?)",
+            (dash_id, business_id, owner, dataset_id, name, pack_widgets(widgets), len(widgets),
+             json.dumps(meta or {}, separators=(",", ":")), created_at or now, created_at or now),
+        )
+        return {"id": dash_id, "version": 1}
+
+    def get(self, dash_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT * FROM dashboards WHERE id = ?", (dash_id,)).fetchone()
+        return self._document(row) if row else None
+
+    def validator(self, dash_id: str) -> Optional[Tuple[int, Optional[str]]]:
+        """(version, dataset_id) without loading the widgets, for conditional GETs"""
+        row = self._conn().execute("SELECT version, dataset_id FROM dashboards WHERE id = ?", (dash_id,)).fetchone()
+        return (row["version"], row["dataset_id"]) if row else None
+
+    def list(
+        self,
+        business_id: Optional[str] = None,
+        owner: Optional[str] = None,
+        dataset_id: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Newest first; pass next_cursor back to get the following page"""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        where, params = [], []
+        for column, value in (("business_id", business_id), ("owner", owner), ("dataset_id", dataset_id)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if cursor:
+            updated_at, last_id = decode_cursor(cursor)
+            where.append("(updated_at < ? OR (updated_at = ? AND id < ?))")
+            params.extend([updated_at, updated_at, last_id])
+        sql = f"SELECT {SUMMARY_COLUMNS} FROM dashboards"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY updated_at DESC, id DESC LIMIT ?"
+        rows = self._conn().execute(sql, (*params, limit + 1)).fetchall()
+        items = [dict(r) for r in rows[:limit]]
+        next_cursor = encode_cursor(items[-1]["updated_at"], items[-1]["id"]) if len(rows) > limit else None
+        return {"dashboards": items, "next_cursor": next_cursor}
+
+    def update(self, dash_id: str, expected_version: int, **changes: Any) -> Dict[str, Any]:
+        """
+        Apply changes (name, widgets, dataset_id, meta) if the stored version
+        is still expected_version
+
+        Raises:
+            KeyError: no such dashboard
+            VersionConflict: someone else saved first
+        """
+        columns, params = [], []
+        for key in ("name", "dataset_id"):
+            if changes.get(key) is not None:
+                columns.append(f"{key} = ?")
+                params.append(changes[key])
+        if changes.get("widgets") is not None:
+            columns.extend(["widgets = ?", "widget_count = ?"])
+            params.extend([pack_widgets(changes["widgets"]), len(changes["widgets"])])
+        if changes.get("meta") is not None:
+            columns.append("meta = ?")
+            params.append(json.dumps(changes["meta"], separators=(",", ":")))
+        columns.extend(["version = version + 1", "updated_at = ?"])
+        params.append(time.time())
+
+        conn = self._conn()
+        cur = conn.execute(
+            f"UPDATE dashboards SET {', '.join(columns)} WHERE id = ? AND version = ?",
+            (*params, dash_id, expected_version),
+        )
+        if cur.rowcount == 0:
+            self._raise_missing_or_conflict(dash_id)
+        return {"id": dash_id, "version": expected_version + 1}
+
+    def delete(self, dash_id: str, expected_version: Optional[int] = None) -> None:
+        conn = self._conn()
+        if expected_version is None:
+            cur = conn.execute("DELETE FROM dashboards WHERE id = ?", (dash_id,))
+        else:
+            cur = conn.execute("DELETE FROM dashboards WHERE id = ? AND version = ?", (dash_id, expected_version))
+        if cur.rowcount == 0:
+            self._raise_missing_or_conflict(dash_id)
+
+    def _raise_missing_or_conflict(self, dash_id: str) -> None:
+        row = self._conn().execute("SELECT version FROM dashboards WHERE id = ?", (dash_id,)).fetchone()
+        if row is None:
+            raise KeyError(dash_id)
+        raise VersionConflict(row["version"])
+
+    def import_json_dir(self, directory: str) -> int:
+        """One-off import of legacy {id}.json dashboard files; already imported ids are skipped"""
+        if not os.path.isdir(directory):
+            return 0
+        imported = 0
+        conn = self._conn()
+        for filename in os.listdir(directory):
+            if not filename.endswith(".json"):
+                continue
+            path = os.path.join(directory, filename)
+            dash_id = filename[:-len(".json")]
+            if conn.execute("SELECT 1 FROM dashboards WHERE id = ?", (dash_id,)).fetchone():
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    doc = json.load(f)
+                self.create(
+                    doc.get("name") or dash_id, doc.get("widgets") or [], doc.get("dataset_id"), doc.get("meta"),
+                    dash_id=dash_id, created_at=os.path.getmtime(path),
+                )
+                imported += 1
+            except (ValueError, sqlite3.IntegrityError) as e:
+                print(f"⚠️ Skipping legacy dashboard {filename}: {e}")
+        if imported:
+            print(f"📥 Imported {imported} legacy dashboards from {directory}")
+        return imported
+
+
+# Global instance
+dashboards = DashboardStore(sqlite_path(settings.dashboard_db_url or settings.database_url))
@@ -0,0 +1,170 @@
+"""
+Incremental dataset refresh
+A new file for an existing dataset (e.g. today's sales) is appended as a
+delta: its rows are aggregated on their own and merged into the cached
+widget rollups, then only the widget groups that changed are pushed to
+clients subscribed to the dashboards built on that dataset.
+
+Dashboard events are kept in memory in this process (see jobs.py for the
+same caveat with several workers).
+"""
+import csv
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Tuple
+
+from app.core.logging import get_logger, log_event
+from app.core.sse import AsyncNotifier
+from app.core.tracing import span
+from app.services.dashboard_store import dashboards
+from app.services.datasets import UPLOAD_DIR, dataset_path
+from app.services.file_parsers import parse_file, validate_dataframe
+from app.services.rollups import WidgetQuery, rollups
+
+_log = get_logger(__name__)
+
+# Events kept per dashboard for subscribers that reconnect
+EVENT_BACKLOG = 100
+
+Event = Tuple[int, str, Dict[str, Any]]
+
+
+class DashboardFeed:
+    """Per-dashboard event log with sequence numbers and change notifications"""
+
+    def __init__(self, backlog: int = EVENT_BACKLOG):
+        self.backlog = backlog
+        self._events: Dict[str, Deque[Event]] = {}
+        self._seq = 0
+        self._changed = threading.Condition()
+        self._notifier = AsyncNotifier()
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def publish(self, dashboard_id: str, event: str, data: Dict[str, Any]) -> int:
+        with self._changed:
+            self._seq += 1
+            self._events.setdefault(dashboard_id, deque(maxlen=self.backlog)).append((self._seq, event, data))
+            self._changed.notify_all()
+            seq = self._seq
+        self._notifier.notify_all()
+        return seq
+
+    def wait(self, dashboard_id: str, after: int, timeout: float = 15.0) -> List[Event]:
+        """Events newer than sequence number `after`; empty on timeout"""
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while True:
+                events = [e for e in self._events.get(dashboard_id, ()) if e[0] > after]
+                remaining = deadline - time.monotonic()
+                if events or remaining <= 0:
+                    return events
+                self._changed.wait(remaining)
+
+    def _since(self, dashboard_id: str, after: int) -> List[Event]:
+        with self._changed:
+            return [e for e in self._events.get(dashboard_id, ()) if e[0] > after]
+
+    async def wait_async(self, dashboard_id: str, after: int, timeout: float = 15.0) -> List[Event]:
+        """wait() for async callers: awaits on the event loop instead of blocking a thread"""
+        await self._notifier.wait_for(lambda: bool(self._since(dashboard_id, after)), timeout)
+        return self._since(dashboard_id, after)
+
+
+def _header(path: str) -> List[str]:
+    with open(path, newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), [])
+
+
+def _dashboards_on(dataset_id: str) -> List[Dict[str, Any]]:
+    found, cursor = [], None
+    while True:
+        page = dashboards.list(dataset_id=dataset_id, limit=200, cursor=cursor)
+        found.extend(page["dashboards"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return found
+
+
+def append_rows(dataset_id: str, upload_path: str) -> Dict[str, Any]:
+    """
+    Append an uploaded file's rows to a dataset and refresh dependent widgets
+
+    The file may be any format parse_file handles; its columns must match the
+    dataset's (in any order). Raises ValueError when they do not.
+    """
+    path = dataset_path(dataset_id)
+    with span("dataset.append", dataset_id=dataset_id) as s:
+        delta, _ = parse_file(upload_path)
+        validate_dataframe(delta, min_rows=1, min_cols=1)
+        columns = _header(path)
+        if sorted(map(str, delta.columns)) != sorted(columns):
+            raise ValueError(f"Columns {list(delta.columns)} do not match the dataset's {columns}")
+        delta = delta[columns]
+
+        delta_path = os.path.join(UPLOAD_DIR, f".delta_{os.path.basename(upload_path)}.csv")
+        delta.to_csv(delta_path, index=False)
+
+        def write() -> None:
+            with open(path, "rb+") as f:
+                if f.seek(0, os.SEEK_END):
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        f.write(b"\n")
+            delta.to_csv(path, mode="a", header=False, index=False)
+
+        try:
+            changed = rollups.append(dataset_id, delta_path, write)
+        finally:
+            os.remove(delta_path)
+
+        widgets_updated = 0
+        affected = _dashboards_on(dataset_id)
+        for summary in affected:
+            doc = dashboards.get(summary["id"])
+            for widget in (doc or {}).get("widgets", []):
+                widgets_updated += _push_widget(doc["id"], dataset_id, widget, changed)
+        s.set_attributes(rows=len(delta), dashboards=len(affected), widgets=widgets_updated)
+
+    log_event(_log, "dataset appended", dataset_id=dataset_id, rows=len(delta),
+              dashboards=len(affected), widgets=widgets_updated)
+    return {
+        "dataset_id": dataset_id,
+        "rows_appended": len(delta),
+        "dashboards": [d["id"] for d in affected],
+        "widgets_updated": widgets_updated,
+    }
+
+
+def _push_widget(dashboard_id: str, dataset_id: str, widget: Dict[str, Any], changed: Dict[Tuple, set]) -> int:
+    widget_id = widget.get("id")
+    try:
+        query = WidgetQuery.from_widget(widget)
+    except ValueError:
+        query = None
+    if query is None:
+        # row-level widgets have nothing to merge; clients refetch their data
+        feed.publish(dashboard_id, "widget_stale", {"dashboard_id": dashboard_id, "widget_id": widget_id})
+        return 0
+    keys = changed.get((dataset_id,) + query.key)
+    try:
+        # no cached rollup: it is built once now and the full rows are sent
+        rows = rollups.widget_rows(dataset_id, query, keys)
+    except Exception as e:
+        print(f"⚠️ Refreshing widget {widget_id} of dashboard {dashboard_id} failed: {e}")
+        return 0
+    feed.publish(dashboard_id, "widget_data", {
+        "dashboard_id": dashboard_id,
+        "widget_id": widget_id,
+        "rows": rows,
+        "partial": keys is not None,  # only the changed groups; merge by x/group_by
+    })
+    return 1
+
+
+# Global instance
+feed = DashboardFeed()
@@ -0,0 +1,192 @@
+"""
+Access to uploaded datasets
+A dataset id is the file name of the parsed CSV written by /api/upload.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.resources import resources
+
+UPLOAD_DIR = "app/tmp/uploads"
+
+FREQUENCIES = ("day", "week", "month", "quarter", "year")
+# pandas offsets matching DuckDB date_trunc units
+PANDAS_FREQ = {"day": "D", "week": "W-MON", "month": "MS", "quarter": "QS", "year": "YS"}
+
+AGGREGATE = re.compile(r"^(SUM|AVG|COUNT|MIN|MAX)\((.*)\)$", re.I)
+
+# path -> ((size, mtime_ns), sha256); files are only rehashed when they change
+_fingerprints: Dict[str, Tuple[Tuple[int, int], str]] = {}
+_fingerprints_lock = threading.Lock()
+
+
+def dataset_path(dataset_id: str) -> str:
+    """Resolve a dataset id to its CSV path, rejecting anything that is not a plain file name"""
+    if not dataset_id or os.path.basename(dataset_id) != dataset_id or dataset_id.startswith("."):
+        raise ValueError(f"Invalid dataset id: {dataset_id}")
+    path = os.path.join(UPLOAD_DIR, dataset_id)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Dataset not found: {dataset_id}")
+    return path
+
+
+def dataset_fingerprint(dataset_id: str) -> str:
+    """Content hash of a dataset, cached until the file's size or mtime changes"""
+    path = dataset_path(dataset_id)
+    st = os.stat(path)
+    stamp = (st.st_size, st.st_mtime_ns)
+    cached = _fingerprints.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    with _fingerprints_lock:
+        _fingerprints[path] = (stamp, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def quote_ident(name: str) -> str:
+    """Quote a column name for DuckDB SQL"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def sql_string(value: str) -> str:
+    """Quote a string literal for DuckDB SQL"""
+    return "'" + value.replace("'", "''") + "'"
+
+
+def numeric_columns(dataset_id: str) -> List[str]:
+    """Names of the numeric columns DuckDB infers for a dataset"""
+    with resources.duckdb() as con:
+        rel = con.execute(f"DESCRIBE SELECT * FROM read_csv_auto({sql_string(dataset_path(dataset_id))})").fetchall()
+    numeric = ("TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "FLOAT", "DOUBLE", "REAL")
+    return [r[0] for r in rel if r[1].upper().startswith(numeric) or r[1].upper().startswith("DECIMAL")]
+
+
+def _period_expr(date_field: str, freq: Optional[str]) -> str:
+    if freq and freq not in FREQUENCIES:
+        raise ValueError(f"Unsupported frequency: {freq}. Use one of: {', '.join(FREQUENCIES)}")
+    period = quote_ident(date_field)
+    if freq:
+        period = f"date_trunc({sql_string(freq)}, CAST({period} AS TIMESTAMP))"
+    return period
+
+
+def load_time_series(
+    dataset_id: str,
+    date_field: str,
+    measures: Optional[List[str]] = None,
+    freq: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Sum measures per period of date_field, ordered by period
+
+    Args:
+        dataset_id: Uploaded dataset id
+        date_field: Column holding dates (or any orderable period label)
+        measures: Numeric columns to aggregate (default: all numeric columns)
+        freq: Optional DuckDB date_trunc unit (day/week/month/quarter/year)
+    """
+    path = dataset_path(dataset_id)
+    measures = measures or [c for c in numeric_columns(dataset_id) if c != date_field]
+    if not measures:
+        raise ValueError("Dataset has no numeric columns")
+
+    period = _period_expr(date_field, freq)
+    aggs = ", ".join(f"SUM({quote_ident(m)}) AS {quote_ident(m)}" for m in measures)
+    sql = (
+        f"SELECT {period} AS period, {aggs} FROM read_csv_auto({sql_string(path)}) "
+        f"WHERE {quote_ident(date_field)} IS NOT NULL GROUP BY 1 ORDER BY 1"
+    )
+    with resources.duckdb() as con:
+        return con.execute(sql).fetch_df()
+
+
+def load_panel(
+    dataset_id: str,
+    date_field: str,
+    measure: str,
+    group_by: Optional[str] = None,
+    freq: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Sum one measure per group and period, pivoted to one row per group
+
+    Returns a groups x periods frame (periods ascending); periods a group has
+    no rows for count as 0. Without group_by there is a single row named
+    after the measure.
+    """
+    path = dataset_path(dataset_id)
+    period = _period_expr(date_field, freq)
+    group = f"CAST({quote_ident(group_by)} AS VARCHAR)" if group_by else sql_string(measure)
+    sql = (
+        f"SELECT {group} AS grp, {period} AS period, SUM({quote_ident(measure)}) AS value "
+        f"FROM read_csv_auto({sql_string(path)}) WHERE {quote_ident(date_field)} IS NOT NULL "
+        f"GROUP BY 1, 2"
+    )
+    with resources.duckdb() as con:
+        long = con.execute(sql).fetch_df()
+    if long.empty:
+        raise ValueError("Dataset has no rows with a date")
+    wide = long.pivot_table(index="grp", columns="period", values="value", aggfunc="sum", fill_value=0.0)
+    return wide.sort_index(axis=1)
+
+
+def write_derived(df: pd.DataFrame, name: str) -> str:
+    """Store a derived table as a new dataset next to the uploads and return its id"""
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    dataset_id = f"{uuid.uuid4()}_{name}.csv"
+    df.to_csv(os.path.join(UPLOAD_DIR, dataset_id), index=False)
+    return dataset_id
+
+
+def _records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """JSON-safe rows (NaN -> null, timestamps as ISO strings)"""
+    return json.loads(df.replace({np.nan: None}).to_json(orient="records", date_format="iso"))
+
+
+def preview_rows(dataset_id: str, limit: int = 200) -> List[Dict[str, Any]]:
+    """First rows of a dataset, as the upload response previews them"""
+    with resources.duckdb() as con:
+        df = con.execute(f"SELECT * FROM read_csv_auto({sql_string(dataset_path(dataset_id))}) LIMIT {int(limit)}").fetch_df()
+    return _records(df)
+
+
+def widget_data(
+    dataset_id: str,
+    x: Optional[str] = None,
+    y: Optional[str] = None,
+    group_by: Optional[str] = None,
+    limit: int = 500,
+) -> List[Dict[str, Any]]:
+    """
+    Rows for one widget's config (x_column / y_column / group_by)
+
+    An aggregate y such as "SUM(revenue)" or "COUNT(*)" is grouped by x and
+    group_by; a plain column is returned row by row.
+    """
+    path = dataset_path(dataset_id)
+    dims = [quote_ident(c) for c in (x, group_by) if c]
+    agg = AGGREGATE.match(y.strip()) if y else None
+    if agg:
+        func, arg = agg.group(1).upper(), agg.group(2).strip()
+        target = "*" if arg == "*" else quote_ident(arg)
+        alias = quote_ident(y.strip())
+        select = ", ".join(dims + [f"{func}({target}) AS {alias}"])
+        group = f" GROUP BY {', '.join(str(i + 1) for i in range(len(dims)))} ORDER BY 1" if dims else ""
+        sql = f"SELECT {select} FROM read_csv_auto({sql_string(path)}){group} LIMIT {int(limit)}"
+    else:
+        columns = dims + ([quote_ident(y)] if y else [])
+        sql = f"SELECT {', '.join(columns) or '*'} FROM read_csv_auto({sql_string(path)}) LIMIT {int(limit)}"
+    with resources.duckdb() as con:
+        return _records(con.execute(sql).fetch_df())
@@ -5,11 +5,11 @@ import os
 import pandas as pd
 from typing import Tuple, List, Dict, Any
 from pathlib import Path
-import PyPDF2
-from docx import Document
-import openpyxl
 from io import StringIO
 
+from app.core.metrics import files_parsed, stage
+from app.core.tracing import current_span, traced
+
 def parse_csv_or_txt(file_path: str) -> pd.DataFrame:
     """Parse CSV or TXT file"""
     try:
@@ -50,6 +50,8 @@ def parse_pdf(file_path: str) -> pd.DataFrame:
     Note: This is a basic implementation. For production, consider using
     libraries like tabula-py or camelot-py for better table extraction.
     """
+    import PyPDF2  # imported on first PDF, not at startup
+    
     try:
         with open(file_path, 'rb') as file:
             pdf_reader = PyPDF2.PdfReader(file)
@@ -101,6 +103,8 @@ def parse_docx(file_path: str) -> pd.DataFrame:
     2. Convert first table to DataFrame
     3. If no tables, extract text paragraphs
     """
+    from docx import Document  # imported on first DOCX, not at startup
+    
     try:
         doc = Document(file_path)
         
@@ -137,6 +141,8 @@ def parse_docx(file_path: str) -> pd.DataFrame:
         raise ValueError(f"Failed to parse DOCX: {str(e)}. Try using a CSV/Excel export instead.")
 
 
+@traced("parse_file")
+@stage("parse")
 def parse_file(file_path: str) -> Tuple[pd.DataFrame, str]:
     """
     Universal file parser that detects file type and routes to appropriate parser
@@ -148,32 +154,35 @@ def parse_file(file_path: str) -> Tuple[pd.DataFrame, str]:
     
     try:
         if file_ext in ['.csv', '.txt', '.tsv']:
-            df = parse_csv_or_txt(file_path)
-            return df, 'CSV/TXT'
+            df, file_type = parse_csv_or_txt(file_path), 'CSV/TXT'
         
         elif file_ext in ['.xlsx', '.xls']:
-            df = parse_excel(file_path)
-            return df, 'Excel'
+            df, file_type = parse_excel(file_path), 'Excel'
         
         elif file_ext == '.pdf':
-            df = parse_pdf(file_path)
-            return df, 'PDF'
+            df, file_type = parse_pdf(file_path), 'PDF'
         
         elif file_ext == '.docx':
-            df = parse_docx(file_path)
-            return df, 'DOCX'
+            df, file_type = parse_docx(file_path), 'DOCX'
         
         else:
             raise ValueError(
                 f"Unsupported file type: {file_ext}. "
                 f"Supported types: CSV, TXT, TSV, XLSX, XLS, PDF, DOCX"
             )
+        
+        files_parsed.inc(type=file_type)
+        current_span().set_attributes(
+            file_type=file_type, bytes=os.path.getsize(file_path), rows=len(df), columns=len(df.columns),
+        )
+        return df, file_type
     
     except Exception as e:
         # Re-raise with more context
         raise ValueError(f"Error parsing {file_ext} file: {str(e)}")
 
 
+@stage("validate")
 def validate_dataframe(df: pd.DataFrame, min_rows: int = 1, min_cols: int = 1) -> None:
     """
     Validate that DataFrame meets minimum requirements
@@ -0,0 +1,341 @@
+"""
+Local forecasting engine
+Vectorized exponential smoothing (Holt-Winters / ETS additive) in NumPy.
+Fits many series at once: all series and all candidate smoothing parameters
+are updated together in a single pass over time, so cost grows with series
+length, not with the number of series.
+"""
+import itertools
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from statistics import NormalDist
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Smoothing parameter grid searched per series (alpha: level, beta: trend, gamma: season)
+ALPHAS = (0.1, 0.3, 0.5, 0.8)
+BETAS = (0.01, 0.1, 0.3)
+GAMMAS = (0.05, 0.2, 0.5)
+
+
+@dataclass
+class ForecastResult:
+    """Forecasts for a batch of series; arrays are shaped (n_series, horizon)"""
+    point: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+    fitted: np.ndarray
+    sigma: np.ndarray
+    mape: np.ndarray
+    method: str
+    params: Dict[str, np.ndarray] = field(default_factory=dict)
+
+
+def _linear_fit(Y: np.ndarray):
+    """Per-row least squares intercept and slope"""
+    T = Y.shape[1]
+    x = np.arange(T, dtype=float)
+    x_mean = x.mean()
+    denom = ((x - x_mean) ** 2).sum() or 1.0
+    y_mean = Y.mean(axis=1)
+    slope = ((x - x_mean) * (Y - y_mean[:, None])).sum(axis=1) / denom
+    intercept = y_mean - slope * x_mean
+    return intercept, slope
+
+
+def _mape(Y: np.ndarray, fitted: np.ndarray, skip: int) -> np.ndarray:
+    actual = Y[:, skip:]
+    err = np.abs(actual - fitted[:, skip:])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(np.abs(actual) > 1e-9, err / np.abs(actual), np.nan)
+    out = np.nanmean(pct, axis=1) if pct.shape[1] else np.full(Y.shape[0], np.nan)
+    return np.nan_to_num(out, nan=1.0)
+
+
+def _linear_forecast(Y: np.ndarray, horizon: int, z: float) -> ForecastResult:
+    n, T = Y.shape
+    intercept, slope = _linear_fit(Y)
+    t = np.arange(T, dtype=float)
+    fitted = intercept[:, None] + slope[:, None] * t
+    resid = Y - fitted
+    dof = max(T - 2, 1)
+    sigma = np.sqrt((resid ** 2).sum(axis=1) / dof)
+
+    h = np.arange(T, T + horizon, dtype=float)
+    point = intercept[:, None] + slope[:, None] * h
+    # prediction interval of an OLS trend widens with distance from the data centre
+    x_mean = (T - 1) / 2
+    sxx = ((t - x_mean) ** 2).sum() or 1.0
+    spread = np.sqrt(1 + 1 / max(T, 1) + (h - x_mean) ** 2 / sxx)
+    half = z * sigma[:, None] * spread[None, :]
+    return ForecastResult(
+        point=point, lower=point - half, upper=point + half,
+        fitted=fitted, sigma=sigma, mape=_mape(Y, fitted, 0), method="linear_trend",
+        params={"slope": slope},
+    )
+
+
+def _smooth(Y: np.ndarray, alpha: np.ndarray, beta: np.ndarray, gamma: np.ndarray, m: int, keep_fitted: bool):
+    """
+    One pass of additive exponential smoothing over time
+
+    alpha/beta/gamma are (P, 1) for a parameter grid or (1, n) for per-series
+    parameters; states are (P, n). Returns final states, SSE and optionally the
+    one-step-ahead fitted values.
+    """
+    n, T = Y.shape
+    seasonal = m >= 2
+    P = max(alpha.shape[0], 1)
+
+    # Initial states from the first one or two seasons
+    if seasonal:
+        first = Y[:, :m].mean(axis=1)
+        second = Y[:, m:2 * m].mean(axis=1)
+        trend0 = (second - first) / m
+        # first-season mean sits at its midpoint; detrend before taking seasonal offsets
+        offsets = np.arange(m) - (m - 1) / 2
+        season0 = Y[:, :m] - (first[:, None] + trend0[:, None] * offsets[None, :])
+        level0 = first + trend0 * (m - 1) / 2
+        start = m
+    else:
+        level0 = Y[:, 0]
+        trend0 = Y[:, 1] - Y[:, 0]
+        season0 = np.zeros((n, 1))
+        start = 1
+    period = season0.shape[1]
+
+    level = np.broadcast_to(level0, (P, n)).copy()
+    trend = np.broadcast_to(trend0, (P, n)).copy()
+    season = np.broadcast_to(season0, (P, n, period)).copy()
+    sse = np.zeros((P, n))
+    fitted = None
+    if keep_fitted:
+        fitted = np.empty((P, n, T))
+        fitted[:, :, :start] = Y[None, :, :start]
+
+    for t in range(start, T):
+        s_idx = t % period
+        s_prev = season[:, :, s_idx]
+        y = Y[None, :, t]
+        pred = level + trend + s_prev
+        if keep_fitted:
+            fitted[:, :, t] = pred
+        sse += (y - pred) ** 2
+        new_level = alpha * (y - s_prev) + (1 - alpha) * (level + trend)
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        if seasonal:
+            season[:, :, s_idx] = gamma * (y - new_level) + (1 - gamma) * s_prev
+        level = new_level
+
+    return level, trend, season, sse, fitted, start, period
+
+
+def _exp_smoothing(Y: np.ndarray, horizon: int, m: int, z: float) -> ForecastResult:
+    """Additive Holt (m == 0) or Holt-Winters (m >= 2) with per-series grid search"""
+    n, T = Y.shape
+    seasonal = m >= 2
+    grid = list(itertools.product(ALPHAS, BETAS, GAMMAS if seasonal else (0.0,)))
+    alpha = np.array([g[0] for g in grid])[:, None]
+    beta = np.array([g[1] for g in grid])[:, None]
+    gamma = np.array([g[2] for g in grid])[:, None]
+
+    # Grid pass: SSE for every parameter combination and series at once
+    _, _, _, sse_grid, _, _, _ = _smooth(Y, alpha, beta, gamma, m, keep_fitted=False)
+    best = sse_grid.argmin(axis=0)
+    a_b = alpha[best, 0]
+    b_b = beta[best, 0]
+    g_b = gamma[best, 0]
+
+    # Final pass with each series' own parameters
+    level, trend, season, sse, fitted, start, period = _smooth(
+        Y, a_b[None, :], b_b[None, :], g_b[None, :], m, keep_fitted=True
+    )
+    level_b, trend_b, season_b, sse_b, fitted_b = level[0], trend[0], season[0], sse[0], fitted[0]
+
+    steps = np.arange(1, horizon + 1)
+    future_idx = (T + steps - 1) % period
+    point = level_b[:, None] + trend_b[:, None] * steps[None, :] + season_b[:, future_idx]
+
+    dof = max(T - start - 2, 1)
+    sigma = np.sqrt(sse_b / dof)
+    # ETS(A,A,A) h-step variance: sigma^2 * (1 + sum_{j<h} c_j^2)
+    j = np.arange(1, horizon)
+    c = a_b[:, None] * (1 + j[None, :] * b_b[:, None]) + g_b[:, None] * ((j % period) == 0)[None, :]
+    var_mult = 1 + np.concatenate([np.zeros((n, 1)), np.cumsum(c ** 2, axis=1)], axis=1)
+    half = z * sigma[:, None] * np.sqrt(var_mult)
+
+    return ForecastResult(
+        point=point, lower=point - half, upper=point + half,
+        fitted=fitted_b, sigma=sigma, mape=_mape(Y, fitted_b, start),
+        method="holt_winters" if seasonal else "holt",
+        params={"alpha": a_b, "beta": b_b, "gamma": g_b},
+    )
+
+
+def forecast(
+    Y: np.ndarray,
+    horizon: int,
+    season_length: Optional[int] = None,
+    level: float = 0.95,
+) -> ForecastResult:
+    """
+    Forecast every row of Y (n_series x T, oldest first) horizon steps ahead
+
+    Model choice depends on how much history there is:
+    - two or more full seasons: Holt-Winters with additive seasonality
+    - at least 4 points: Holt linear trend
+    - otherwise: OLS linear trend (flat line for a single point)
+    Missing values are filled by carrying the previous value forward.
+    """
+    Y = np.asarray(Y, dtype=float)
+    if Y.ndim == 1:
+        Y = Y[None, :]
+    Y = _fill_missing(Y)
+    z = NormalDist().inv_cdf(0.5 + level / 2)
+    T = Y.shape[1]
+
+    if season_length and season_length >= 2 and T >= 2 * season_length:
+        return _exp_smoothing(Y, horizon, season_length, z)
+    if T >= 4:
+        return _exp_smoothing(Y, horizon, 0, z)
+    return _linear_forecast(Y, horizon, z)
+
+
+def forecast_batch(
+    Y: np.ndarray,
+    horizon: int,
+    season_length: Optional[int] = None,
+    level: float = 0.95,
+    executor: Optional[Executor] = None,
+    chunk_size: int = 2000,
+) -> ForecastResult:
+    """
+    forecast() for very many series, fitting row chunks in parallel on executor
+
+    All rows share one length, so every chunk picks the same model and the
+    chunk results concatenate back in row order.
+    """
+    Y = np.asarray(Y, dtype=float)
+    if executor is None or Y.shape[0] <= chunk_size:
+        return forecast(Y, horizon, season_length=season_length, level=level)
+    chunks = [Y[i:i + chunk_size] for i in range(0, Y.shape[0], chunk_size)]
+    parts = list(executor.map(
+        forecast, chunks,
+        itertools.repeat(horizon), itertools.repeat(season_length), itertools.repeat(level),
+    ))
+    return ForecastResult(
+        point=np.concatenate([p.point for p in parts]),
+        lower=np.concatenate([p.lower for p in parts]),
+        upper=np.concatenate([p.upper for p in parts]),
+        fitted=np.concatenate([p.fitted for p in parts]),
+        sigma=np.concatenate([p.sigma for p in parts]),
+        mape=np.concatenate([p.mape for p in parts]),
+        method=parts[0].method,
+        params={k: np.concatenate([p.params[k] for p in parts]) for k in parts[0].params},
+    )
+
+
+def _fill_missing(Y: np.ndarray) -> np.ndarray:
+    mask = np.isnan(Y)
+    if not mask.any():
+        return Y
+    idx = np.where(~mask, np.arange(Y.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = Y[np.arange(Y.shape[0])[:, None], idx]
+    return np.nan_to_num(filled, nan=0.0)
+
+
+def confidence_label(mape: float) -> str:
+    """Map in-sample error to the high/medium/low confidence used by the API"""
+    if mape < 0.1:
+        return "high"
+    if mape < 0.25:
+        return "medium"
+    return "low"
+
+
+def numeric_fields(rows: List[Dict]) -> List[str]:
+    """Fields that are numeric in every row, in first-seen order"""
+    fields: List[str] = []
+    for row in rows:
+        for k in row:
+            if k not in fields:
+                fields.append(k)
+    return [
+        f for f in fields
+        if all(isinstance(r.get(f), (int, float)) and not isinstance(r.get(f), bool) for r in rows)
+    ]
+
+
+def _to_list(values: np.ndarray) -> List[float]:
+    return [round(float(v), 2) for v in values]
+
+
+def forecast_records(
+    rows: List[Dict],
+    horizon: int,
+    season_length: Optional[int] = 12,
+    level: float = 0.95,
+) -> Dict:
+    """
+    Forecast every numeric field of a list of period records (oldest first)
+
+    When revenue and expenses are both present, profit is derived from their
+    forecasts so the three series stay consistent.
+
+    Returns the /api/ai/predictions payload: predictions, intervals,
+    confidence, insights, recommendations and method.
+    """
+    fields = numeric_fields(rows) if rows else []
+    if not fields or horizon <= 0:
+        return {"predictions": {}, "intervals": {}, "confidence": "low", "insights": [], "recommendations": [], "method": "none"}
+
+    derive_profit = "revenue" in fields and "expenses" in fields
+    series = [f for f in fields if not (derive_profit and f == "profit")]
+    Y = np.array([[r[f] for r in rows] for f in series], dtype=float)
+    result = forecast(Y, horizon, season_length=season_length, level=level)
+
+    predictions: Dict[str, List[float]] = {}
+    intervals: Dict[str, Dict[str, List[float]]] = {}
+    for i, f in enumerate(series):
+        predictions[f] = _to_list(result.point[i])
+        intervals[f] = {"lower": _to_list(result.lower[i]), "upper": _to_list(result.upper[i])}
+
+    if derive_profit:
+        r_i, e_i = series.index("revenue"), series.index("expenses")
+        profit = result.point[r_i] - result.point[e_i]
+        # revenue and expense errors are treated as independent
+        half = np.sqrt(
+            ((result.upper[r_i] - result.point[r_i]) ** 2) + ((result.upper[e_i] - result.point[e_i]) ** 2)
+        )
+        predictions["profit"] = _to_list(profit)
+        intervals["profit"] = {"lower": _to_list(profit - half), "upper": _to_list(profit + half)}
+
+    insights: List[str] = []
+    latest = dict(rows[-1])
+    if derive_profit:
+        latest["profit"] = latest["revenue"] - latest["expenses"]
+    for f in predictions:
+        last = float(latest[f])
+        end = predictions[f][-1]
+        if abs(last) > 1e-9:
+            change = (end - last) / abs(last) * 100
+            direction = "grow" if change > 1 else "decline" if change < -1 else "stay flat"
+            insights.append(f"{f.replace('_', ' ').capitalize()} is projected to {direction} ({change:+.1f}%) over the next {horizon} periods")
+
+    recommendations: List[str] = []
+    if derive_profit and predictions["profit"] and min(predictions["profit"]) < 0:
+        recommendations.append("Projected profit turns negative; review expense growth against revenue")
+    if derive_profit and predictions["expenses"][-1] - predictions["expenses"][0] > predictions["revenue"][-1] - predictions["revenue"][0]:
+        recommendations.append("Expenses are forecast to grow faster than revenue; prioritise cost controls")
+    recommendations.append("Monitor actual vs predicted performance each period and refresh the forecast")
+
+    return {
+        "predictions": predictions,
+        "intervals": intervals,
+        "confidence": confidence_label(float(np.mean(result.mape))),
+        "insights": insights,
+        "recommendations": recommendations,
+        "method": result.method,
+    }
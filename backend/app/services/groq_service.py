@@ -5,22 +5,43 @@ Provides predictive analytics, anomaly detection, and intelligent recommendation
 
 import os
 import json
-from typing import List, Dict, Any, Optional
-import requests
+from typing import List, Dict, Any, Iterator, Optional
 from datetime import datetime, timedelta
 
+from app.core.config import settings
+from app.core.resources import resources
+from app.core.logging import get_logger, log_llm_exchange
+from app.core.tracing import traced
+from app.services import llm_gateway
+from app.services.anomaly_detection import detect_records
+from app.services.forecasting import forecast_records
+from app.services.prompt_builder import compact_json, fit_items, fit_rows, fit_text, prune
+from app.services.rate_limiter import governor
+
 GROQ_API_KEY = os.getenv('GROQ_API_KEY', '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')
-GROQ_API_URL = 'https://api.groq.com/openai/v1/chat/completions'
+GROQ_API_URL = f"{settings.groq_base_url.rstrip('/')}/openai/v1/chat/completions"
+
+_log = get_logger(__name__)
 
 class GroqAIService:
     """Advanced AI service for business intelligence"""
     
     def __init__(self):
         self.api_key = GROQ_API_KEY
-        self.model = 'llama-3.3-70b-versatile'
+        self.model = settings.groq_model
     
-    def _call_groq(self, messages: List[Dict], temperature: float = 0.7, max_tokens: int = 1024) -> str:
+    @traced("GroqAIService._call_groq")
+    def _call_groq(
+        self,
+        messages: List[Dict],
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        priority: str = 'default',
+    ) -> str:
         """Make a call to Groq API"""
+        if settings.groq_mode != 'live':
+            # Callers treat an error string as "no LLM answer" and keep their local result
+            return "Error: Groq mode is not 'live'"
         try:
             headers = {
                 'Authorization': f'Bearer {self.api_key}',
@@ -34,114 +55,191 @@ class GroqAIService:
                 'max_tokens': max_tokens
             }
             
-            response = requests.post(GROQ_API_URL, headers=headers, json=payload, timeout=30)
-            response.raise_for_status()
+            def _post() -> Dict:
+                response = resources.groq_session().post(GROQ_API_URL, headers=headers, json=payload, timeout=settings.llm_request_timeout)
+                if response.status_code == 429:
+                    # Provider says we are over budget; hold every caller back, not just this one
+                    governor.penalize(float(response.headers.get('retry-after') or 5))
+                response.raise_for_status()
+                return response.json()
             
-            result = response.json()
-            return result['choices'][0]['message']['content']
+            result = llm_gateway.invoke(
+                self.model,
+                messages,
+                {'temperature': temperature, 'max_tokens': max_tokens},
+                _post,
+                priority=priority,
+                usage=lambda r: r['usage']['total_tokens'],
+            )
+            content = result['choices'][0]['message']['content']
+            log_llm_exchange(_log, self.model, messages, content, tokens=result.get('usage', {}).get('total_tokens'))
+            return content
         
         except Exception as e:
             print(f"Groq API error: {e}")
             return f"Error: {str(e)}"
     
-    def generate_predictions(self, historical_data: List[Dict], months_ahead: int = 6) -> Dict[str, Any]:
+    def stream_groq(
+        self,
+        messages: List[Dict],
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        priority: str = 'interactive',
+    ) -> Iterator[str]:
+        """Stream completion tokens from Groq as they arrive (OpenAI-compatible SSE)"""
+        if settings.groq_mode != 'live':
+            raise RuntimeError("Groq mode is not 'live'")
+        headers = {
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json'
+        }
+        payload = {
+            'model': self.model,
+            'messages': messages,
+            'temperature': temperature,
+            'max_tokens': max_tokens,
+            'stream': True
+        }
+        
+        def _open() -> Iterator[str]:
+            with resources.groq_session().post(GROQ_API_URL, headers=headers, json=payload, timeout=settings.llm_request_timeout, stream=True) as response:
+                if response.status_code == 429:
+                    governor.penalize(float(response.headers.get('retry-after') or 5))
+                response.raise_for_status()
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith('data:'):
+                        continue
+                    data = line[len('data:'):].strip()
+                    if data == '[DONE]':
+                        break
+                    delta = json.loads(data)['choices'][0].get('delta', {})
+                    if delta.get('content'):
+                        yield delta['content']
+        
+        return llm_gateway.stream(
+            messages,
+            {'temperature': temperature, 'max_tokens': max_tokens},
+            _open,
+            priority=priority,
+        )
+    
+    def generate_predictions(
+        self,
+        historical_data: List[Dict],
+        months_ahead: int = 6,
+        narrate: bool = False,
+        season_length: Optional[int] = 12,
+    ) -> Dict[str, Any]:
         """
         Predictive analytics: Forecast future revenue, expenses, and profit
+        
+        Numbers come from the local forecasting engine; the LLM is only asked
+        (when narrate=True) to explain them.
         """
-        system_prompt = """You are a financial forecasting AI. Analyze historical data and predict future trends.
-        Return predictions as a valid JSON object with this structure:
+        result = forecast_records(historical_data, months_ahead, season_length=season_length)
+        if narrate and result["predictions"]:
+            result.update(self._narrate_predictions(historical_data, result))
+        return result
+    
+    def _narrate_predictions(self, historical_data: List[Dict], result: Dict[str, Any]) -> Dict[str, Any]:
+        """Ask the LLM for insights/recommendations on already computed forecasts"""
+        system_prompt = """You are a financial analyst. You are given historical data and forecasts computed by a statistical model.
+        Do not change the numbers. Explain them. Return a valid JSON object:
         {
-          "predictions": {
-            "revenue": [list of predicted values for next N months],
-            "expenses": [list of predicted values for next N months],
-            "profit": [list of predicted values for next N months]
-          },
-          "confidence": "high/medium/low",
           "insights": ["key insight 1", "key insight 2", "key insight 3"],
           "recommendations": ["recommendation 1", "recommendation 2"]
         }"""
         
-        user_prompt = f"""Based on this historical financial data for the past 12 months:
-        {json.dumps(historical_data, indent=2)}
+        user_prompt = f"""Historical data (columnar JSON, oldest first):
+        {fit_rows(historical_data)}
         
-        Predict the next {months_ahead} months. Consider growth trends, seasonality, and market conditions.
-        Ensure the response is valid JSON only, no markdown."""
+        Forecast ({result['method']}, confidence {result['confidence']}):
+        {compact_json(result['predictions'])}
+        
+        Return valid JSON only, no markdown."""
         
         response = self._call_groq(
             [
                 {'role': 'system', 'content': system_prompt},
                 {'role': 'user', 'content': user_prompt}
             ],
-            temperature=0.6,
-            max_tokens=1500
+            temperature=0.4,
+            max_tokens=600
         )
         
         try:
-            # Extract JSON from response
             json_start = response.find('{')
             json_end = response.rfind('}') + 1
             if json_start >= 0 and json_end > json_start:
-                return json.loads(response[json_start:json_end])
+                narration = json.loads(response[json_start:json_end])
+                return {
+                    k: narration[k] for k in ('insights', 'recommendations')
+                    if isinstance(narration.get(k), list)
+                }
         except:
             pass
         
-        # Fallback prediction
-        return self._generate_fallback_predictions(historical_data, months_ahead)
+        return {}
     
-    def detect_anomalies(self, data: List[Dict]) -> Dict[str, Any]:
+    def detect_anomalies(self, data: List[Dict], explain: bool = False, **detector_options) -> Dict[str, Any]:
         """
         Anomaly detection: Identify unusual patterns in financial data
+        
+        Points are flagged by the local statistical detector; the LLM is only
+        asked (when explain=True) to describe the flagged points.
         """
-        system_prompt = """You are a financial anomaly detection AI. Identify unusual patterns, spikes, or concerning trends.
-        Return analysis as JSON:
+        result = detect_records(data, **detector_options)
+        if explain and result["anomalies"]:
+            result = self.explain_anomalies(result)
+        return result
+    
+    def explain_anomalies(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Ask the LLM to describe already detected anomalies; only the flagged points are sent"""
+        system_prompt = """You are a financial analyst. You are given anomalies found by a statistical detector.
+        Do not add or remove anomalies. For each one, explain it. Return a valid JSON object:
         {
-          "anomalies": [
-            {
-              "type": "spike/drop/unusual_pattern",
-              "severity": "high/medium/low",
-              "month": "month name",
-              "metric": "revenue/expenses/profit",
-              "description": "explanation",
-              "recommendation": "what to do"
-            }
-          ],
-          "overall_health": "healthy/concerning/critical",
+          "anomalies": [{"id": 0, "description": "explanation", "recommendation": "what to do"}],
           "summary": "brief summary"
         }"""
         
-        user_prompt = f"""Analyze this financial data for anomalies:
-        {json.dumps(data, indent=2)}
-        
-        Look for:
-        - Unexpected spikes or drops
-        - Unusual expense patterns
-        - Profit margin concerns
-        - Cash flow issues
+        flagged = [
+            {'id': i, **{k: a[k] for k in ('type', 'severity', 'month', 'metric', 'value', 'expected')}}
+            for i, a in enumerate(result["anomalies"])
+        ]
+        user_prompt = f"""Overall health: {result['overall_health']}
+        Anomalies:
+        {fit_items(flagged)}
         
-        Return valid JSON only."""
+        Return valid JSON only, no markdown."""
         
         response = self._call_groq(
             [
                 {'role': 'system', 'content': system_prompt},
                 {'role': 'user', 'content': user_prompt}
             ],
-            temperature=0.5,
-            max_tokens=1200
+            temperature=0.4,
+            max_tokens=800
         )
         
         try:
             json_start = response.find('{')
             json_end = response.rfind('}') + 1
             if json_start >= 0 and json_end > json_start:
-                return json.loads(response[json_start:json_end])
+                explanation = json.loads(response[json_start:json_end])
+                anomalies = [dict(a) for a in result["anomalies"]]
+                for item in explanation.get('anomalies') or []:
+                    i = item.get('id') if isinstance(item, dict) else None
+                    if isinstance(i, int) and 0 <= i < len(anomalies):
+                        for k in ('description', 'recommendation'):
+                            if isinstance(item.get(k), str) and item[k]:
+                                anomalies[i][k] = item[k]
+                result = {**result, "anomalies": anomalies}
+                if isinstance(explanation.get('summary'), str) and explanation['summary']:
+                    result["summary"] = explanation['summary']
         except:
             pass
         
-        return {
-            "anomalies": [],
-            "overall_health": "healthy",
-            "summary": "No significant anomalies detected"
-        }
+        return result
     
     def generate_recommendations(self, business_data: Dict, financial_data: List[Dict]) -> List[Dict[str, str]]:
         """
@@ -161,10 +259,10 @@ class GroqAIService:
         ]"""
         
         user_prompt = f"""Business Profile:
-        {json.dumps(business_data, indent=2)}
+        {fit_text(compact_json(prune(business_data)), settings.llm_input_token_budget // 4)}
         
-        Financial Data:
-        {json.dumps(financial_data[:6], indent=2)}  
+        Financial Data (columnar JSON, oldest first):
+        {fit_rows(financial_data)}
         
         Provide 5 specific, actionable recommendations to improve business performance.
         Return valid JSON array only."""
@@ -175,7 +273,8 @@ class GroqAIService:
                 {'role': 'user', 'content': user_prompt}
             ],
             temperature=0.7,
-            max_tokens=1500
+            max_tokens=1500,
+            priority='background'
         )
         
         try:
@@ -213,7 +312,7 @@ class GroqAIService:
         
         user_prompt = f"""Analyze this {document_type} document:
         
-        {document_text[:3000]}  
+        {fit_text(document_text)}
         
         Extract financial data, trends, and provide insights. Return valid JSON only."""
         
@@ -240,31 +339,6 @@ class GroqAIService:
             "insights": [],
             "action_items": []
         }
-    
-    def _generate_fallback_predictions(self, historical_data: List[Dict], months_ahead: int) -> Dict:
-        """Generate simple predictions if AI fails"""
-        if not historical_data:
-            return {"predictions": {}, "confidence": "low", "insights": [], "recommendations": []}
-        
-        # Calculate simple averages and growth
-        avg_revenue = sum(d.get('revenue', 0) for d in historical_data) / len(historical_data)
-        avg_expenses = sum(d.get('expenses', 0) for d in historical_data) / len(historical_data)
-        
-        growth_rate = 1.05  # 5% growth assumption
-        
-        predictions = {
-            "revenue": [avg_revenue * (growth_rate ** i) for i in range(1, months_ahead + 1)],
-            "expenses": [avg_expenses * (1.03 ** i) for i in range(1, months_ahead + 1)],
-            "profit": []
-        }
-        predictions["profit"] = [r - e for r, e in zip(predictions["revenue"], predictions["expenses"])]
-        
-        return {
-            "predictions": predictions,
-            "confidence": "medium",
-            "insights": ["Based on historical averages with 5% growth projection"],
-            "recommendations": ["Monitor actual vs predicted performance monthly"]
-        }
 
 # Global instance
 groq_service = GroqAIService()
@@ -2,11 +2,78 @@
 Team invitation service
 Handles creating, sending, and accepting team member invitations
 """
+import asyncio
+import csv
+import io
+import re
 import secrets
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List, Tuple
 from fastapi import HTTPException, status
-from app.db.supabase_client import get_supabase, get_supabase_admin
+from app.db.supabase_client import get_postgres, get_supabase, get_supabase_admin, run_db
+
+
+VALID_ROLES = ['admin', 'manager', 'employee', 'finance']
+
+# Emails per lookup filter (keeps PostgREST URLs well under proxy limits)
+LOOKUP_CHUNK = 50
+# Rows per bulk insert request
+INSERT_CHUNK = 500
+
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+def _chunks(items: List[Any], size: int) -> List[List[Any]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _email_ilike_any(emails: List[str]) -> str:
+    """
+    PostgREST or= filter matching any of the emails case-insensitively
+
+    Signup stores emails as typed, so an IN filter on the lowered emails
+    would miss "Alice@corp.com". LIKE wildcards (_ % *) in an address can
+    only over-match; callers compare the returned emails exactly.
+    """
+    def quoted(email: str) -> str:
+        pattern = email.replace("\\", "\\\\")  # literal backslash in the LIKE pattern
+        return '"' + pattern.replace("\\", "\\\\").replace('"', '\\"') + '"'
+    return ",".join(f"email.ilike.{quoted(e)}" for e in emails)
+
+
+def prepare_invitees(invitees: List[Dict[str, Any]], default_role: Optional[str] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Validate a bulk invite list in memory
+
+    Returns (results, valid): one result per input row (row, email, role and
+    a status of "pending" or the reason it is skipped) and the pending rows.
+    """
+    results, valid, seen = [], [], set()
+    for i, invitee in enumerate(invitees):
+        email = str(invitee.get("email") or "").strip().lower()
+        role = str(invitee.get("role") or default_role or "").strip().lower()
+        result = {"row": i + 1, "email": email, "role": role, "status": "pending"}
+        if not EMAIL_PATTERN.match(email):
+            result["status"] = "invalid_email"
+        elif role not in VALID_ROLES:
+            result["status"] = "invalid_role"
+        elif email in seen:
+            result["status"] = "duplicate"
+        else:
+            seen.add(email)
+            valid.append(result)
+        results.append(result)
+    return results, valid
+
+
+def parse_invitees_csv(content: bytes) -> List[Dict[str, Any]]:
+    """Rows of a CSV with an email column and an optional role column (header names are case-insensitive)"""
+    reader = csv.DictReader(io.StringIO(content.decode("utf-8-sig")))
+    rows = []
+    for row in reader:
+        normalized = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+        rows.append({"email": normalized.get("email"), "role": normalized.get("role")})
+    return rows
 
 
 class InvitationService:
@@ -30,18 +97,30 @@ class InvitationService:
             supabase = get_supabase_admin()
             
             # Validate role
-            valid_roles = ['admin', 'manager', 'employee', 'finance']
-            if role not in valid_roles:
+            if role not in VALID_ROLES:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Invalid role. Must be one of: {', '.join(valid_roles)}"
+                    detail=f"Invalid role. Must be one of: {', '.join(VALID_ROLES)}"
                 )
             
-            # Check if user already exists with this email in this business
-            existing_user = supabase.table("users").select("*").eq(
-                "email", email
-            ).eq("business_id", business_id).execute()
+            # Independent lookups run together: existing member, pending
+            # invitation, and the business and inviter names for the email
+            existing_user, existing_invitation, business, inviter = await asyncio.gather(
+                run_db(supabase.table("users").select("id").eq(
+                    "email", email
+                ).eq("business_id", business_id).limit(1).execute),
+                run_db(supabase.table("invitations").select("id").eq(
+                    "email", email
+                ).eq("business_id", business_id).eq("status", "pending").limit(1).execute),
+                run_db(supabase.table("businesses").select("name").eq(
+                    "id", business_id
+                ).single().execute),
+                run_db(supabase.table("users").select("full_name, email").eq(
+                    "id", invited_by_user_id
+                ).single().execute),
+            )
             
+            # Check if user already exists with this email in this business
             if existing_user.data:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -49,10 +128,6 @@ class InvitationService:
                 )
             
             # Check for pending invitation
-            existing_invitation = supabase.table("invitations").select("*").eq(
-                "email", email
-            ).eq("business_id", business_id).eq("status", "pending").execute()
-            
             if existing_invitation.data:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -76,7 +151,7 @@ class InvitationService:
                 "status": "pending"
             }
             
-            response = supabase.table("invitations").insert(invitation_data).execute()
+            response = await run_db(supabase.table("invitations").insert(invitation_data).execute)
             
             if not response.data:
                 raise HTTPException(
@@ -86,16 +161,6 @@ class InvitationService:
             
             invitation = response.data[0]
             
-            # Get business info for email
-            business = supabase.table("businesses").select("name").eq(
-                "id", business_id
-            ).single().execute()
-            
-            # Get inviter info
-            inviter = supabase.table("users").select("full_name, email").eq(
-                "id", invited_by_user_id
-            ).single().execute()
-            
             # TODO: Send invitation email
             # await send_invitation_email(
             #     to_email=email,
@@ -124,25 +189,119 @@ class InvitationService:
                 detail=f"Failed to create invitation: {str(e)}"
             )
     
+    @staticmethod
+    async def create_invitations_bulk(
+        business_id: str,
+        invitees: List[Dict[str, Any]],
+        invited_by_user_id: str,
+        default_role: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Invite many people at once
+        Roles and emails are validated in memory; existing members and
+        pending invitations are found with one case-insensitive query per
+        chunk of emails (all chunks concurrently) and the invitations are inserted in
+        batches. Returns a result per input row.
+        """
+        results, valid = prepare_invitees(invitees, default_role)
+        try:
+            supabase = get_supabase_admin()
+            emails = [r["email"] for r in valid]
+            
+            lookups = [
+                run_db(supabase.table("users").select("email").eq(
+                    "business_id", business_id
+                ).or_(_email_ilike_any(chunk)).execute)
+                for chunk in _chunks(emails, LOOKUP_CHUNK)
+            ] + [
+                run_db(supabase.table("invitations").select("email").eq(
+                    "business_id", business_id
+                ).eq("status", "pending").or_(_email_ilike_any(chunk)).execute)
+                for chunk in _chunks(emails, LOOKUP_CHUNK)
+            ]
+            responses = await asyncio.gather(*lookups)
+            half = len(responses) // 2
+            members = {row["email"].lower() for r in responses[:half] for row in (r.data or [])}
+            pending = {row["email"].lower() for r in responses[half:] for row in (r.data or [])}
+            
+            expires_at = (datetime.utcnow() + timedelta(days=InvitationService.INVITATION_EXPIRY_DAYS)).isoformat()
+            to_insert = []
+            for result in valid:
+                if result["email"] in members:
+                    result["status"] = "already_member"
+                elif result["email"] in pending:
+                    result["status"] = "already_invited"
+                else:
+                    result["token"] = secrets.token_urlsafe(32)
+                    to_insert.append(result)
+            
+            inserts = await asyncio.gather(*(
+                run_db(supabase.table("invitations").insert([{
+                    "business_id": business_id,
+                    "email": r["email"],
+                    "role": r["role"],
+                    "invited_by": invited_by_user_id,
+                    "token": r["token"],
+                    "expires_at": expires_at,
+                    "status": "pending"
+                } for r in chunk]).execute)
+                for chunk in _chunks(to_insert, INSERT_CHUNK)
+            ), return_exceptions=True)
+            
+            for chunk, response in zip(_chunks(to_insert, INSERT_CHUNK), inserts):
+                failed = isinstance(response, BaseException) or not response.data
+                created = {} if failed else {row["email"].lower(): row for row in response.data}
+                for r in chunk:
+                    row = created.get(r["email"])
+                    if row is None:
+                        r["status"] = "error"
+                        r["error"] = str(response) if isinstance(response, BaseException) else "Insert failed"
+                        r.pop("token", None)
+                    else:
+                        r.update(
+                            status="invited",
+                            id=row["id"],
+                            expires_at=row["expires_at"],
+                            invite_url=f"http://localhost:4000/invite/{r['token']}",
+                        )
+            
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to create invitations: {str(e)}"
+            )
+        
+        counts: Dict[str, int] = {}
+        for r in results:
+            counts[r["status"]] = counts.get(r["status"], 0) + 1
+        return {
+            "total": len(results),
+            "invited": counts.get("invited", 0),
+            "counts": counts,
+            "results": results
+        }
+    
     @staticmethod
     async def get_invitation(token: str) -> Dict[str, Any]:
         """Get invitation details by token"""
         try:
-            supabase = get_supabase()
-            
-            # Get invitation
-            response = supabase.table("invitations").select(
-                "*, businesses(name, industry)"
-            ).eq("token", token).single().execute()
-            
-            if not response.data:
+            # Get invitation (the REST client is only needed without the pool)
+            postgres = get_postgres()
+            if postgres is not None:
+                invitation = await run_db(postgres.invitation_by_token, token)
+            else:
+                supabase = get_supabase()
+                response = await run_db(supabase.table("invitations").select(
+                    "*, businesses(name, industry)"
+                ).eq("token", token).single().execute)
+                invitation = response.data
+            
+            if not invitation:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Invitation not found"
                 )
             
-            invitation = response.data
-            
             # Check status
             if invitation["status"] != "pending":
                 raise HTTPException(
@@ -152,11 +311,14 @@ class InvitationService:
             
             # Check expiry
             expires_at = datetime.fromisoformat(invitation["expires_at"].replace('Z', '+00:00'))
+            if expires_at.tzinfo is not None:
+                expires_at = expires_at.astimezone(timezone.utc).replace(tzinfo=None)
             if expires_at < datetime.utcnow():
                 # Update status to expired
-                supabase.table("invitations").update({
+                supabase = get_supabase()
+                await run_db(supabase.table("invitations").update({
                     "status": "expired"
-                }).eq("token", token).execute()
+                }).eq("token", token).execute)
                 
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -195,9 +357,9 @@ class InvitationService:
             supabase = get_supabase_admin()
             
             # Get and validate invitation
-            invitation_response = supabase.table("invitations").select("*").eq(
+            invitation_response = await run_db(supabase.table("invitations").select("*").eq(
                 "token", token
-            ).eq("status", "pending").single().execute()
+            ).eq("status", "pending").single().execute)
             
             if not invitation_response.data:
                 raise HTTPException(
@@ -217,9 +379,9 @@ class InvitationService:
             # Check expiry
             expires_at = datetime.fromisoformat(invitation["expires_at"].replace('Z', '+00:00'))
             if expires_at < datetime.utcnow():
-                supabase.table("invitations").update({
+                await run_db(supabase.table("invitations").update({
                     "status": "expired"
-                }).eq("token", token).execute()
+                }).eq("token", token).execute)
                 
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -227,7 +389,7 @@ class InvitationService:
                 )
             
             # Create auth user
-            auth_response = supabase.auth.sign_up({
+            auth_response = await run_db(supabase.auth.sign_up, {
                 "email": email,
                 "password": password,
                 "options": {
@@ -256,26 +418,26 @@ class InvitationService:
                 "last_login": datetime.utcnow().isoformat()
             }
             
-            user_response = supabase.table("users").insert(user_data).execute()
+            user_response = await run_db(supabase.table("users").insert(user_data).execute)
             
             if not user_response.data:
                 # Rollback: delete auth user
-                supabase.auth.admin.delete_user(user_id)
+                await run_db(supabase.auth.admin.delete_user, user_id)
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail="Failed to create user profile"
                 )
             
-            # Update invitation status
-            supabase.table("invitations").update({
-                "status": "accepted",
-                "accepted_at": datetime.utcnow().isoformat()
-            }).eq("token", token).execute()
-            
-            # Get business info
-            business = supabase.table("businesses").select("*").eq(
-                "id", invitation["business_id"]
-            ).single().execute()
+            # Update invitation status and get business info together
+            _, business = await asyncio.gather(
+                run_db(supabase.table("invitations").update({
+                    "status": "accepted",
+                    "accepted_at": datetime.utcnow().isoformat()
+                }).eq("token", token).execute),
+                run_db(supabase.table("businesses").select("*").eq(
+                    "id", invitation["business_id"]
+                ).single().execute),
+            )
             
             return {
                 "user": auth_response.user,
@@ -298,11 +460,11 @@ class InvitationService:
         try:
             supabase = get_supabase()
             
-            response = supabase.table("invitations").select(
+            response = await run_db(supabase.table("invitations").select(
                 "*, users!invitations_invited_by_fkey(full_name, email)"
             ).eq("business_id", business_id).order(
                 "created_at", desc=True
-            ).execute()
+            ).execute)
             
             return response.data or []
             
@@ -318,11 +480,11 @@ class InvitationService:
         try:
             supabase = get_supabase()
             
-            response = supabase.table("invitations").update({
+            response = await run_db(supabase.table("invitations").update({
                 "status": "cancelled"
             }).eq("id", invitation_id).eq(
                 "business_id", business_id
-            ).eq("status", "pending").execute()
+            ).eq("status", "pending").execute)
             
             if not response.data:
                 raise HTTPException(
@@ -0,0 +1,135 @@
+"""
+Background jobs
+Runs slow work (LLM widget proposals, large imports) off the request path so
+endpoints can answer immediately and let clients poll or subscribe for the
+result.
+
+Jobs live in memory in this process; with several workers a client must
+reach the same worker to see its job.
+"""
+import contextvars
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.core.resources import resources
+from app.core.sse import AsyncNotifier
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+FINISHED = (DONE, ERROR)
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str = PENDING
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    # bumped on every status change so waiters can tell what they have seen
+    version: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobRegistry:
+    """Thread-pool job runner with a lookup table and change notifications"""
+
+    def __init__(self, max_workers: int, ttl_seconds: float, max_jobs: int = 1000):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        resources.track_executor(self._executor)
+        self._jobs: Dict[str, Job] = {}
+        self._changed = threading.Condition()
+        self._notifier = AsyncNotifier()
+        self.ttl_seconds = ttl_seconds
+        self.max_jobs = max_jobs
+
+    def submit(self, kind: str, fn: Callable[..., Any], *args, **kwargs) -> Job:
+        """Start fn(*args, **kwargs) in the background; the caller's context (tenant) carries over"""
+        job = Job(id=uuid.uuid4().hex, kind=kind)
+        with self._changed:
+            self._prune()
+            self._jobs[job.id] = job
+        ctx = contextvars.copy_context()
+        self._executor.submit(ctx.run, self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job: Job, fn: Callable[..., Any], args, kwargs) -> None:
+        self._update(job, status=RUNNING)
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            print(f"❌ Job {job.kind} {job.id} failed: {e}")
+            self._update(job, status=ERROR, error=str(e), finished_at=time.time())
+        else:
+            self._update(job, status=DONE, result=result, finished_at=time.time())
+
+    def _update(self, job: Job, **changes) -> None:
+        with self._changed:
+            for k, v in changes.items():
+                setattr(job, k, v)
+            job.version += 1
+            self._changed.notify_all()
+        self._notifier.notify_all()
+
+    def _prune(self) -> None:
+        """Forget finished jobs past their TTL, then the oldest finished ones over max_jobs"""
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.status in FINISHED and now - (job.finished_at or now) > self.ttl_seconds:
+                del self._jobs[job_id]
+        finished = sorted((j for j in self._jobs.values() if j.status in FINISHED), key=lambda j: j.created_at)
+        for job in finished[:max(0, len(self._jobs) - self.max_jobs + 1)]:
+            del self._jobs[job.id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._changed:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id: str, seen_version: int = -1, timeout: float = 15.0) -> Optional[Job]:
+        """
+        Block until the job changes past seen_version or timeout expires
+
+        Returns the job (possibly unchanged on timeout) or None when unknown.
+        """
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while True:
+                job = self._jobs.get(job_id)
+                if job is None or job.version > seen_version or job.status in FINISHED:
+                    return job
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return job
+                self._changed.wait(remaining)
+
+    def _moved_past(self, job_id: str, seen_version: int) -> bool:
+        with self._changed:
+            job = self._jobs.get(job_id)
+            return job is None or job.version > seen_version or job.status in FINISHED
+
+    async def wait_async(self, job_id: str, seen_version: int = -1, timeout: float = 15.0) -> Optional[Job]:
+        """wait() for async callers: awaits on the event loop instead of blocking a thread"""
+        await self._notifier.wait_for(lambda: self._moved_past(job_id, seen_version), timeout)
+        return self.get(job_id)
+
+
+jobs = JobRegistry(max_workers=settings.job_workers, ttl_seconds=settings.job_ttl_seconds)
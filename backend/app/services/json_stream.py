@@ -0,0 +1,85 @@
+"""
+Incremental JSON parsing for streamed LLM output
+Lets us emit each element of a JSON array (e.g. a widget proposal) as soon as
+its closing bracket arrives instead of waiting for the whole completion.
+"""
+import json
+from typing import Any, List
+
+
+class JSONArrayStream:
+    """
+    Feed text chunks, get back fully parsed top-level array elements
+
+    Anything before the first '[' (prose, markdown fences) is ignored, as is
+    anything after the array closes. Elements that fail to parse are skipped.
+
+    Example:
+        parser = JSONArrayStream()
+        for chunk in chunks:
+            for item in parser.feed(chunk):
+                emit(item)
+    """
+
+    def __init__(self):
+        self._started = False
+        self.finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._buf: List[str] = []
+        self.skipped = 0
+
+    def _emit(self, out: List[Any]) -> None:
+        text = "".join(self._buf).strip()
+        self._buf = []
+        if not text:
+            return
+        try:
+            out.append(json.loads(text))
+        except ValueError:
+            self.skipped += 1
+
+    def feed(self, chunk: str) -> List[Any]:
+        out: List[Any] = []
+        for ch in chunk:
+            if self.finished:
+                break
+
+            if not self._started:
+                if ch == "[":
+                    self._started = True
+                continue
+
+            if self._in_string:
+                self._buf.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._buf.append(ch)
+            elif ch in "{[":
+                self._depth += 1
+                self._buf.append(ch)
+            elif ch in "}]":
+                if self._depth == 0:
+                    # closing bracket of the top-level array
+                    self._emit(out)
+                    self.finished = True
+                    continue
+                self._depth -= 1
+                self._buf.append(ch)
+                if self._depth == 0:
+                    self._emit(out)
+            elif ch == "," and self._depth == 0:
+                # separator between scalar elements (objects were emitted on close)
+                self._emit(out)
+            else:
+                self._buf.append(ch)
+        return out
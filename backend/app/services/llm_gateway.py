@@ -0,0 +1,252 @@
+"""
+LLM gateway shared by every Groq caller
+Coalesces identical concurrent requests so a burst of users opening the same
+dataset results in a single upstream call, admits upstream calls through the
+client-side rate limiter, and bounds their latency (budgets, hedging, circuit
+breaker; see llm_resilience)
+"""
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+from app.core.metrics import cache_hits, cache_misses, llm_latency, llm_tokens, stage
+from app.core.tracing import current_span, span
+from app.services.llm_resilience import (
+    BREAKER_STATES, LATENCY_BUDGETS, CircuitOpen, LatencyBudgetExceeded, breaker, caller,
+)
+from app.services.rate_limiter import RateLimitExceeded, current_tenant, governor
+from app.services.token_counter import count_message_tokens
+
+T = TypeVar("T")
+
+# Completion budget assumed when the caller does not set max_tokens
+DEFAULT_COMPLETION_TOKENS = 1024
+
+# Seconds a single-flight follower waits beyond the leader's latency budget
+FOLLOWER_GRACE = 1.0
+
+
+def prompt_hash(model: str, messages: List[Dict[str, Any]], params: Optional[Dict[str, Any]] = None) -> str:
+    """Stable hash of everything that determines an LLM completion"""
+    payload = {
+        "model": model,
+        "messages": messages,
+        "params": params or {},
+    }
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    """An in-flight upstream call that followers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """
+    Duplicate call suppression (a.k.a. single-flight)
+
+    The first caller for a key becomes the leader and runs the function;
+    callers that arrive while it is running wait for and share its result.
+    Nothing is cached once the call finishes. Followers wait at most
+    `timeout` seconds, so a stuck leader cannot hang them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.shared_hits = 0
+
+    def do(self, key: str, fn: Callable[[], T], timeout: Optional[float] = None) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.followers += 1
+                self.shared_hits += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+        (cache_misses if leader else cache_hits).inc(cache="llm_single_flight")
+        current_span().set_attribute("cache_hit", not leader)
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise LatencyBudgetExceeded(f"No answer from the shared LLM call within {timeout:.1f}s")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+# Global instance
+_flight = SingleFlight()
+
+
+def _outcome(error: Optional[BaseException]) -> str:
+    """Label for the LLM latency histogram"""
+    if error is None:
+        return "ok"
+    if isinstance(error, CircuitOpen):
+        return "circuit_open"
+    if isinstance(error, RateLimitExceeded):
+        return "rate_limited"
+    if isinstance(error, LatencyBudgetExceeded):
+        return "timeout"
+    return "error"
+
+
+@stage("llm")
+def invoke(
+    model: str,
+    messages: List[Dict[str, Any]],
+    params: Dict[str, Any],
+    call: Callable[[], T],
+    priority: str = "default",
+    usage: Optional[Callable[[T], Optional[int]]] = None,
+    budget: Optional[float] = None,
+) -> T:
+    """
+    Run an upstream LLM call through the gateway
+
+    Args:
+        model: Model name (part of the coalescing key)
+        messages: Chat messages as role/content dicts
+        params: Sampling parameters that affect the completion
+        call: Zero-argument function performing the actual request
+        priority: Rate limiter class ("interactive", "default" or "background")
+        usage: Optional function extracting actual total tokens from the result
+        budget: Seconds to wait for an answer (default: per priority class)
+
+    Raises:
+        RateLimitExceeded: if the call could not be admitted in time
+        CircuitOpen: if the provider is failing and the breaker is open
+        LatencyBudgetExceeded: if no answer arrived within the budget
+    """
+    key = prompt_hash(model, messages, params)
+    estimate = count_message_tokens(messages) + int(params.get("max_tokens") or DEFAULT_COMPLETION_TOKENS)
+    budget = budget or LATENCY_BUDGETS.get(priority, LATENCY_BUDGETS["default"])
+    # attempts run on pool threads, so the tenant is captured here
+    tenant = current_tenant.get()
+    reported: Dict[str, int] = {}
+
+    def attempt(wait_for_permit: float) -> T:
+        permit = governor.acquire(estimate, priority=priority, tenant=tenant, timeout=wait_for_permit)
+        used = None
+        try:
+            result = call()
+            if usage is not None:
+                try:
+                    used = usage(result)
+                except Exception:
+                    used = None
+                if used:
+                    llm_tokens.inc(used, priority=priority)
+                    reported["tokens"] = used
+            return result
+        finally:
+            governor.release(permit, used)
+
+    def resilient() -> T:
+        # Only the single-flight leader reaches the provider, so only it spends
+        # budget and only its outcome moves the breaker
+        if not breaker.allow():
+            llm_latency.observe(0.0, priority=priority, outcome="circuit_open")
+            raise CircuitOpen("LLM provider circuit is open; using fallback")
+        start = time.perf_counter()
+        try:
+            # a hedge never queues behind other traffic: it only goes out if a permit is free now
+            result = caller.call(lambda: attempt(budget), budget, hedge=lambda: attempt(0.0))
+        except RateLimitExceeded as e:
+            llm_latency.observe(time.perf_counter() - start, priority=priority, outcome=_outcome(e))
+            breaker.release_probe()
+            raise
+        except Exception as e:
+            llm_latency.observe(time.perf_counter() - start, priority=priority, outcome=_outcome(e))
+            breaker.record_failure()
+            raise
+        llm_latency.observe(time.perf_counter() - start, priority=priority, outcome="ok")
+        breaker.record_success()
+        return result
+
+    with span("llm.invoke", model=model, priority=priority, estimated_tokens=estimate) as s:
+        # followers get the leader's budget plus a little slack for its bookkeeping
+        result = _flight.do(key, resilient, timeout=budget + FOLLOWER_GRACE)
+        if "tokens" in reported:
+            s.set_attribute("tokens", reported["tokens"])
+        return result
+
+
+def stream(
+    messages: List[Dict[str, Any]],
+    params: Dict[str, Any],
+    open_stream: Callable[[], Iterator[str]],
+    priority: str = "interactive",
+) -> Iterator[str]:
+    """
+    Run a streaming LLM call through the rate limiter
+
+    Streams are not coalesced: each client consumes its own token stream.
+    The permit is held until the stream is exhausted or closed.
+    """
+    estimate = count_message_tokens(messages) + int(params.get("max_tokens") or DEFAULT_COMPLETION_TOKENS)
+    if not breaker.allow():
+        raise CircuitOpen("LLM provider circuit is open; using fallback")
+    try:
+        permit = governor.acquire(estimate, priority=priority)
+    except RateLimitExceeded:
+        breaker.release_probe()
+        raise
+    start = time.perf_counter()
+    try:
+        yield from open_stream()
+    except GeneratorExit:
+        # client went away; says nothing about the provider
+        breaker.release_probe()
+        raise
+    except Exception as e:
+        llm_latency.observe(time.perf_counter() - start, priority=priority, outcome=_outcome(e))
+        breaker.record_failure()
+        raise
+    else:
+        llm_latency.observe(time.perf_counter() - start, priority=priority, outcome="ok")
+        breaker.record_success()
+    finally:
+        governor.release(permit)
+
+
+def gateway_stats() -> Dict[str, float]:
+    """Counters for observability"""
+    return {
+        "in_flight": _flight.in_flight(),
+        "coalesced_calls": _flight.shared_hits,
+        "breaker_state": BREAKER_STATES[breaker.state],
+        "breaker_trips": breaker.trips,
+        "breaker_rejected": breaker.rejected,
+        **caller.stats(),
+        **{f"limiter_{k}": v for k, v in governor.stats().items()},
+    }
@@ -0,0 +1,199 @@
+"""
+Resilience for upstream LLM calls
+- latency budget: a call that has not answered within its budget fails fast
+  so the caller can use its deterministic fallback
+- hedging: when the first attempt is slower than the recent p95, a second
+  identical request is sent and whichever answers first wins
+- circuit breaker: after repeated failures every call fails immediately for a
+  cool-down window, then a single probe decides whether to close again
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional, TypeVar
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.resources import resources
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+BREAKER_STATES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Latency samples needed before the observed p95 replaces the configured hedge delay
+MIN_SAMPLES = 20
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling the provider while the breaker is open"""
+
+
+class LatencyBudgetExceeded(Exception):
+    """Raised when no attempt answered within the call's latency budget"""
+
+
+class LatencyTracker:
+    """Sliding window of recent successful call latencies"""
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < MIN_SAMPLES:
+                return None
+            return float(np.quantile(np.fromiter(self._samples, dtype=float), q))
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    closed -> open after failure_threshold failures in a row; open -> half_open
+    once cooldown seconds have passed; half_open lets one probe through and
+    closes on its success or re-opens on its failure.
+    """
+
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now (claims the probe slot when half-open)"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def release_probe(self) -> None:
+        """Give back a claimed probe slot without judging the provider"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.trips += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+
+class ResilientCaller:
+    """Runs attempts on a thread pool with a latency budget and an optional hedge"""
+
+    def __init__(self, max_workers: int, hedge_after: float, hedging: bool):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+        resources.track_executor(self._executor)
+        self.latency = LatencyTracker()
+        self.default_hedge_after = hedge_after
+        self.hedging = hedging
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+
+    def hedge_delay(self) -> float:
+        """Recent p95 latency, or the configured delay until enough samples exist"""
+        p95 = self.latency.quantile(0.95)
+        return max(p95, 0.5) if p95 is not None else self.default_hedge_after
+
+    def call(self, primary: Callable[[], T], budget: float, hedge: Optional[Callable[[], T]] = None) -> T:
+        """
+        Return the first successful attempt within budget seconds
+
+        hedge, when given, is started once the primary has been running longer
+        than hedge_delay() and budget remains. An attempt that loses the race
+        or outlives the budget is left to finish in the background.
+        """
+        start = time.monotonic()
+        deadline = start + budget
+        pending: Dict[Future, str] = {self._executor.submit(primary): "primary"}
+        hedge_at = start + self.hedge_delay() if (hedge is not None and self.hedging) else None
+        error: Optional[BaseException] = None
+
+        while pending:
+            now = time.monotonic()
+            until = deadline if hedge_at is None else min(deadline, hedge_at)
+            done, _ = wait(list(pending), timeout=max(0.0, until - now), return_when=FIRST_COMPLETED)
+            for future in done:
+                role = pending.pop(future)
+                if future.exception() is None:
+                    self.latency.record(time.monotonic() - start)
+                    if role == "hedge":
+                        self.hedge_wins += 1
+                    return future.result()
+                error = future.exception()
+            if hedge_at is not None and time.monotonic() >= hedge_at:
+                hedge_at = None
+                if pending and deadline - time.monotonic() > 0.5:
+                    self.hedges += 1
+                    pending[self._executor.submit(hedge)] = "hedge"
+            if time.monotonic() >= deadline and pending:
+                self.timeouts += 1
+                raise LatencyBudgetExceeded(f"LLM call exceeded its {budget:.1f}s latency budget")
+        raise error  # every attempt failed
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "timeouts": self.timeouts,
+            "latency_p50": self.latency.quantile(0.5) or 0.0,
+            "latency_p95": self.latency.quantile(0.95) or 0.0,
+        }
+
+
+# Latency budget per priority class (seconds, including time queued for a rate-limit permit)
+LATENCY_BUDGETS = {
+    "interactive": settings.llm_budget_interactive,
+    "default": settings.llm_budget_default,
+    "background": settings.llm_budget_background,
+}
+
+breaker = CircuitBreaker(settings.llm_breaker_failures, settings.llm_breaker_cooldown)
+caller = ResilientCaller(
+    max_workers=max(8, settings.groq_max_concurrency * 4),
+    hedge_after=settings.llm_hedge_after,
+    hedging=settings.llm_hedging,
+)
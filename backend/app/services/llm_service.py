@@ -1,33 +1,80 @@
 
-from typing import List, Dict, Tuple
-import json, re
-from datetime import datetime
-from pathlib import Path
-
-from langchain_groq import ChatGroq
-from langchain_core.messages import SystemMessage, HumanMessage
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import json, re, threading
 
 from app.core.config import settings
+from app.core.logging import get_logger, log_event, log_llm_exchange, log_payload
+from app.core.tracing import current_span, traced
+from app.services import llm_gateway
+from app.services.json_stream import JSONArrayStream
+from app.services.prompt_builder import compact_json, fit_items, prune
+from app.services.widget_recommender import DatasetProfile, profile_from_hints, recommend
+
+
+# Groq-backed chat LLM, built on first use: importing langchain_groq costs
+# about half a second, which cold starts should not pay
+_llm = None
+_llm_lock = threading.Lock()
+
+
+def chat_model():
+    """The shared ChatGroq client"""
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                from langchain_groq import ChatGroq
+                _llm = ChatGroq(
+                    api_key=settings.groq_api_key,
+                    model=settings.groq_model,
+                    base_url=settings.groq_base_url,
+                    temperature=0.2,
+                    # the gateway bounds latency (budget, hedging, breaker); retries here would only add to it
+                    max_retries=0,
+                    timeout=settings.llm_request_timeout,
+                )
+    return _llm
+
+
+def _chat_messages(system: str, human: str) -> List:
+    """[SystemMessage, HumanMessage] for the chat model"""
+    from langchain_core.messages import SystemMessage, HumanMessage
+    return [SystemMessage(content=system), HumanMessage(content=human)]
+
+_log = get_logger(__name__)
+
+# langchain message types -> OpenAI chat roles (as recorded for replay)
+_ROLES = {"human": "user", "ai": "assistant"}
+
 
+def _token_usage(resp) -> int:
+    """Total tokens reported by Groq on a ChatGroq response"""
+    return resp.response_metadata["token_usage"]["total_tokens"]
 
-# Initialize Groq-backed chat LLM
-_llm = ChatGroq(
-    api_key=settings.groq_api_key,
-    model=settings.groq_model,
-    temperature=0.2,
-    max_retries=2,
-)
 
-# Log file in PROJECT ROOT
-ROOT_DIR = Path(__file__).parent.parent.parent.parent  # Go up to project root
-GROQ_LOG_FILE = ROOT_DIR / "GROQ_DEBUG.log"
+def _invoke_llm(msgs: List, temperature: float = 0.2, priority: str = "default"):
+    """Invoke the chat model through the gateway so identical concurrent prompts share one call"""
+    as_dicts = [{"role": m.type, "content": m.content} for m in msgs]
+    resp = llm_gateway.invoke(
+        settings.groq_model,
+        as_dicts,
+        {"temperature": temperature},
+        lambda: chat_model().invoke(msgs),
+        priority=priority,
+        usage=_token_usage,
+    )
+    log_llm_exchange(
+        _log, settings.groq_model,
+        [{"role": _ROLES.get(m["role"], m["role"]), "content": m["content"]} for m in as_dicts],
+        resp.content,
+        tokens=(getattr(resp, "response_metadata", None) or {}).get("token_usage", {}).get("total_tokens"),
+    )
+    return resp
 
 
 def log_to_file(message: str):
-    """Write message to Groq debug log file in project root"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(GROQ_LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(f"[{timestamp}] {message}\n")
+    """Log a line to the Groq debug log (buffered JSON records, see app.core.logging)"""
+    _log.info(message.strip())
 
 SYSTEM_PROMPT = """You propose concise, role-aware dashboard widgets.
 Input includes: domain, intent, columns, and sample stats.
@@ -38,13 +85,44 @@ Output must be a JSON list of widget proposals:
 Follow only what data supports. Do not invent fields."""
 
 
-def propose_widgets(domain: str, intent: str, columns: List[str], hints: Dict) -> Tuple[List[Dict], Dict, str]:
+RERANK_PROMPT = """You rank dashboard widget candidates for a user.
+Input includes: domain, intent, and candidates with an id.
+Output must be a JSON list of candidate ids, most useful first.
+Use only the given ids."""
+
+# Local candidates offered to the LLM when it re-ranks
+RERANK_CANDIDATES = 10
+
+
+@traced("propose_widgets")
+def propose_widgets(
+    domain: str,
+    intent: str,
+    columns: List[str],
+    hints: Dict,
+    profile: Optional[DatasetProfile] = None,
+    engine: Optional[str] = None,
+) -> Tuple[List[Dict], Dict, str]:
     """
     Returns: (widgets, groq_input, groq_response)
+    
+    The local recommender is the primary path (engine "local", default from
+    settings.widget_engine). "rerank" lets the LLM order the local candidates;
+    "llm" lets it propose freely with the local recommender as fallback.
     """
-    log_to_file("="*80)
+    profile = profile or profile_from_hints(columns, hints)
+    engine = engine or settings.widget_engine
+    if settings.groq_mode != "live":
+        engine = "local"
+    current_span().set_attributes(engine=engine, columns=len(columns))
+    if engine == "rerank":
+        return _rerank_widgets(domain, intent, recommend(profile, intent, limit=RERANK_CANDIDATES))
+    if engine != "llm":
+        widgets = recommend(profile, intent)
+        log_to_file(f"🧩 Local recommender proposed {len(widgets)} widgets: {[w['title'] for w in widgets]}")
+        return widgets, {"engine": "local", "hints": hints}, "Local recommender - no Groq call"
+    
     log_to_file("🧠 GROQ AI - propose_widgets called")
-    log_to_file("="*80)
     
     user = {
         "domain": domain,
@@ -58,38 +136,23 @@ def propose_widgets(domain: str, intent: str, columns: List[str], hints: Dict) -
         "user_data": user
     }
     
-    log_to_file("\n📤 INPUT DATA SENT TO GROQ:")
-    log_to_file(f"   Domain: {domain}")
-    log_to_file(f"   Intent: {intent}")
-    log_to_file(f"   Columns: {columns}")
-    log_to_file(f"   Hints: {json.dumps(hints, indent=2)}")
-    log_to_file(f"\n   Full User Data:\n{json.dumps(user, indent=2)}")
+    log_payload(_log, "📤 Input data sent to Groq", user, domain=domain, intent=intent)
     
     print(f"\n🧠 GROQ AI - propose_widgets called")
     print(f"📤 Sending to Groq:")
     print(f"   System prompt: {SYSTEM_PROMPT[:100]}...")
     print(f"   User data: {user}")
     
-    msgs = [
-        SystemMessage(content=SYSTEM_PROMPT),
-        HumanMessage(content=f"DATA:\n{user}")
-    ]
+    msgs = _chat_messages(SYSTEM_PROMPT, f"DATA:\n{compact_json(user)}")
     
     groq_response_text = ""
     
     try:
         print("⏳ Waiting for Groq response...")
-        log_to_file("\n⏳ Calling Groq API...")
-        
-        resp = _llm.invoke(msgs)
+        resp = _invoke_llm(msgs, priority="interactive")
         text = getattr(resp, "content", str(resp))
         groq_response_text = text
         
-        log_to_file("\n📥 GROQ RAW RESPONSE:")
-        log_to_file("-"*80)
-        log_to_file(text)
-        log_to_file("-"*80)
-        
         print(f"📥 Groq raw response:")
         print(f"   {text[:500]}...")
         
@@ -111,8 +174,7 @@ def propose_widgets(domain: str, intent: str, columns: List[str], hints: Dict) -
         try:
             out = json.loads(text)
             if isinstance(out, list):
-                log_to_file(f"\n✅ Successfully parsed {len(out)} widgets from Groq")
-                log_to_file(f"   Widgets: {json.dumps(out, indent=2)}")
+                log_payload(_log, f"✅ Successfully parsed {len(out)} widgets from Groq", out)
                 print(f"✅ Successfully parsed {len(out)} widgets from Groq")
                 return out, groq_input_data, groq_response_text
             else:
@@ -128,70 +190,53 @@ def propose_widgets(domain: str, intent: str, columns: List[str], hints: Dict) -
         log_to_file(f"\n❌ Groq API call failed: {e}")
         print(f"❌ Groq API call failed: {e}")
     
-    # fallback simple rules
-    log_to_file("\n⚠️ Using fallback widget generation")
-    print("⚠️ Using fallback widget generation")
-    base = []
-    if hints.get("has_date") and hints.get("measures"):
-        base.append({
-            "title": "Monthly Trend",
-            "chart": "line",
-            "x": hints.get("date_field", "date"),
-            "y": f"SUM({hints['measures'][0]})",
-            "group_by": None,
-            "explanation": "Trend over time"
-        })
-    if hints.get("categories") and hints.get("measures"):
-        base.append({
-            "title": "Top Categories",
-            "chart": "bar",
-            "x": hints["categories"][0],
-            "y": f"SUM({hints['measures'][0]})",
-            "group_by": None,
-            "explanation": "Top contributors"
-        })
-    
-    fallback_widgets = base[:3]
-    log_to_file(f"\n🔄 Returning {len(fallback_widgets)} fallback widgets:")
-    log_to_file(f"   {json.dumps(fallback_widgets, indent=2)}")
-    log_to_file("="*80 + "\n")
+    # fallback: local recommender
+    log_to_file("\n⚠️ Using local recommender fallback")
+    print("⚠️ Using local recommender fallback")
+    fallback_widgets = recommend(profile, intent)
+    log_payload(_log, f"🔄 Returning {len(fallback_widgets)} fallback widgets", fallback_widgets)
     
     print(f"🔄 Returning {len(fallback_widgets)} fallback widgets")
     return fallback_widgets, groq_input_data, groq_response_text or "Fallback mode - no Groq response"
 
 
-async def refine_widgets_with_groq(
-    instruction: str,
-    current_widgets: List[Dict],
-    context: Dict,
-) -> Tuple[List[Dict], str]:
-    """
-    Refine existing widgets based on user instruction using Groq LLM.
-    
-    Args:
-        instruction: User's natural language instruction
-        current_widgets: List of existing widget specifications
-        context: Constraint context (role, domain, intent, chart_type, time_range)
-        
-    Returns:
-        (refined_widgets, mode_used)
-    """
-    log_to_file("="*80)
-    log_to_file("🧠 GROQ AI - refine_widgets_with_groq called")
-    log_to_file(f"   Instruction: {instruction}")
-    log_to_file(f"   Context: {json.dumps(context)}")
-    log_to_file(f"   Current widgets: {len(current_widgets)}")
-    log_to_file("="*80)
+def _rerank_widgets(domain: str, intent: str, candidates: List[Dict]) -> Tuple[List[Dict], Dict, str]:
+    """Let the LLM order local candidates; keeps the local order for anything it leaves out or on failure"""
+    user = {
+        "domain": domain,
+        "intent": intent,
+        "candidates": [
+            prune({"id": i, "title": c["title"], "chart": c["chart"], "x": c["x"], "y": c["y"], "group_by": c["group_by"]})
+            for i, c in enumerate(candidates)
+        ],
+    }
+    groq_input_data = {"engine": "rerank", "system_prompt": RERANK_PROMPT, "user_data": user}
+    text = ""
+    order: List[int] = []
+    try:
+        resp = _invoke_llm(
+            _chat_messages(RERANK_PROMPT, f"DATA:\n{compact_json(user)}"),
+            priority="interactive",
+        )
+        text = getattr(resp, "content", str(resp))
+        match = re.search(r'\[[\s\S]*?\]', text)
+        ids = json.loads(match.group(0)) if match else []
+        order = [i for i in dict.fromkeys(ids) if isinstance(i, int) and 0 <= i < len(candidates)]
+    except Exception as e:
+        log_to_file(f"❌ Groq re-rank failed, keeping local order: {e}")
     
-    if not settings.groq_api_key or settings.groq_mode != "live":
-        log_to_file("⚠️ Groq API key not configured or mode is not 'live', using fallback")
-        return current_widgets, "fallback"
+    ranked = [candidates[i] for i in order] + [c for i, c in enumerate(candidates) if i not in order]
+    log_to_file(f"🧩 Re-ranked widget order: {order}")
+    return ranked[:6], groq_input_data, text or "Re-rank failed - local order"
+
+
+def _refinement_messages(instruction: str, current_widgets: List[Dict], context: Dict) -> List:
+    """Build the chat messages for a widget refinement request"""
+    # Widget data is re-bound client side; only the spec matters to the model
+    specs = [prune({k: v for k, v in w.items() if k != "data"}) for w in current_widgets]
+    widget_summary = fit_items(specs)
     
-    try:
-        # Build the refinement prompt
-        widget_summary = json.dumps(current_widgets, indent=2)[:1000]  # Limit context
-        
-        refinement_prompt = f"""You are a dashboard refinement AI. The user has given this instruction:
+    refinement_prompt = f"""You are a dashboard refinement AI. The user has given this instruction:
 
 "{instruction}"
 
@@ -221,16 +266,44 @@ Example format:
 
 Return ONLY valid JSON array, no other text."""
 
-        messages = [
-            SystemMessage(content="You are an expert dashboard designer who refines data visualizations."),
-            HumanMessage(content=refinement_prompt),
-        ]
+    return _chat_messages(
+        "You are an expert dashboard designer who refines data visualizations.",
+        refinement_prompt,
+    )
+
+
+def refine_widgets_with_groq(
+    instruction: str,
+    current_widgets: List[Dict],
+    context: Dict,
+) -> Tuple[List[Dict], str]:
+    """
+    Refine existing widgets based on user instruction using Groq LLM.
+    
+    Args:
+        instruction: User's natural language instruction
+        current_widgets: List of existing widget specifications
+        context: Constraint context (role, domain, intent, chart_type, time_range)
         
-        response = _llm.invoke(messages)
+    Returns:
+        (refined_widgets, mode_used)
+    """
+    log_event(
+        _log, "🧠 GROQ AI - refine_widgets_with_groq called",
+        instruction=instruction, context=context, current_widgets=len(current_widgets),
+    )
+    
+    if not settings.groq_api_key or settings.groq_mode != "live":
+        log_to_file("⚠️ Groq API key not configured or mode is not 'live', using fallback")
+        return current_widgets, "fallback"
+    
+    try:
+        messages = _refinement_messages(instruction, current_widgets, context)
+        
+        response = _invoke_llm(messages, priority="interactive")
         groq_response = response.content
         
-        log_to_file(f"\n✅ Groq response received ({len(groq_response)} chars)")
-        log_to_file(f"   {groq_response[:500]}...")
+        log_to_file(f"✅ Groq response received ({len(groq_response)} chars)")
         
         # Parse JSON response
         try:
@@ -257,9 +330,42 @@ Return ONLY valid JSON array, no other text."""
             return current_widgets, "fallback"
     
     except Exception as e:
-        log_to_file(f"\n❌ Groq refinement error: {e}")
+        log_to_file(f"❌ Groq refinement error: {e}")
         return current_widgets, "fallback"
-    finally:
-        log_to_file("="*80 + "\n")
 
 
+def stream_refined_widgets(
+    instruction: str,
+    current_widgets: List[Dict],
+    context: Dict,
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Streaming variant of refine_widgets_with_groq.
+
+    Yields (event, data) pairs: ("token", text) for every streamed chunk and
+    ("widget", dict) as soon as each element of the JSON array is complete.
+    Raises if the model cannot be reached so the caller can fall back.
+    """
+    log_event(
+        _log, "🧠 GROQ AI - stream_refined_widgets called",
+        instruction=instruction, current_widgets=len(current_widgets),
+    )
+    
+    messages = _refinement_messages(instruction, current_widgets, context)
+    as_dicts = [{"role": m.type, "content": m.content} for m in messages]
+    
+    def _open() -> Iterator[str]:
+        for chunk in chat_model().stream(messages):
+            if chunk.content:
+                yield chunk.content
+    
+    parser = JSONArrayStream()
+    emitted = 0
+    for text in llm_gateway.stream(as_dicts, {"temperature": 0.2}, _open, priority="interactive"):
+        yield "token", text
+        for widget in parser.feed(text):
+            if isinstance(widget, dict):
+                emitted += 1
+                yield "widget", widget
+    
+    log_to_file(f"✅ Streamed {emitted} refined widgets ({parser.skipped} unparseable)")
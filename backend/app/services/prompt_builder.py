@@ -0,0 +1,164 @@
+"""
+Prompt building with token budgets
+Serializes data for LLM prompts compactly and shrinks it to fit a token budget:
+1. compact JSON (no indentation, empty values dropped)
+2. columnar encoding for lists of rows (keys written once)
+3. statistical summary of numeric series plus the most recent rows when the
+   full data does not fit
+4. for very wide data, a reduced summary: brief stats, then column names,
+   then fewer columns
+"""
+import json
+import math
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.token_counter import count_tokens, truncate_to_tokens
+
+# Per-column stats kept when the full summary does not fit the budget
+BRIEF_STATS = ("min", "max", "mean", "distinct")
+
+
+def compact_json(obj: Any) -> str:
+    """JSON without whitespace"""
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def prune(obj: Any) -> Any:
+    """Drop None and empty containers recursively"""
+    if isinstance(obj, dict):
+        out = {k: prune(v) for k, v in obj.items()}
+        return {k: v for k, v in out.items() if v is not None and v != {} and v != [] and v != ""}
+    if isinstance(obj, list):
+        return [prune(v) for v in obj]
+    return obj
+
+
+def columnar(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Encode a list of row dicts as {"cols": [...], "rows": [[...], ...]}"""
+    cols: List[str] = []
+    seen = set()
+    for row in rows:
+        for k in row:
+            if k not in seen:
+                seen.add(k)
+                cols.append(k)
+    return {"cols": cols, "rows": [[row.get(c) for c in cols] for row in rows]}
+
+
+def _is_number(v: Any) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool) and math.isfinite(v)
+
+
+def summarize_rows(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per-column statistics: numeric series get shape/trend stats, others distinct counts"""
+    table = columnar(rows)
+    summary: Dict[str, Any] = {"n": len(rows)}
+    for i, col in enumerate(table["cols"]):
+        values = [r[i] for r in table["rows"] if r[i] is not None]
+        nums = [v for v in values if _is_number(v)]
+        if nums and len(nums) == len(values):
+            n = len(nums)
+            mean = sum(nums) / n
+            std = math.sqrt(sum((v - mean) ** 2 for v in nums) / n)
+            # least-squares slope per step
+            x_mean = (n - 1) / 2
+            denom = sum((x - x_mean) ** 2 for x in range(n)) or 1.0
+            slope = sum((x - x_mean) * (v - mean) for x, v in enumerate(nums)) / denom
+            summary[col] = {
+                "min": _round(min(nums)),
+                "max": _round(max(nums)),
+                "mean": _round(mean),
+                "std": _round(std),
+                "first": _round(nums[0]),
+                "last": _round(nums[-1]),
+                "slope": _round(slope),
+            }
+        else:
+            distinct = list(dict.fromkeys(str(v) for v in values))
+            summary[col] = {"distinct": len(distinct), "first": distinct[:1], "last": distinct[-1:]}
+    return summary
+
+
+def _round(v: float, digits: int = 6) -> float:
+    """Round to significant digits; keeps summaries short without distorting magnitudes"""
+    return round(v, digits - int(math.floor(math.log10(abs(v)))) - 1) if v else 0.0
+
+
+def _shrink_summary(summary: Dict[str, Any], budget: int) -> str:
+    """Largest reduced summary within budget (the column count alone if nothing else fits)"""
+    n, cols = summary["n"], [c for c in summary if c != "n"]
+    brief = {"n": n, **{c: {k: v for k, v in summary[c].items() if k in BRIEF_STATS} for c in cols}}
+    for candidate in (brief, {"n": n, "cols": cols}):
+        text = compact_json({"summary": candidate})
+        if count_tokens(text) <= budget:
+            return text
+
+    # Binary search for the most leading column names that still fit
+    lo, hi = 0, len(cols) - 1
+    best = compact_json({"summary": {"n": n, "cols": [], "omitted_cols": len(cols)}})
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        candidate = compact_json({"summary": {"n": n, "cols": cols[:mid], "omitted_cols": len(cols) - mid}})
+        if count_tokens(candidate) <= budget:
+            best, lo = candidate, mid
+        else:
+            hi = mid - 1
+    return best
+
+
+def fit_rows(rows: List[Dict[str, Any]], budget: Optional[int] = None) -> str:
+    """
+    Serialize rows for a prompt within a token budget
+
+    Sends everything in columnar form when it fits, otherwise a statistical
+    summary plus as many of the most recent rows as the budget allows. The
+    result is always valid JSON.
+    """
+    budget = budget or settings.llm_input_token_budget
+    if not rows:
+        return "[]"
+
+    full = compact_json(columnar(rows))
+    if count_tokens(full) <= budget:
+        return full
+
+    summary = summarize_rows(rows)
+    summary_text = compact_json({"summary": summary})
+    if count_tokens(summary_text) > budget:
+        return _shrink_summary(summary, budget)
+
+    # Binary search for the largest tail that still fits
+    lo, hi = 0, len(rows)
+    best = summary_text
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        candidate = compact_json({"summary": summary, "recent": columnar(rows[-mid:])})
+        if count_tokens(candidate) <= budget:
+            best, lo = candidate, mid
+        else:
+            hi = mid - 1
+    return best
+
+
+def fit_items(items: List[Any], budget: Optional[int] = None) -> str:
+    """Serialize whole list items until the budget is reached, noting how many were left out"""
+    budget = budget or settings.llm_input_token_budget
+    kept: List[Any] = []
+    used = 2
+    for item in items:
+        cost = count_tokens(compact_json(item)) + 1
+        if used + cost > budget:
+            break
+        kept.append(item)
+        used += cost
+    text = compact_json(kept)
+    omitted = len(items) - len(kept)
+    if omitted:
+        text += f"\n({omitted} more omitted)"
+    return text
+
+
+def fit_text(text: str, budget: Optional[int] = None) -> str:
+    """Truncate free text to the budget on a token boundary"""
+    return truncate_to_tokens(text, budget or settings.llm_input_token_budget)
@@ -0,0 +1,222 @@
+"""
+Client-side rate limiting for Groq calls
+Keeps us inside the provider's requests-per-minute and tokens-per-minute
+limits instead of discovering them through 429 responses.
+
+Waiting callers are served by priority class first (interactive refine/chat
+before background recommendations) and then fairly across tenants, so one
+busy business cannot starve the others.
+"""
+import contextvars
+import itertools
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+PRIORITIES = {
+    "interactive": 0,
+    "default": 1,
+    "background": 2,
+}
+
+# Tenant used for fairness; set per request by the HTTP middleware
+current_tenant: contextvars.ContextVar[str] = contextvars.ContextVar("llm_tenant", default="anonymous")
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call cannot be admitted (queue full or wait timed out)"""
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at capacity per minute"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount can be consumed (0 when available now)"""
+        self._refill(now)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self.level -= amount
+
+    def refund(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+
+@dataclass
+class Permit:
+    """Admission ticket returned by LLMGovernor.acquire"""
+    tokens: int
+    tenant: str
+    priority: str
+    waited: float = 0.0
+
+
+@dataclass(order=True)
+class _Waiter:
+    sort_key: tuple
+    tokens: int = field(compare=False)
+    tenant: str = field(compare=False)
+    priority: str = field(compare=False)
+
+
+class LLMGovernor:
+    """
+    Token-bucket governor for request and token budgets plus a concurrency cap
+
+    Usage:
+        permit = governor.acquire(tokens=900, priority="interactive")
+        try:
+            ... call Groq ...
+        finally:
+            governor.release(permit, used_tokens=actual)
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_concurrency: int,
+        queue_size: int,
+        queue_timeout: float,
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+
+        self._cond = threading.Condition()
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._active = 0
+        self._blocked_until = 0.0
+        # Start-time fair queueing: each tenant's virtual clock advances by the
+        # cost of the requests it has queued, the global clock by what was served.
+        self._virtual_time = 0.0
+        self._tenant_tags: Dict[str, float] = {}
+
+        self.admitted = 0
+        self.rejected = 0
+
+    def _cost(self, tokens: int) -> float:
+        return 1.0 + tokens / max(self.tokens.capacity, 1.0)
+
+    def _wait_needed(self, tokens: int, now: float) -> float:
+        """Seconds until the head of the queue could run, 0 if it can run now"""
+        if self._active >= self.max_concurrency:
+            return self.queue_timeout
+        blocked = max(0.0, self._blocked_until - now)
+        return max(
+            blocked,
+            self.requests.wait_time(1, now),
+            self.tokens.wait_time(tokens, now),
+        )
+
+    def acquire(
+        self,
+        tokens: int,
+        priority: str = "default",
+        tenant: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> Permit:
+        tenant = tenant or current_tenant.get()
+        tokens = int(min(max(tokens, 1), self.tokens.capacity))
+        timeout = self.queue_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        with self._cond:
+            if len(self._waiters) >= self.queue_size:
+                self.rejected += 1
+                raise RateLimitExceeded(f"LLM wait queue is full ({self.queue_size} waiting)")
+
+            tag = max(self._virtual_time, self._tenant_tags.get(tenant, 0.0))
+            self._tenant_tags[tenant] = tag + self._cost(tokens)
+            waiter = _Waiter(
+                sort_key=(PRIORITIES.get(priority, PRIORITIES["default"]), tag, next(self._seq)),
+                tokens=tokens,
+                tenant=tenant,
+                priority=priority,
+            )
+            self._waiters.append(waiter)
+            self._waiters.sort()
+
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._waiters[0] is waiter:
+                        wait = self._wait_needed(tokens, now)
+                        if wait <= 0:
+                            break
+                    else:
+                        wait = self.queue_timeout
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self.rejected += 1
+                        raise RateLimitExceeded(f"Timed out after {timeout:.1f}s waiting for LLM capacity")
+                    self._cond.wait(min(wait, remaining))
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                self._cond.notify_all()
+
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+            self._active += 1
+            self._virtual_time = max(self._virtual_time, waiter.sort_key[1])
+            self.admitted += 1
+
+        return Permit(tokens=tokens, tenant=tenant, priority=priority, waited=time.monotonic() - started)
+
+    def release(self, permit: Permit, used_tokens: Optional[int] = None) -> None:
+        """Return the concurrency slot and settle the token estimate against actual usage"""
+        with self._cond:
+            self._active -= 1
+            if used_tokens is not None:
+                delta = permit.tokens - used_tokens
+                if delta > 0:
+                    self.tokens.refund(delta)
+                else:
+                    self.tokens.consume(-delta)
+            self._cond.notify_all()
+
+    def penalize(self, seconds: float) -> None:
+        """Pause all admissions, e.g. after the provider answered 429 with Retry-After"""
+        with self._cond:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            return {
+                "active": self._active,
+                "queued": len(self._waiters),
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "request_budget": round(self.requests.level, 2),
+                "token_budget": round(self.tokens.level, 2),
+            }
+
+
+# Global instance
+governor = LLMGovernor(
+    requests_per_minute=settings.groq_rpm,
+    tokens_per_minute=settings.groq_tpm,
+    max_concurrency=settings.groq_max_concurrency,
+    queue_size=settings.groq_queue_size,
+    queue_timeout=settings.groq_queue_timeout,
+)
@@ -0,0 +1,224 @@
+"""
+Mergeable widget rollups
+A widget with an aggregate y (SUM/AVG/COUNT/MIN/MAX of a column, grouped by
+x and group_by) is backed by per-group partial aggregates: row count,
+non-null count, sum, min and max. Partials of two row sets merge exactly,
+so when a dataset grows only the appended rows are aggregated and folded in
+instead of rescanning the whole file.
+
+Rollups live in memory (LRU bounded) and remember the file size/mtime they
+reflect; a file changed behind their back is simply re-aggregated.
+"""
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from app.core.metrics import cache_hits, cache_misses
+from app.core.resources import resources
+from app.services.datasets import AGGREGATE, dataset_path, quote_ident, sql_string
+
+MAX_ROLLUPS = 256
+
+GroupKey = Tuple[Any, ...]
+# rows, non-null values, sum, min, max
+Partial = List[Any]
+
+
+def _plain(value: Any) -> Any:
+    """JSON-safe, hashable group key / value (NaN -> None, timestamps -> ISO)"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if value is pd.NaT:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        return _plain(value.item())
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def _sort_key(key: GroupKey):
+    return tuple((v is None, v if v is not None else 0) for v in key)
+
+
+class WidgetQuery:
+    """x / aggregate y / group_by of one widget config"""
+
+    __slots__ = ("x", "y", "group_by", "func", "measure")
+
+    def __init__(self, x: Optional[str], y: str, group_by: Optional[str] = None):
+        match = AGGREGATE.match((y or "").strip())
+        if not match:
+            raise ValueError(f"Not an aggregate: {y}")
+        self.x = x or None
+        self.y = y.strip()
+        self.group_by = group_by or None
+        self.func = match.group(1).upper()
+        arg = match.group(2).strip()
+        self.measure = None if arg == "*" else arg
+
+    @classmethod
+    def from_widget(cls, widget: Dict[str, Any]) -> Optional["WidgetQuery"]:
+        """The rollup query of a saved widget, or None when it has no aggregate y"""
+        config = widget.get("config") or {}
+        y = config.get("y_column")
+        if not y or not AGGREGATE.match(str(y).strip()):
+            return None
+        return cls(config.get("x_column"), str(y), config.get("group_by"))
+
+    @property
+    def key(self) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        # AVG/SUM/MIN/MAX/COUNT of one measure share a rollup
+        return (self.x, self.group_by, self.measure)
+
+    @property
+    def dims(self) -> List[str]:
+        return [c for c in (self.x, self.group_by) if c]
+
+
+class Rollup:
+    def __init__(self, dims: List[str], measure: Optional[str]):
+        self.dims = dims
+        self.measure = measure
+        self.groups: Dict[GroupKey, Partial] = {}
+        self.stamp: Optional[Tuple[int, int]] = None
+
+    def aggregate(self, csv_path: str) -> Dict[GroupKey, Partial]:
+        """Partials of one CSV file (the whole dataset or an appended delta)"""
+        dims = [quote_ident(d) for d in self.dims]
+        m = quote_ident(self.measure) if self.measure else None
+        values = (
+            f"COUNT(*), COUNT({m}), SUM({m}), MIN({m}), MAX({m})" if m
+            else "COUNT(*), COUNT(*), NULL, NULL, NULL"
+        )
+        select = ", ".join(dims + [values])
+        group = f" GROUP BY {', '.join(str(i + 1) for i in range(len(dims)))}" if dims else ""
+        with resources.duckdb() as con:
+            rows = con.execute(f"SELECT {select} FROM read_csv_auto({sql_string(csv_path)}){group}").fetchall()
+        n = len(dims)
+        return {tuple(_plain(v) for v in row[:n]): [_plain(v) for v in row[n:]] for row in rows}
+
+    def merge(self, partials: Dict[GroupKey, Partial]) -> Set[GroupKey]:
+        """Fold partials in; returns the group keys that changed"""
+        for key, (rows, count, total, lo, hi) in partials.items():
+            current = self.groups.get(key)
+            if current is None:
+                self.groups[key] = [rows, count, total, lo, hi]
+                continue
+            current[0] += rows
+            current[1] += count
+            if total is not None:
+                current[2] = total if current[2] is None else current[2] + total
+            if lo is not None:
+                current[3] = lo if current[3] is None else min(current[3], lo)
+            if hi is not None:
+                current[4] = hi if current[4] is None else max(current[4], hi)
+        return set(partials)
+
+    def value(self, func: str, partial: Partial) -> Any:
+        rows, count, total, lo, hi = partial
+        if func == "COUNT":
+            return count if self.measure else rows
+        if func == "SUM":
+            return total
+        if func == "AVG":
+            return total / count if count and total is not None else None
+        return lo if func == "MIN" else hi
+
+    def rows(self, query: WidgetQuery, keys: Optional[Iterable[GroupKey]] = None, limit: int = 500) -> List[Dict[str, Any]]:
+        """Widget rows ordered by group key, like ORDER BY 1 in SQL"""
+        selected = sorted(self.groups if keys is None else (k for k in keys if k in self.groups), key=_sort_key)
+        out = []
+        for key in selected[:limit]:
+            row = dict(zip(query.dims, key))
+            row[query.y] = self.value(query.func, self.groups[key])
+            out.append(row)
+        return out
+
+
+def _stamp(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return (st.st_size, st.st_mtime_ns)
+
+
+class RollupStore:
+    """Rollups per (dataset, x, group_by, measure); builds and appends are serialized per dataset"""
+
+    def __init__(self, max_rollups: int = MAX_ROLLUPS):
+        self.max_rollups = max_rollups
+        self._rollups: "OrderedDict[Tuple, Rollup]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dataset_locks: Dict[str, threading.RLock] = {}
+
+    def _dataset_lock(self, dataset_id: str) -> threading.RLock:
+        with self._lock:
+            return self._dataset_locks.setdefault(dataset_id, threading.RLock())
+
+    def get(self, dataset_id: str, query: WidgetQuery) -> Rollup:
+        """Rollup reflecting the dataset file as it is now"""
+        path = dataset_path(dataset_id)
+        key = (dataset_id,) + query.key
+        with self._dataset_lock(dataset_id):
+            stamp = _stamp(path)
+            with self._lock:
+                rollup = self._rollups.get(key)
+                if rollup is not None and rollup.stamp == stamp:
+                    self._rollups.move_to_end(key)
+                    cache_hits.inc(cache="rollup")
+                    return rollup
+            cache_misses.inc(cache="rollup")
+            rollup = Rollup(query.dims, query.measure)
+            rollup.merge(rollup.aggregate(path))
+            rollup.stamp = stamp
+            with self._lock:
+                self._rollups[key] = rollup
+                while len(self._rollups) > self.max_rollups:
+                    self._rollups.popitem(last=False)
+            return rollup
+
+    def append(self, dataset_id: str, delta_path: str, write: Callable[[], None]) -> Dict[Tuple, Set[GroupKey]]:
+        """
+        Run write() (which appends the delta's rows to the dataset file) and
+        merge the delta into the dataset's cached rollups
+
+        Both happen under the dataset's lock so no rollup is built from a half
+        written file. Rollups that did not reflect the file as it was before
+        the append are dropped and rebuilt on next use. Returns the changed
+        group keys per rollup key.
+        """
+        path = dataset_path(dataset_id)
+        changed: Dict[Tuple, Set[GroupKey]] = {}
+        with self._dataset_lock(dataset_id):
+            old_stamp = _stamp(path)
+            write()
+            new_stamp = _stamp(path)
+            with self._lock:
+                cached = [(k, r) for k, r in self._rollups.items() if k[0] == dataset_id]
+            for key, rollup in cached:
+                if rollup.stamp != old_stamp:
+                    with self._lock:
+                        self._rollups.pop(key, None)
+                    continue
+                changed[key] = rollup.merge(rollup.aggregate(delta_path))
+                rollup.stamp = new_stamp
+        return changed
+
+    def widget_rows(
+        self,
+        dataset_id: str,
+        query: WidgetQuery,
+        keys: Optional[Iterable[GroupKey]] = None,
+        limit: int = 500,
+    ) -> List[Dict[str, Any]]:
+        with self._dataset_lock(dataset_id):
+            return self.get(dataset_id, query).rows(query, keys, limit)
+
+
+# Global instance
+rollups = RollupStore()
@@ -4,9 +4,10 @@ Uses Supabase Storage API for free-tier object storage
 """
 import os
 from typing import BinaryIO
-import httpx
 from pathlib import Path
 
+from app.core.resources import resources
+
 class SupabaseStorage:
     """Simple Supabase Storage client using REST API"""
     
@@ -43,16 +44,15 @@ class SupabaseStorage:
             "Content-Type": content_type,
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                upload_url,
-                content=file_bytes,
-                headers=headers,
-                timeout=30.0
-            )
-            
-            if response.status_code not in (200, 201):
-                raise Exception(f"Upload failed: {response.status_code} - {response.text}")
+        response = await resources.http().post(
+            upload_url,
+            content=file_bytes,
+            headers=headers,
+            timeout=30.0
+        )
+        
+        if response.status_code not in (200, 201):
+            raise Exception(f"Upload failed: {response.status_code} - {response.text}")
         
         return key
     
@@ -87,14 +87,13 @@ class SupabaseStorage:
         """
         delete_url = f"{self.storage_url}/object/{self.bucket}/{key}"
         
-        async with httpx.AsyncClient() as client:
-            response = await client.delete(
-                delete_url,
-                headers=self.headers,
-                timeout=10.0
-            )
-            
-            return response.status_code in (200, 204)
+        response = await resources.http().delete(
+            delete_url,
+            headers=self.headers,
+            timeout=10.0
+        )
+        
+        return response.status_code in (200, 204)
 
 
 # Singleton instance
@@ -0,0 +1,63 @@
+"""
+Token counting helpers backed by tiktoken
+Groq does not publish a tokenizer, so cl100k_base is used as a close estimate.
+If the encoding cannot be loaded (e.g. offline without a cached BPE file),
+a characters-per-token heuristic is used instead.
+"""
+import threading
+from typing import Any, Dict, List, Optional
+
+ENCODING_NAME = "cl100k_base"
+CHARS_PER_TOKEN = 4
+# Per-message overhead of the chat format (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_encoding = None
+_encoding_failed = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    global _encoding, _encoding_failed
+    if _encoding is not None or _encoding_failed:
+        return _encoding
+    with _encoding_lock:
+        if _encoding is None and not _encoding_failed:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding(ENCODING_NAME)
+            except Exception as e:
+                print(f"⚠️ tiktoken unavailable, using heuristic token counts: {e}")
+                _encoding_failed = True
+    return _encoding
+
+
+def count_tokens(text: Optional[str]) -> int:
+    """Number of tokens in a piece of text"""
+    if not text:
+        return 0
+    enc = _get_encoding()
+    if enc is None:
+        return max(1, len(text) // CHARS_PER_TOKEN)
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages: List[Dict[str, Any]]) -> int:
+    """Number of prompt tokens for a list of role/content chat messages"""
+    total = 0
+    for m in messages:
+        total += MESSAGE_OVERHEAD_TOKENS + count_tokens(str(m.get("content", "")))
+    return total
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens tokens, on a token boundary"""
+    if not text or max_tokens <= 0:
+        return ""
+    enc = _get_encoding()
+    if enc is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    ids = enc.encode(text, disallowed_special=())
+    if len(ids) <= max_tokens:
+        return text
+    return enc.decode(ids[:max_tokens])
@@ -0,0 +1,271 @@
+"""
+Local widget recommender
+Profiles the columns of a dataset sample (role, cardinality, temporal coverage,
+measure variance, correlation between measures), scores every candidate chart
+and picks a diverse, ranked set. Deterministic and fast enough (a few ms for
+a 200-row sample) to run on the upload path instead of an LLM round trip.
+
+Proposals use the same shape as the LLM's:
+{title, chart, x, y, group_by, explanation} plus a score.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.metrics import stage
+from app.core.tracing import traced
+
+# Column names treated as periods even when numeric
+PERIOD_NAMES = {"year", "month", "quarter", "week", "period", "fiscal_year"}
+# Measures that should be averaged, not summed
+AVERAGE_HINTS = re.compile(r"(rate|ratio|pct|percent|price|margin|avg|average|score|age)", re.I)
+# Measures that usually matter most to a business user
+PRIMARY_HINTS = re.compile(r"(revenue|sales|amount|profit|total|income|cost|expense|spend)", re.I)
+
+CATEGORY_MAX = 50
+REDUNDANT_CORRELATION = 0.95
+
+
+@dataclass
+class ColumnProfile:
+    """What the recommender knows about one column"""
+    name: str
+    role: str  # temporal | measure | category | identifier | text
+    distinct: int = 0
+    null_ratio: float = 0.0
+    periods: int = 0  # temporal: distinct months covered
+    cv: float = 0.0  # measure: coefficient of variation
+    top_share: float = 0.0  # category: share of the most common value
+
+
+@dataclass
+class DatasetProfile:
+    rows: int
+    columns: Dict[str, ColumnProfile]
+    # measures that nearly duplicate (|r| >= REDUNDANT_CORRELATION) a more variable one
+    redundant: List[str] = field(default_factory=list)
+
+    def by_role(self, role: str) -> List[ColumnProfile]:
+        return [c for c in self.columns.values() if c.role == role]
+
+
+def _is_identifier(name: str, s: pd.Series, distinct: int, non_null: int) -> bool:
+    """Named like a key, or a row counter (integers counting up by one)"""
+    lowered = name.lower()
+    if lowered in ("id", "uuid") or lowered.endswith(("_id", " id", "uuid")):
+        return True
+    if not pd.api.types.is_integer_dtype(s) or non_null <= 20 or distinct != non_null:
+        return False
+    return bool((np.diff(s.dropna().to_numpy()) == 1).all())
+
+
+def _as_dates(series: pd.Series) -> Optional[pd.Series]:
+    """Series parsed as datetimes when (nearly) all values parse, else None"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+        return None
+    sample = series.dropna().astype(str).head(50)
+    if sample.empty or not sample.str.contains(r"\d", regex=True).all():
+        return None
+    parsed = pd.to_datetime(sample, errors="coerce", format="mixed")
+    if parsed.notna().mean() < 0.9:
+        return None
+    return pd.to_datetime(series, errors="coerce", format="mixed")
+
+
+@traced("profile_frame")
+@stage("profile")
+def profile_frame(df: pd.DataFrame) -> DatasetProfile:
+    """Profile every column of a sample DataFrame"""
+    n = len(df)
+    columns: Dict[str, ColumnProfile] = {}
+    for name in df.columns:
+        s = df[name]
+        non_null = int(s.notna().sum())
+        distinct = int(s.nunique(dropna=True))
+        col = ColumnProfile(name=str(name), role="text", distinct=distinct, null_ratio=1 - non_null / n if n else 1.0)
+        columns[col.name] = col
+        if non_null == 0:
+            continue
+
+        numeric = pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s)
+        dates = None if numeric else _as_dates(s)
+        if dates is not None:
+            col.role = "temporal"
+            col.periods = int(dates.dropna().dt.to_period("M").nunique())
+        elif numeric and str(name).lower() in PERIOD_NAMES:
+            col.role = "temporal"
+            col.periods = distinct
+        elif _is_identifier(col.name, s, distinct, non_null):
+            col.role = "identifier"
+        elif numeric:
+            col.role = "measure"
+            values = s.to_numpy(dtype=float)
+            mean = np.nanmean(values)
+            std = np.nanstd(values)
+            col.cv = float(std / abs(mean)) if mean else float(std > 0)
+        elif distinct <= CATEGORY_MAX or distinct <= 0.5 * non_null:
+            col.role = "category"
+            col.top_share = float(s.value_counts(normalize=True).iloc[0])
+
+    profile = DatasetProfile(rows=n, columns=columns)
+    # strongest (most variable) measures first, so each near-duplicate loses to an earlier one
+    measures = sorted(profile.by_role("measure"), key=lambda c: -c.cv)
+    if len(measures) > 1:
+        values = df[[c.name for c in measures]].to_numpy(dtype=float)
+        values = np.where(np.isnan(values), np.nanmean(values, axis=0), values)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = np.nan_to_num(np.abs(np.corrcoef(values, rowvar=False)))
+        for j in range(1, len(measures)):
+            if (corr[j, :j] >= REDUNDANT_CORRELATION).any():
+                profile.redundant.append(measures[j].name)
+    return profile
+
+
+def profile_from_hints(columns: List[str], hints: Dict[str, Any]) -> DatasetProfile:
+    """Neutral profile from column names and upload hints when no data sample is at hand"""
+    profile: Dict[str, ColumnProfile] = {}
+    date_field = hints.get("date_field")
+    if date_field:
+        profile[date_field] = ColumnProfile(date_field, "temporal", periods=12)
+    for m in hints.get("measures") or []:
+        profile.setdefault(m, ColumnProfile(m, "measure", cv=0.5))
+    for c in hints.get("categories") or []:
+        profile.setdefault(c, ColumnProfile(c, "category", distinct=10, top_share=0.2))
+    for c in columns:
+        profile.setdefault(c, ColumnProfile(c, "text"))
+    return DatasetProfile(rows=0, columns=profile)
+
+
+def _label(name: str) -> str:
+    return name.replace("_", " ").strip().title()
+
+
+def _agg(measure: str) -> str:
+    return f"AVG({measure})" if AVERAGE_HINTS.search(measure) else f"SUM({measure})"
+
+
+def _candidates(profile: DatasetProfile, intent: str) -> List[Dict[str, Any]]:
+    """Every chart the profile supports, scored 0..1 (before diversity)"""
+    temporal = sorted(profile.by_role("temporal"), key=lambda c: -c.periods)
+    measures = profile.by_role("measure")
+    categories = [c for c in profile.by_role("category") if c.distinct >= 2]
+    words = set(re.findall(r"[a-z0-9]+", intent.lower()))
+
+    def weight(m: ColumnProfile) -> float:
+        w = 0.6 + 0.25 * min(m.cv, 1.0) + (0.15 if PRIMARY_HINTS.search(m.name) else 0.0)
+        # a measure that nearly duplicates a stronger one adds little
+        return w * 0.6 if m.name in profile.redundant else w
+
+    def mentioned(*names: str) -> float:
+        return 0.15 if any(set(re.findall(r"[a-z0-9]+", n.lower())) & words for n in names) else 0.0
+
+    def intent_boost(*keys: str) -> float:
+        return 0.1 if words & set(keys) else 0.0
+
+    trend_words = ("trend", "trends", "time", "growth", "forecast", "monthly", "over")
+    compare_words = ("compare", "top", "by", "ranking", "best", "worst", "performance")
+    share_words = ("share", "mix", "breakdown", "composition", "split", "distribution")
+
+    out: List[Dict[str, Any]] = []
+    for m in measures:
+        w = weight(m)
+        y = _agg(m.name)
+        for t in temporal[:1]:
+            coverage = min(t.periods / 12, 1.0)
+            if t.periods >= 3 or profile.rows == 0:
+                out.append({
+                    "title": f"{_label(m.name)} Over Time", "chart": "line", "x": t.name, "y": y, "group_by": None,
+                    "explanation": f"Trend of {m.name} across {t.periods or 'all'} periods",
+                    "score": (0.55 + 0.3 * coverage) * w + mentioned(m.name) + intent_boost(*trend_words),
+                })
+                for c in categories:
+                    if c.distinct <= 8:
+                        out.append({
+                            "title": f"{_label(m.name)} by {_label(c.name)} Over Time", "chart": "area", "x": t.name, "y": y,
+                            "group_by": c.name,
+                            "explanation": f"How each {c.name} contributes to {m.name} over time",
+                            "score": (0.4 + 0.25 * coverage) * w + mentioned(m.name, c.name) + intent_boost(*trend_words),
+                        })
+        for c in categories:
+            # bars read best with a handful to a few dozen bars; skewed categories are more telling
+            fit = 1.0 if 3 <= c.distinct <= 15 else 0.7 if c.distinct <= 30 else 0.4
+            out.append({
+                "title": f"{_label(m.name)} by {_label(c.name)}", "chart": "bar", "x": c.name, "y": y, "group_by": None,
+                "explanation": f"Compare {m.name} across {c.name} values",
+                "score": (0.45 + 0.25 * fit + 0.1 * c.top_share) * w + mentioned(m.name, c.name) + intent_boost(*compare_words),
+            })
+            if 2 <= c.distinct <= 6:
+                out.append({
+                    "title": f"{_label(m.name)} Share by {_label(c.name)}", "chart": "pie", "x": c.name, "y": y, "group_by": None,
+                    "explanation": f"Share of {m.name} held by each {c.name}",
+                    "score": 0.45 * w + mentioned(m.name, c.name) + intent_boost(*share_words),
+                })
+            elif c.distinct > 15:
+                out.append({
+                    "title": f"{_label(m.name)} Breakdown by {_label(c.name)}", "chart": "treemap", "x": c.name, "y": y,
+                    "group_by": None,
+                    "explanation": f"{m.name} across many {c.name} values at a glance",
+                    "score": 0.4 * w + mentioned(m.name, c.name) + intent_boost(*share_words),
+                })
+        out.append({
+            "title": f"{'Average' if y.startswith('AVG') else 'Total'} {_label(m.name)}", "chart": "kpi", "x": None, "y": y,
+            "group_by": None,
+            "explanation": f"Headline {'average' if y.startswith('AVG') else 'total'} of {m.name}",
+            "score": 0.35 * w + mentioned(m.name),
+        })
+
+    if not measures:
+        for c in categories:
+            out.append({
+                "title": f"Records by {_label(c.name)}", "chart": "bar", "x": c.name, "y": "COUNT(*)", "group_by": None,
+                "explanation": f"Number of rows per {c.name}",
+                "score": 0.4 + 0.1 * c.top_share + mentioned(c.name),
+            })
+        for t in temporal[:1]:
+            out.append({
+                "title": "Records Over Time", "chart": "line", "x": t.name, "y": "COUNT(*)", "group_by": None,
+                "explanation": "Number of rows per period",
+                "score": 0.45 + mentioned(t.name),
+            })
+    out.append({
+        "title": "Data Table", "chart": "table", "x": None, "y": None, "group_by": None,
+        "explanation": "Raw rows for detail", "score": 0.1,
+    })
+    return out
+
+
+def recommend(profile: DatasetProfile, intent: str = "", limit: int = 6) -> List[Dict[str, Any]]:
+    """
+    Ranked, diverse widget proposals for a profile
+
+    Greedy selection: after each pick, candidates repeating its chart type,
+    axis or measure are discounted so the set covers different views.
+    """
+    pool = _candidates(profile, intent or "")
+    chosen: List[Dict[str, Any]] = []
+    while pool and len(chosen) < limit:
+        def adjusted(c: Dict[str, Any]) -> float:
+            s = c["score"]
+            for p in chosen:
+                if p["chart"] == c["chart"]:
+                    s *= 0.8
+                if c["x"] and p["x"] == c["x"]:
+                    s *= 0.85
+                if c["y"] and p["y"] == c["y"]:
+                    s *= 0.85
+            return s
+
+        best = max(pool, key=adjusted)
+        pool.remove(best)
+        chosen.append({**best, "score": round(adjusted(best), 3)})
+    return chosen
+
+
+def recommend_frame(df: pd.DataFrame, intent: str = "", limit: int = 6) -> List[Dict[str, Any]]:
+    """Profile a sample and recommend widgets for it"""
+    return recommend(profile_frame(df), intent, limit)
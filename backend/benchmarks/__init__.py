@@ -0,0 +1,13 @@
+"""
+Benchmark suite for the backend
+
+- benchmarks.datasets: synthetic upload fixtures (CSV, XLSX, DOCX, PDF)
+- benchmarks.micro: per-stage timings of the upload pipeline
+- benchmarks.load: HTTP load driver for the API
+- benchmarks.startup: cold-start import time (-X importtime report, budget check)
+- benchmarks.stats: percentile summaries and baseline regression checks
+
+Run from backend/, e.g. `python -m benchmarks.micro --compare`.
+Baselines are machine-specific; save them on the machine that runs the
+comparison (benchmarks/baselines/ by default).
+"""
@@ -0,0 +1,146 @@
+"""
+Synthetic upload fixtures for benchmarks
+
+Every generator is deterministic for a given seed and writes one file:
+- narrow CSV: a few columns, many rows (typical sales export)
+- wide CSV: many numeric columns
+- long CSV: panel data, one row per (series, period)
+- XLSX with several sheets
+- DOCX and PDF whose content is mostly tables
+"""
+import os
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from docx import Document
+
+REGIONS = ["North", "South", "East", "West", "Central"]
+PRODUCTS = ["Widget", "Gadget", "Doohickey", "Gizmo", "Thingamajig", "Sprocket"]
+
+
+def sales_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Daily sales with a trend, weekly seasonality and noise"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2022-01-01", periods=rows, freq="h").normalize()
+    t = np.arange(rows) / 24.0
+    revenue = 1000 + 2.0 * t + 150 * np.sin(2 * np.pi * t / 7) + rng.normal(0, 60, rows)
+    units = np.maximum(1, (revenue / 25 + rng.normal(0, 4, rows))).astype(int)
+    return pd.DataFrame({
+        "date": dates.strftime("%Y-%m-%d"),
+        "region": rng.choice(REGIONS, rows),
+        "product": rng.choice(PRODUCTS, rows),
+        "revenue": revenue.round(2),
+        "cost": (revenue * rng.uniform(0.55, 0.75, rows)).round(2),
+        "units": units,
+    })
+
+
+def narrow_csv(path: str, rows: int = 20000, seed: int = 0) -> str:
+    sales_frame(rows, seed).to_csv(path, index=False)
+    return path
+
+
+def wide_csv(path: str, rows: int = 2000, columns: int = 80, seed: int = 1) -> str:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(100, 20, (rows, columns)).round(3), columns=[f"metric_{i}" for i in range(columns)])
+    df.insert(0, "month", pd.date_range("2000-01-01", periods=rows, freq="MS").strftime("%Y-%m-%d"))
+    df.insert(1, "segment", rng.choice(REGIONS, rows))
+    df.to_csv(path, index=False)
+    return path
+
+
+def long_csv(path: str, series: int = 500, periods: int = 48, seed: int = 2) -> str:
+    rng = np.random.default_rng(seed)
+    months = pd.date_range("2021-01-01", periods=periods, freq="MS").strftime("%Y-%m-%d")
+    level = rng.uniform(50, 500, series)[:, None]
+    season = 1 + 0.2 * np.sin(2 * np.pi * np.arange(periods) / 12)[None, :]
+    values = level * season + rng.normal(0, 10, (series, periods))
+    pd.DataFrame({
+        "month": np.tile(months, series),
+        "store": np.repeat([f"store_{i:04d}" for i in range(series)], periods),
+        "sales": values.ravel().round(2),
+    }).to_csv(path, index=False)
+    return path
+
+
+def multi_sheet_xlsx(path: str, sheets: int = 3, rows: int = 3000, seed: int = 3) -> str:
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for i in range(sheets):
+            sales_frame(rows, seed + i).to_excel(writer, sheet_name=f"Sheet{i + 1}", index=False)
+    return path
+
+
+def table_docx(path: str, tables: int = 3, rows: int = 200, seed: int = 4) -> str:
+    doc = Document()
+    doc.add_heading("Quarterly report", level=1)
+    for i in range(tables):
+        df = sales_frame(rows, seed + i)
+        doc.add_paragraph(f"Table {i + 1}")
+        table = doc.add_table(rows=len(df) + 1, cols=len(df.columns))
+        for j, column in enumerate(df.columns):
+            table.cell(0, j).text = column
+        for r, values in enumerate(df.itertuples(index=False), start=1):
+            cells = table.rows[r].cells
+            for j, value in enumerate(values):
+                cells[j].text = str(value)
+    doc.save(path)
+    return path
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_text_pdf(path: str, lines: List[str], lines_per_page: int = 60) -> str:
+    """Minimal PDF with one text line per row (no PDF library needed)"""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objects: List[bytes] = []
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages)))
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for i, page in enumerate(pages):
+        text = "".join(f"({_pdf_escape(line)}) Tj T* " for line in page)
+        stream = f"BT /F1 8 Tf 10 TL 36 800 Td {text}ET".encode("latin-1", "replace")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> "
+            f"/Contents {5 + 2 * i} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for n, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % n + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+    return path
+
+
+def table_pdf(path: str, rows: int = 600, seed: int = 5) -> str:
+    df = sales_frame(rows, seed)
+    lines = [",".join(df.columns)] + [",".join(str(v) for v in r) for r in df.itertuples(index=False)]
+    return write_text_pdf(path, lines)
+
+
+def generate_all(out_dir: str, scale: float = 1.0) -> Dict[str, str]:
+    """Write every fixture into out_dir; scale multiplies row counts"""
+    os.makedirs(out_dir, exist_ok=True)
+
+    def n(value: int) -> int:
+        return max(10, int(value * scale))
+
+    return {
+        "narrow_csv": narrow_csv(os.path.join(out_dir, "narrow.csv"), rows=n(20000)),
+        "wide_csv": wide_csv(os.path.join(out_dir, "wide.csv"), rows=n(2000)),
+        "long_csv": long_csv(os.path.join(out_dir, "long.csv"), series=n(500)),
+        "multi_sheet_xlsx": multi_sheet_xlsx(os.path.join(out_dir, "multi_sheet.xlsx"), rows=n(3000)),
+        "table_docx": table_docx(os.path.join(out_dir, "tables.docx"), rows=n(200)),
+        "table_pdf": table_pdf(os.path.join(out_dir, "tables.pdf"), rows=n(600)),
+    }
@@ -0,0 +1,224 @@
+"""
+HTTP load driver for the API
+
+Runs closed-loop workers (each sends its next request as soon as the previous
+one answers) against a running server or, with --in-process, against the app
+through an ASGI transport. Reports p50/p95/p99 latency and throughput per
+operation and can save or compare baselines.
+
+Scenarios:
+- upload: POST /api/upload with a synthetic sales CSV
+- dashboard: GET /api/dashboard, save + fetch a dashboard, POST /api/dashboard/refine
+- ai: predictions, anomalies, chat and the gateway stats
+
+Point the server at mock_llm_server.py (GROQ_BASE_URL) to include the LLM
+paths without calling Groq. Uploads and saved dashboards land in app/tmp just
+like real traffic.
+
+Usage (from backend/):
+    python -m benchmarks.load --base-url http://127.0.0.1:8000 --concurrency 16 --duration 30
+    python -m benchmarks.load --in-process --scenarios upload,dashboard --requests 500
+    python -m benchmarks.load --in-process --compare
+"""
+import argparse
+import asyncio
+import io
+import itertools
+import os
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.datasets import sales_frame
+from benchmarks.stats import BASELINE_DIR, check_regressions, print_report, save_baseline, summarize
+
+
+@dataclass
+class Operation:
+    name: str
+    method: str
+    url: str
+    build: Callable[["LoadContext"], Dict[str, Any]] = lambda ctx: {}
+    after: Optional[Callable[["LoadContext", httpx.Response], None]] = None
+
+
+@dataclass
+class LoadContext:
+    """Payloads shared by all workers, built once"""
+    csv_bytes: bytes
+    history: List[Dict[str, float]]
+    dashboard_ids: List[str] = field(default_factory=list)
+
+
+def build_context(upload_rows: int) -> LoadContext:
+    buf = io.StringIO()
+    sales_frame(upload_rows).to_csv(buf, index=False)
+    months = sales_frame(24 * 30 * 24, seed=7).groupby(lambda i: i // (24 * 30)).agg({"revenue": "sum", "cost": "sum"})
+    history = [
+        {"month": f"2023-{i % 12 + 1:02d}", "revenue": round(r.revenue, 2), "expenses": round(r.cost, 2)}
+        for i, r in enumerate(months.itertuples())
+    ]
+    return LoadContext(csv_bytes=buf.getvalue().encode("utf-8"), history=history)
+
+
+WIDGETS = [
+    {"id": "w1", "type": "line_chart", "title": "Revenue over time", "data": []},
+    {"id": "w2", "type": "bar_chart", "title": "Revenue by region", "data": []},
+    {"id": "w3", "type": "kpi", "title": "Total revenue", "data": []},
+]
+
+
+def _remember_dashboard(ctx: LoadContext, r: httpx.Response) -> None:
+    if r.status_code == 200 and len(ctx.dashboard_ids) < 100:
+        ctx.dashboard_ids.append(r.json()["id"])
+
+
+SCENARIOS: Dict[str, List[Operation]] = {
+    "upload": [
+        Operation("upload", "POST", "/api/upload", lambda ctx: {
+            "files": {"file": ("bench.csv", ctx.csv_bytes, "text/csv")},
+            "data": {"domain": "sales", "intent": "trends"},
+        }),
+    ],
+    "dashboard": [
+        Operation("dashboard.list", "GET", "/api/dashboard"),
+        Operation("dashboard.save", "POST", "/api/dashboard/save", lambda ctx: {
+            "json": {"name": "bench", "widgets": WIDGETS, "dataset_id": "bench.csv"},
+        }, after=_remember_dashboard),
+        Operation("dashboard.get", "GET", "/api/dashboard/{dashboard_id}"),
+        Operation("dashboard.refine", "POST", "/api/dashboard/refine", lambda ctx: {
+            "json": {
+                "dashboard_id": "bench", "dataset_id": "bench.csv", "role": "finance",
+                "user_instruction": "focus on revenue trends", "constraints": {"intent": "trends"},
+                "current_widgets": WIDGETS,
+            },
+        }),
+    ],
+    "ai": [
+        Operation("ai.predictions", "POST", "/api/ai/predictions", lambda ctx: {
+            "json": {"historical_data": ctx.history, "months_ahead": 6},
+        }),
+        Operation("ai.anomalies", "POST", "/api/ai/anomalies", lambda ctx: {
+            "json": {"data": ctx.history},
+        }),
+        Operation("ai.chat", "POST", "/api/ai/chat", lambda ctx: {
+            "params": {"message": "Summarise last quarter's revenue"},
+        }),
+        Operation("ai.llm_stats", "GET", "/api/ai/llm/stats"),
+    ],
+}
+
+
+async def worker(
+    client: httpx.AsyncClient,
+    ops: "itertools.cycle[Operation]",
+    ctx: LoadContext,
+    deadline: float,
+    remaining: List[int],
+    samples: Dict[str, List[float]],
+    errors: Dict[str, int],
+) -> None:
+    while time.monotonic() < deadline and remaining[0] != 0:
+        remaining[0] -= 1
+        op = next(ops)
+        url = op.url
+        if "{dashboard_id}" in url:
+            if not ctx.dashboard_ids:
+                continue
+            url = url.format(dashboard_id=ctx.dashboard_ids[remaining[0] % len(ctx.dashboard_ids)])
+        start = time.perf_counter()
+        try:
+            r = await client.request(op.method, url, **op.build(ctx))
+        except httpx.HTTPError:
+            errors[op.name] += 1
+            continue
+        elapsed = time.perf_counter() - start
+        if r.status_code >= 400:
+            errors[op.name] += 1
+            continue
+        samples[op.name].append(elapsed)
+        if op.after:
+            op.after(ctx, r)
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    scenarios: List[str],
+    concurrency: int,
+    duration: float,
+    requests: int,
+    ctx: LoadContext,
+) -> Dict[str, Dict[str, float]]:
+    ops = itertools.cycle([op for name in scenarios for op in SCENARIOS[name]])
+    samples: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    remaining = [requests if requests > 0 else -1]  # -1: bounded by duration only
+    started = time.monotonic()
+    await asyncio.gather(*(
+        worker(client, ops, ctx, started + duration, remaining, samples, errors)
+        for _ in range(concurrency)
+    ))
+    elapsed = time.monotonic() - started
+    names = [op.name for name in scenarios for op in SCENARIOS[name]]
+    results = {name: summarize(samples[name], elapsed, errors[name]) for name in names}
+    results["total"] = summarize([s for v in samples.values() for s in v], elapsed, sum(errors.values()))
+    return results
+
+
+def make_client(base_url: Optional[str], in_process: bool, timeout: float) -> httpx.AsyncClient:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    if in_process:
+        os.environ.setdefault("GROQ_MODE", "mock")
+        from app.main import app
+
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=timeout)
+    return httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=os.getenv("BENCH_BASE_URL", "http://127.0.0.1:8000"))
+    parser.add_argument("--in-process", action="store_true", help="drive app.main:app without a server")
+    parser.add_argument("--scenarios", default="upload,dashboard,ai", help=f"comma-separated: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument("--requests", type=int, default=0, help="stop after this many requests (0: duration only)")
+    parser.add_argument("--upload-rows", type=int, default=2000)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    default_baseline = os.path.join(BASELINE_DIR, "load.json")
+    parser.add_argument("--save-baseline", nargs="?", const=default_baseline, default=None,
+                        help=f"write results as the new baseline (default path {default_baseline})")
+    parser.add_argument("--compare", nargs="?", const=default_baseline, default=None,
+                        help="baseline JSON to check for regressions; exits 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 growth (fraction)")
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    async def _run() -> Dict[str, Dict[str, float]]:
+        ctx = build_context(args.upload_rows)
+        async with make_client(args.base_url, args.in_process, args.timeout) as client:
+            return await run_load(client, scenarios, args.concurrency, args.duration, args.requests, ctx)
+
+    target = "in-process app" if args.in_process else args.base_url
+    print(f"🚀 Load test against {target}: {', '.join(scenarios)} x{args.concurrency} workers")
+    results = asyncio.run(_run())
+    print_report(f"Load test ({target}, concurrency {args.concurrency})", results)
+
+    meta = {"scenarios": scenarios, "concurrency": args.concurrency, "target": target}
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results, meta)
+    if args.compare:
+        return check_regressions(results, args.compare, args.tolerance)
+    return 0 if not results["total"].get("errors") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
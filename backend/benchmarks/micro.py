@@ -0,0 +1,91 @@
+"""
+Per-stage micro-benchmarks of the upload pipeline
+
+For every synthetic fixture: parse_file, then infer_hints_from_csv and
+generate_quick_viz (local engine) on the parsed CSV, like /api/upload does.
+
+Usage (from backend/):
+    python -m benchmarks.micro --scale 0.5 --repeat 5
+    python -m benchmarks.micro --save-baseline
+    python -m benchmarks.micro --compare --tolerance 0.3
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+# No LLM calls from benchmarks: the local recommender is what is being measured
+os.environ.setdefault("GROQ_MODE", "mock")
+
+from app.services.dashboard_generator import generate_quick_viz, infer_hints_from_csv  # noqa: E402
+from app.services.file_parsers import parse_file  # noqa: E402
+from benchmarks.datasets import generate_all  # noqa: E402
+from benchmarks.stats import BASELINE_DIR, check_regressions, print_report, save_baseline, summarize  # noqa: E402
+
+
+def timed(fn: Callable[[], object], repeat: int, warmup: int = 1) -> List[float]:
+    samples = []
+    # the pipeline prints progress; keep it off the terminal while timing
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(warmup):
+            fn()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+def run(fixtures: Dict[str, str], repeat: int, work_dir: str) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    for name, path in fixtures.items():
+        results[f"parse_file[{name}]"] = summarize(timed(lambda: parse_file(path), repeat))
+
+        df, file_type = parse_file(path)
+        print(f"   {name}: parsed as {file_type}, {df.shape[0]} rows x {df.shape[1]} columns")
+        csv_path = os.path.join(work_dir, f"{name}_parsed.csv")
+        df.to_csv(csv_path, index=False)
+        results[f"infer_hints_from_csv[{name}]"] = summarize(timed(lambda: infer_hints_from_csv(csv_path), repeat))
+        results[f"generate_quick_viz[{name}]"] = summarize(
+            timed(lambda: generate_quick_viz(csv_path, "sales", "trends", engine="local"), repeat)
+        )
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier for fixture row counts")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", default="", help="comma-separated fixture names")
+    default_baseline = os.path.join(BASELINE_DIR, "micro.json")
+    parser.add_argument("--save-baseline", nargs="?", const=default_baseline, default=None,
+                        help=f"write results as the new baseline (default path {default_baseline})")
+    parser.add_argument("--compare", nargs="?", const=default_baseline, default=None,
+                        help="baseline JSON to check for regressions; exits 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 growth (fraction)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="vizpilot-bench-") as work_dir:
+        print(f"🏗️  Generating fixtures (scale {args.scale})...")
+        fixtures = generate_all(os.path.join(work_dir, "fixtures"), scale=args.scale)
+        if args.only:
+            wanted = set(args.only.split(","))
+            fixtures = {k: v for k, v in fixtures.items() if k in wanted}
+        for name, path in fixtures.items():
+            print(f"   - {name}: {os.path.getsize(path) / 1024:.0f} KiB")
+        results = run(fixtures, args.repeat, work_dir)
+
+    print_report(f"Micro-benchmarks ({args.repeat} runs each)", results)
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results, {"scale": args.scale, "repeat": args.repeat})
+    if args.compare:
+        return check_regressions(results, args.compare, args.tolerance)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Cold-start benchmark: how long `import app.main` takes
+
+Each run imports the app in a fresh interpreter with -X importtime and
+reports the total plus the slowest modules (cumulative time, including
+their own imports). Instances are expected to be ready well under a
+second; --budget-ms fails the run when the median exceeds it.
+
+Usage (from backend/):
+    python -m benchmarks.startup --repeat 5 --top 15
+    python -m benchmarks.startup --budget-ms 1000
+    python -m benchmarks.startup --save-baseline
+    python -m benchmarks.startup --compare --tolerance 0.3
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+from benchmarks.stats import BASELINE_DIR, check_regressions, print_report, save_baseline, summarize
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """(module, cumulative µs, depth) per line of -X importtime output"""
+    modules = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            modules.append((match.group(4), int(match.group(2)), (len(match.group(3)) - 1) // 2))
+    return modules
+
+
+def import_once(module: str = "app.main") -> List[Tuple[str, int, int]]:
+    env = {**os.environ, "GROQ_MODE": os.environ.get("GROQ_MODE", "mock")}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def run(repeat: int, top: int, module: str = "app.main") -> Tuple[Dict[str, Dict[str, float]], List[Tuple[str, int]]]:
+    totals: List[float] = []
+    slowest: Dict[str, List[float]] = {}
+    for _ in range(repeat):
+        modules = import_once(module)
+        totals.append(next(us for name, us, depth in modules if name == module) / 1e6)
+        for name, us, depth in modules:
+            if name != module:
+                slowest.setdefault(name, []).append(us)
+    ranking = sorted(((name, int(sorted(v)[len(v) // 2])) for name, v in slowest.items()), key=lambda m: -m[1])
+    return {f"import[{module}]": summarize(totals)}, ranking[:top]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail when the median import exceeds this")
+    default_baseline = os.path.join(BASELINE_DIR, "startup.json")
+    parser.add_argument("--save-baseline", nargs="?", const=default_baseline, default=None,
+                        help=f"write results as the new baseline (default path {default_baseline})")
+    parser.add_argument("--compare", nargs="?", const=default_baseline, default=None,
+                        help="baseline JSON to check for regressions; exits 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 growth (fraction)")
+    args = parser.parse_args()
+
+    results, ranking = run(args.repeat, args.top, args.module)
+    print_report(f"Cold start ({args.repeat} fresh interpreters)", results)
+    print("\nSlowest imports (median cumulative ms):")
+    for name, us in ranking:
+        print(f"   {us / 1000:8.1f}  {name}")
+
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results, {"repeat": args.repeat, "module": args.module})
+    status = 0
+    if args.budget_ms is not None:
+        median_ms = results[f"import[{args.module}]"]["p50_ms"]
+        if median_ms > args.budget_ms:
+            print(f"\n❌ Startup budget exceeded: {median_ms:.0f} ms > {args.budget_ms:.0f} ms")
+            status = 1
+        else:
+            print(f"\n✅ Within startup budget: {median_ms:.0f} ms <= {args.budget_ms:.0f} ms")
+    if args.compare:
+        status = check_regressions(results, args.compare, args.tolerance) or status
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
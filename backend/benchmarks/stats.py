@@ -0,0 +1,106 @@
+"""
+Latency summaries and baseline comparison shared by the benchmark drivers
+"""
+import json
+import os
+import platform
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+
+
+def summarize(samples: List[float], elapsed: Optional[float] = None, errors: int = 0) -> Dict[str, float]:
+    """p50/p95/p99/mean/max in milliseconds, plus throughput when elapsed seconds are given"""
+    if not samples:
+        return {"count": 0, "errors": errors}
+    ms = np.asarray(samples, dtype=float) * 1000.0
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    summary = {
+        "count": len(samples),
+        "errors": errors,
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+    if elapsed:
+        summary["throughput_rps"] = round(len(samples) / elapsed, 2)
+    return summary
+
+
+def print_report(title: str, results: Dict[str, Dict[str, float]]) -> None:
+    print(f"\n📊 {title}")
+    width = max([len(name) for name in results] + [10])
+    print(f"{'name':<{width}}  {'count':>6} {'err':>4} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'rps':>8}")
+    for name, s in results.items():
+        if not s.get("count"):
+            print(f"{name:<{width}}  {0:>6} {s.get('errors', 0):>4}")
+            continue
+        print(
+            f"{name:<{width}}  {s['count']:>6} {s['errors']:>4} {s['p50_ms']:>10.2f} {s['p95_ms']:>10.2f}"
+            f" {s['p99_ms']:>10.2f} {s['throughput_rps'] if 'throughput_rps' in s else '-':>8}"
+        )
+
+
+def save_baseline(path: str, results: Dict[str, Dict[str, float]], meta: Optional[Dict] = None) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    doc = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            **(meta or {}),
+        },
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2)
+    print(f"💾 Baseline saved to {path}")
+
+
+def load_baseline(path: str) -> Dict[str, Dict[str, float]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def compare(
+    current: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float = 0.25,
+    metric: str = "p95_ms",
+    min_delta_ms: float = 1.0,
+) -> List[str]:
+    """
+    Regressions of current against baseline
+
+    A benchmark regresses when its metric grew by more than tolerance (a
+    fraction) and by at least min_delta_ms, which keeps sub-millisecond noise
+    from failing a run, or when its error count grew.
+    """
+    regressions = []
+    for name, base in baseline.items():
+        now = current.get(name)
+        if not now or not now.get("count") or metric not in base:
+            continue
+        before, after = base[metric], now[metric]
+        if after > before * (1 + tolerance) and after - before >= min_delta_ms:
+            regressions.append(f"{name}: {metric} {before:.2f} -> {after:.2f} (+{(after / before - 1) * 100 if before else 100:.0f}%)")
+        if now.get("errors", 0) > base.get("errors", 0):
+            regressions.append(f"{name}: errors {base.get('errors', 0)} -> {now['errors']}")
+    return regressions
+
+
+def check_regressions(current: Dict[str, Dict[str, float]], baseline_path: str, tolerance: float) -> int:
+    """Print the comparison and return a process exit code (1 on regression)"""
+    regressions = compare(current, load_baseline(baseline_path), tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) against {baseline_path} (tolerance {tolerance:.0%}):")
+        for line in regressions:
+            print(f"   - {line}")
+        return 1
+    print(f"\n✅ No regressions against {baseline_path} (tolerance {tolerance:.0%})")
+    return 0
@@ -0,0 +1,241 @@
+"""
+Mock LLM server for offline development and load testing
+OpenAI-compatible stand-in for Groq's /openai/v1/chat/completions that both
+ChatGroq and GroqAIService can be pointed at with GROQ_BASE_URL.
+
+- latency drawn from a log-normal distribution (median / p95)
+- token streaming (stream=true) at a configurable tokens-per-second rate
+- injected 429 (with retry-after) and 500 responses
+- replay of recorded responses: JSONL recordings or the app's JSON log
+  (GROQ_DEBUG.log "llm_response" records written with LOG_LLM_EXCHANGES=true),
+  matched by prompt hash; canned answers otherwise
+
+Usage:
+    python mock_llm_server.py --port 8100 --latency-median 1.2 --latency-p95 4 --rate-429 0.05
+    GROQ_BASE_URL=http://127.0.0.1:8100 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+@dataclass
+class MockConfig:
+    latency_median: float = 0.8  # seconds before the first token
+    latency_p95: float = 2.5
+    tokens_per_second: float = 250.0  # streaming and completion pacing
+    rate_429: float = 0.0  # share of requests answered with 429
+    rate_500: float = 0.0
+    retry_after: float = 2.0
+    seed: Optional[int] = None
+    replay: List[str] = field(default_factory=list)  # JSONL recordings or app log files
+
+
+def request_key(messages: List[Dict[str, Any]]) -> str:
+    """Hash of the conversation a recording answers (roles and contents only)"""
+    raw = json.dumps([[m.get("role"), m.get("content")] for m in messages], separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ReplayStore:
+    """Recorded responses: exact matches by request hash plus a pool for anything else"""
+
+    def __init__(self, paths: List[str]):
+        self.by_key: Dict[str, str] = {}
+        self.pool: List[str] = []
+        for path in paths:
+            self.load(path)
+
+    def load(self, path: str) -> None:
+        """Lines holding {messages, response}; other log records are skipped"""
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                response = record.get("response") if isinstance(record, dict) else None
+                if not isinstance(response, str):
+                    continue
+                if record.get("messages"):
+                    self.by_key[request_key(record["messages"])] = response
+                self.pool.append(response)
+
+    def find(self, messages: List[Dict[str, Any]]) -> Optional[str]:
+        key = request_key(messages)
+        if key in self.by_key:
+            return self.by_key[key]
+        if self.pool:
+            return self.pool[int(key, 16) % len(self.pool)]
+        return None
+
+
+def _user_data(messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """The DATA: JSON block the widget prompts send, if any"""
+    for m in messages:
+        content = m.get("content") or ""
+        if m.get("role") in ("user", "human") and "DATA:" in content:
+            try:
+                return json.loads(content.split("DATA:", 1)[1])
+            except ValueError:
+                return {}
+    return {}
+
+
+def canned_response(messages: List[Dict[str, Any]]) -> str:
+    """Plausible answer shaped like what each app prompt asks for"""
+    system = " ".join(m.get("content") or "" for m in messages if m.get("role") == "system").lower()
+    data = _user_data(messages)
+    if "rank dashboard widget candidates" in system:
+        return json.dumps([c["id"] for c in data.get("candidates", [])])
+    if "dashboard widgets" in system:
+        hints = data.get("hints") or {}
+        measures = hints.get("measures") or data.get("columns") or ["value"]
+        widgets = []
+        if hints.get("date_field"):
+            widgets.append({"title": f"{measures[0]} over time", "chart": "line", "x": hints["date_field"],
+                            "y": f"SUM({measures[0]})", "group_by": None, "explanation": "Trend over time"})
+        for c in (hints.get("categories") or [])[:2]:
+            widgets.append({"title": f"{measures[0]} by {c}", "chart": "bar", "x": c,
+                            "y": f"SUM({measures[0]})", "group_by": None, "explanation": "Top contributors"})
+        return json.dumps(widgets)
+    if "refine" in system or "widget" in system:
+        return "[]"
+    if "insights" in system:
+        return json.dumps({"insights": ["Mock insight: values follow the recent trend"],
+                           "recommendations": ["Mock recommendation: review the forecast monthly"]})
+    if "anomal" in system:
+        return json.dumps({"anomalies": [], "summary": "Mock explanation of the detected anomalies"})
+    if "consultant" in system:
+        return json.dumps([{"category": "efficiency", "priority": "medium", "title": "Mock recommendation",
+                            "description": "Generated by the mock LLM server", "expected_impact": "n/a",
+                            "timeframe": "Short term"}])
+    return "This is a mock response from the local LLM server."
+
+
+def create_app(config: MockConfig) -> FastAPI:
+    app = FastAPI(title="Mock LLM server")
+    rng = random.Random(config.seed)
+    replay = ReplayStore(config.replay)
+    # log-normal with the given median and 95th percentile
+    mu = math.log(max(config.latency_median, 1e-6))
+    sigma = max(math.log(max(config.latency_p95, config.latency_median) / max(config.latency_median, 1e-6)) / 1.645, 0.0)
+    stats = {"requests": 0, "streams": 0, "errors_429": 0, "errors_500": 0, "replayed": 0}
+
+    def latency() -> float:
+        return math.exp(rng.gauss(mu, sigma)) if config.latency_median > 0 else 0.0
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok", **stats}
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+        roll = rng.random()
+        if roll < config.rate_429:
+            stats["errors_429"] += 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached (mock)", "type": "tokens", "code": "rate_limit_exceeded"}},
+                status_code=429, headers={"retry-after": str(config.retry_after)},
+            )
+        if roll < config.rate_429 + config.rate_500:
+            stats["errors_500"] += 1
+            return JSONResponse({"error": {"message": "Internal error (mock)", "type": "server_error"}}, status_code=500)
+
+        messages = body.get("messages") or []
+        recorded = replay.find(messages)
+        if recorded is not None:
+            stats["replayed"] += 1
+        content = recorded if recorded is not None else canned_response(messages)
+        model = body.get("model", "mock")
+        prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4 + 1
+        # whitespace-preserving chunks of about one token each
+        chunks = re.findall(r"\s*\S{1,4}|\s+", content) or [""]
+        completion_tokens = len(chunks)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        await asyncio.sleep(latency())
+
+        if body.get("stream"):
+            stats["streams"] += 1
+
+            async def events():
+                delay = 1.0 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+                for i, chunk in enumerate(chunks):
+                    delta = {"role": "assistant", "content": chunk} if i == 0 else {"content": chunk}
+                    frame = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                             "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+                    yield f"data: {json.dumps(frame)}\n\n"
+                    if delay:
+                        await asyncio.sleep(delay)
+                final = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                         "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                         "x_groq": {"usage": usage}}
+                yield f"data: {json.dumps(final)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        if config.tokens_per_second > 0:
+            await asyncio.sleep(completion_tokens / config.tokens_per_second)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        }
+
+    app.state.stats = stats
+    return app
+
+
+def main() -> None:
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=env("MOCK_LLM_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(env("MOCK_LLM_PORT", "8100")))
+    parser.add_argument("--latency-median", type=float, default=float(env("MOCK_LLM_LATENCY_MEDIAN", "0.8")))
+    parser.add_argument("--latency-p95", type=float, default=float(env("MOCK_LLM_LATENCY_P95", "2.5")))
+    parser.add_argument("--tokens-per-second", type=float, default=float(env("MOCK_LLM_TPS", "250")))
+    parser.add_argument("--rate-429", type=float, default=float(env("MOCK_LLM_RATE_429", "0")))
+    parser.add_argument("--rate-500", type=float, default=float(env("MOCK_LLM_RATE_500", "0")))
+    parser.add_argument("--retry-after", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--replay", action="append", default=[],
+                        help="JSONL recording ({messages, response} per line) or the app's GROQ_DEBUG.log; repeatable")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency_median=args.latency_median,
+        latency_p95=args.latency_p95,
+        tokens_per_second=args.tokens_per_second,
+        rate_429=args.rate_429,
+        rate_500=args.rate_500,
+        retry_after=args.retry_after,
+        seed=args.seed,
+        replay=args.replay,
+    )
+    print(f"🧪 Mock LLM server on http://{args.host}:{args.port} ({config})")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
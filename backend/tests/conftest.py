@@ -1,4 +1,5 @@
 import os
+import tempfile
 import pytest
 from fastapi.testclient import TestClient
 
@@ -6,6 +7,10 @@ from fastapi.testclient import TestClient
 os.environ["APP_ENV"] = "test"
 os.environ["GROQ_MODE"] = "mock"
 os.environ["AUTH_MODE"] = "mock"
+os.environ["TRACE_EXPORT"] = "memory"
+os.environ["DASHBOARD_DB_URL"] = os.environ["BUSINESS_DB_URL"] = (
+    "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="vizpilot-test-"), "vizpilot.db")
+)
 
 from app.main import app
 
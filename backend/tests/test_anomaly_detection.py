@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from app.services.anomaly_detection import changepoints, detect, detect_frame, detect_records
+
+
+def _noisy(n, seed=0):
+    return np.random.default_rng(seed).normal(0, 1, n)
+
+
+def test_spike_and_drop_are_flagged_with_direction():
+    t = np.arange(36)
+    revenue = 100 + t + _noisy(36)
+    revenue[20] += 40
+    expenses = 60 + _noisy(36, 1)
+    expenses[10] -= 30
+    result = detect(np.stack([revenue, expenses]), ["revenue", "expenses"], period=None)
+
+    found = {(a["metric"], a["index"], a["type"]) for a in result["anomalies"]}
+    assert ("revenue", 20, "spike") in found
+    assert ("expenses", 10, "drop") in found
+    assert result["overall_health"] in ("concerning", "critical")
+
+
+def test_seasonal_pattern_is_not_an_anomaly():
+    t = np.arange(48)
+    series = 100 + 20 * np.sin(2 * np.pi * t / 12) + _noisy(48, 2)
+    result = detect(series, ["revenue"], period=12)
+    assert result["overall_health"] == "healthy"
+    assert not [a for a in result["anomalies"] if a["severity"] != "low"]
+
+
+def test_level_shift_is_reported_as_changepoint():
+    series = np.concatenate([50 + _noisy(20, 3), 80 + _noisy(20, 4)])
+    assert changepoints(series) == [20]
+    result = detect(series, ["profit"], period=None)
+    shifts = [a for a in result["anomalies"] if a["type"] == "level_shift"]
+    assert shifts and shifts[0]["index"] == 20 and shifts[0]["severity"] == "high"
+
+
+def test_records_and_frames_use_period_labels():
+    rows = [{"month": f"M{i}", "revenue": 10.0 + (50 if i == 8 else 0) + (i % 2) * 0.5} for i in range(16)]
+    result = detect_records(rows, period=None)
+    assert result["anomalies"][0]["month"] == "M8"
+
+    df = pd.DataFrame({"period": pd.date_range("2024-01-01", periods=16, freq="MS"), "revenue": [r["revenue"] for r in rows]})
+    result = detect_frame(df, "period", period=None)
+    assert result["anomalies"][0]["month"] == "2024-09-01"
+    assert detect_records([])["overall_health"] == "healthy"
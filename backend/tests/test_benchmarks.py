@@ -0,0 +1,42 @@
+import os
+
+from app.services.file_parsers import parse_file
+from benchmarks.datasets import table_docx, table_pdf
+from benchmarks.stats import compare, summarize
+
+
+def test_table_fixtures_parse_as_tables(tmp_path):
+    df, kind = parse_file(table_pdf(str(tmp_path / "t.pdf"), rows=150))
+    assert kind == "PDF" and df.shape == (150, 6) and "revenue" in df.columns
+
+    df, kind = parse_file(table_docx(str(tmp_path / "t.docx"), tables=1, rows=20))
+    assert kind == "DOCX" and df.shape == (20, 6)
+
+
+def test_summary_and_regression_check():
+    baseline = {"stage": summarize([0.010] * 20), "tiny": summarize([0.0001] * 20)}
+    assert baseline["stage"]["p95_ms"] == 10.0 and baseline["stage"]["count"] == 20
+
+    current = {"stage": summarize([0.011] * 20), "tiny": summarize([0.0003] * 20)}
+    assert compare(current, baseline, tolerance=0.25) == []  # within tolerance / below noise floor
+
+    current["stage"] = summarize([0.020] * 20, errors=1)
+    regressions = compare(current, baseline, tolerance=0.25)
+    assert len(regressions) == 2 and regressions[0].startswith("stage: p95_ms 10.00 -> 20.00")
+
+
+def test_cold_start_defers_heavy_imports():
+    import subprocess
+    import sys
+
+    from benchmarks.startup import BACKEND_DIR, parse_importtime
+
+    heavy = ("langchain_groq", "langchain_core", "sqlalchemy", "supabase", "PyPDF2", "docx")
+    env = {k: v for k, v in os.environ.items() if not k.startswith("SUPABASE_")}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import sys, app.main; print([m for m in {heavy!r} if m in sys.modules])"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]  # no SUPABASE_* variables needed to start
+    assert proc.stdout.strip() == "[]"
+    assert any(name == "app.main" and depth == 0 for name, _, depth in parse_importtime(proc.stderr))
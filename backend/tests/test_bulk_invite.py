@@ -0,0 +1,65 @@
+import asyncio
+import re
+from types import SimpleNamespace
+
+from app.services import invitation_service
+from app.services.invitation_service import InvitationService, parse_invitees_csv, prepare_invitees
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db, self.table, self.filters, self.rows = db, table, {}, None
+
+    def select(self, *_):
+        return self
+
+    def eq(self, key, value):
+        self.filters[key] = value
+        return self
+
+    def or_(self, filters):
+        # email.ilike."..." conditions back to the emails they match (case-insensitively)
+        quoted = re.findall(r'email\.ilike\."((?:[^"\\]|\\.)*)"', filters)
+        self.filters["email"] = [re.sub(r"\\(.)", r"\1", re.sub(r"\\(.)", r"\1", q)).lower() for q in quoted]
+        return self
+
+    def insert(self, rows):
+        self.rows = rows
+        return self
+
+    def execute(self):
+        self.db.calls.append((self.table, "insert" if self.rows else "select"))
+        if self.rows:
+            return SimpleNamespace(data=[{**r, "id": f"inv-{i}"} for i, r in enumerate(self.rows)])
+        existing = self.db.members if self.table == "users" else self.db.pending
+        return SimpleNamespace(data=[{"email": e} for e in existing if e.lower() in self.filters["email"]])
+
+
+class FakeSupabase:
+    def __init__(self, members, pending):
+        self.members, self.pending, self.calls = members, pending, []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def test_prepare_and_parse_csv():
+    rows = parse_invitees_csv(b"\xef\xbb\xbfEmail,Role\nA@x.io,Admin\nb@x.io,\nnot-an-email,employee\na@x.io,manager\nc@x.io,owner\n")
+    results, valid = prepare_invitees(rows, default_role="employee")
+    assert [r["status"] for r in results] == ["pending", "pending", "invalid_email", "duplicate", "invalid_role"]
+    assert [(r["email"], r["role"]) for r in valid] == [("a@x.io", "admin"), ("b@x.io", "employee")]
+
+
+def test_bulk_invite_batches_lookups_and_inserts(monkeypatch):
+    # stored as typed at signup / by older invites
+    db = FakeSupabase(members={"member@x.io", "Alice@Corp.com"}, pending={"pending@x.io", "Bob.O'Neil@x.io"})
+    monkeypatch.setattr(invitation_service, "get_supabase_admin", lambda: db)
+    invitees = [{"email": f"new{i}@x.io", "role": "employee"} for i in range(50)]
+    invitees += [{"email": "member@x.io", "role": "admin"}, {"email": "pending@x.io", "role": "finance"}]
+    invitees += [{"email": "alice@corp.com", "role": "manager"}, {"email": "BOB.o'neil@X.io", "role": "employee"}]
+
+    result = asyncio.run(InvitationService.create_invitations_bulk("biz-1", invitees, "user-1"))
+    assert result["total"] == 54 and result["invited"] == 50
+    assert result["counts"] == {"invited": 50, "already_member": 2, "already_invited": 2}
+    # 54 emails: two lookup chunks per table, one insert
+    assert sorted(db.calls) == [("invitations", "insert")] + [("invitations", "select")] * 2 + [("users", "select")] * 2
@@ -0,0 +1,68 @@
+import json
+import threading
+
+import pytest
+
+from app.services.business_store import BusinessStore
+
+INFO = {"businessName": "Acme Co", "industry": "Retail", "size": "10", "country": "US", "ownerEmail": "boss@acme.io"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BusinessStore(str(tmp_path / "biz.db"), cache_ttl=60)
+
+
+def member(i):
+    return {"id": f"m{i}", "name": f"Member {i}", "email": f"m{i}@acme.io", "role": "analyst"}
+
+
+def test_save_get_and_email_index(store):
+    store.save("acme_co", INFO, [member(1)], ["sales.csv"], True)
+    doc = store.get("acme_co")
+    assert doc == {"businessInfo": INFO, "teamMembers": [member(1)], "uploadedFiles": ["sales.csv"], "useHistoricalData": True}
+
+    assert store.business_id_for_email("BOSS@acme.io") == "acme_co"
+    assert store.business_id_for_email("m1@acme.io") == "acme_co"
+    assert store.business_id_for_email("m2@acme.io") is None
+    plan = " ".join(str(r[-1]) for r in store.db.conn().execute(
+        "EXPLAIN QUERY PLAN SELECT business_id FROM team_members WHERE email = ?", ("x",)))
+    assert "ix_team_members_email" in plan
+
+    # writes invalidate cached documents and negative email lookups
+    store.add_member("acme_co", member(2))
+    assert store.business_id_for_email("m2@acme.io") == "acme_co"
+    assert [m["id"] for m in store.get("acme_co")["teamMembers"]] == ["m1", "m2"]
+    store.remove_member("acme_co", "m1")
+    assert [m["id"] for m in store.get("acme_co")["teamMembers"]] == ["m2"]
+    with pytest.raises(KeyError):
+        store.add_member("missing", member(3))
+
+
+def test_concurrent_member_adds_are_lossless(store):
+    store.save("acme_co", INFO, [], [], False)
+    threads = [threading.Thread(target=store.add_member, args=("acme_co", member(i))) for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(store.get("acme_co")["teamMembers"]) == 20
+
+
+def test_import_legacy_file(store, tmp_path):
+    legacy = tmp_path / "business_data.json"
+    legacy.write_text(json.dumps({"acme_co": {"businessInfo": INFO, "teamMembers": [member(1)], "uploadedFiles": []}}))
+    assert store.import_json_file(str(legacy)) == 1
+    assert store.import_json_file(str(legacy)) == 0
+    assert store.list() == [{"id": "acme_co", "name": "Acme Co", "industry": "Retail"}]
+
+
+def test_business_endpoints(client):
+    setup = {"businessInfo": {**INFO, "businessName": "Endpoint Biz"}, "teamMembers": [member(7)]}
+    assert client.post("/api/business/setup", json=setup).json()["businessId"] == "endpoint_biz"
+    assert client.get("/api/business/endpoint_biz").json()["teamMembers"] == [member(7)]
+    me = client.get("/api/business/me/info", headers={"X-User-Email": "M7@acme.io"}).json()
+    assert me["businessInfo"]["businessName"] == "Endpoint Biz"
+    assert client.post("/api/business/endpoint_biz/team", json=member(8)).status_code == 200
+    assert client.delete("/api/business/nope/team/m8").status_code == 404
+    assert {"id": "endpoint_biz", "name": "Endpoint Biz", "industry": "Retail"} in client.get("/api/business").json()["businesses"]
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from app.services.dashboard_store import DashboardStore, VersionConflict
+
+
+@pytest.fixture
+def store(tmp_path):
+    return DashboardStore(str(tmp_path / "dash.db"))
+
+
+def test_create_get_and_compact_widgets(store):
+    widgets = [{"id": f"w{i}", "type": "bar", "title": "Sales by region"} for i in range(50)]
+    saved = store.create("Sales", widgets, dataset_id="ds-1", meta={"role": "ceo"}, business_id="biz", owner="a@x.io")
+    assert saved["version"] == 1
+
+    doc = store.get(saved["id"])
+    assert doc["widgets"] == widgets and doc["meta"] == {"role": "ceo"}
+    assert doc["business_id"] == "biz" and doc["owner"] == "a@x.io"
+    blob = store._conn().execute("SELECT widgets FROM dashboards WHERE id = ?", (saved["id"],)).fetchone()[0]
+    assert len(blob) < len(json.dumps(widgets)) / 5
+    assert store._conn().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert store.get("missing") is None
+
+
+def test_list_filters_and_keyset_pages(store):
+    ids = [store.create(f"d{i}", [], business_id="biz" if i % 2 else "other")["id"] for i in range(7)]
+    seen, cursor = [], None
+    while True:
+        page = store.list(business_id="biz", limit=2, cursor=cursor)
+        seen.extend(d["id"] for d in page["dashboards"])
+        assert all("widgets" not in d for d in page["dashboards"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert sorted(seen) == sorted(ids[1::2]) and len(seen) == len(set(seen))
+
+    plan = " ".join(str(r[-1]) for r in store._conn().execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM dashboards WHERE business_id = ? ORDER BY updated_at DESC, id DESC", ("biz",)))
+    assert "ix_dashboards_business_updated" in plan
+    with pytest.raises(ValueError):
+        store.list(cursor="not-a-cursor")
+
+
+def test_optimistic_concurrency(store):
+    dash_id = store.create("Ops", [{"id": "w1"}])["id"]
+    assert store.update(dash_id, 1, name="Ops v2")["version"] == 2
+    with pytest.raises(VersionConflict) as e:
+        store.update(dash_id, 1, widgets=[])
+    assert e.value.current_version == 2
+    with pytest.raises(KeyError):
+        store.update("missing", 1, name="x")
+    doc = store.get(dash_id)
+    assert doc["name"] == "Ops v2" and doc["widgets"] == [{"id": "w1"}]
+
+    with pytest.raises(VersionConflict):
+        store.delete(dash_id, expected_version=1)
+    store.delete(dash_id, expected_version=2)
+    assert store.get(dash_id) is None
+
+
+def test_import_legacy_json_files(store, tmp_path):
+    legacy = tmp_path / "dashboards"
+    legacy.mkdir()
+    (legacy / "abc.json").write_text(json.dumps({"id": "abc", "name": "Old", "widgets": [{"id": "w"}], "meta": {}}))
+    (legacy / "broken.json").write_text("{")
+    assert store.import_json_dir(str(legacy)) == 1
+    assert store.import_json_dir(str(legacy)) == 0
+    assert store.get("abc")["widgets"] == [{"id": "w"}]
+
+
+def test_dashboard_endpoints(client):
+    r = client.post("/api/dashboard/save", json={"name": "Board", "widgets": [{"id": "w1"}]},
+                    headers={"X-Business-Id": "biz-api"})
+    assert r.status_code == 200
+    dash_id, version = r.json()["id"], r.json()["version"]
+
+    listed = client.get("/api/dashboard", params={"business_id": "biz-api"}).json()
+    assert [d["id"] for d in listed["dashboards"]] == [dash_id]
+    assert client.get(f"/api/dashboard/{dash_id}").json()["widgets"] == [{"id": "w1"}]
+
+    assert client.put(f"/api/dashboard/{dash_id}", json={"version": version, "name": "Renamed"}).json()["version"] == 2
+    stale = client.put(f"/api/dashboard/{dash_id}", json={"version": version, "name": "Lost update"})
+    assert stale.status_code == 409 and stale.json()["detail"]["current_version"] == 2
+    assert client.delete(f"/api/dashboard/{dash_id}").status_code == 200
+    assert client.get(f"/api/dashboard/{dash_id}").status_code == 404
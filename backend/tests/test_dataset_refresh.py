@@ -0,0 +1,106 @@
+import asyncio
+import io
+import os
+import threading
+import uuid
+
+import anyio
+import duckdb
+import httpx
+import pytest
+
+from app.api.endpoints import dashboard as dashboard_endpoint
+from app.main import app
+from app.services.dataset_refresh import feed
+from app.services.datasets import UPLOAD_DIR
+from app.services.rollups import RollupStore, WidgetQuery
+
+
+@pytest.fixture
+def dataset():
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    dataset_id = f"{uuid.uuid4()}_daily_parsed.csv"
+    path = os.path.join(UPLOAD_DIR, dataset_id)
+    with open(path, "w") as f:
+        f.write("day,region,revenue\n2024-01-01,North,10\n2024-01-01,South,\n2024-01-02,North,4\n")
+    yield dataset_id, path
+    os.remove(path)
+
+
+def _sql(path, select):
+    return duckdb.connect().execute(f"SELECT region, {select} FROM read_csv_auto('{path}') GROUP BY 1 ORDER BY 1").fetchall()
+
+
+def test_merged_rollups_match_full_recompute(dataset, tmp_path):
+    dataset_id, path = dataset
+    store = RollupStore()
+    queries = {y: WidgetQuery("region", y) for y in ("SUM(revenue)", "AVG(revenue)", "COUNT(revenue)", "COUNT(*)", "MAX(revenue)")}
+    for q in queries.values():
+        store.widget_rows(dataset_id, q)
+
+    delta = tmp_path / "delta.csv"
+    delta.write_text("day,region,revenue\n2024-01-03,South,7\n2024-01-03,East,1\n")
+    changed = store.append(dataset_id, str(delta), lambda: open(path, "a").write(delta.read_text().split("\n", 1)[1]))
+    assert changed[(dataset_id, "region", None, "revenue")] == {("South",), ("East",)}
+
+    for y, q in queries.items():
+        merged = [(r["region"], r[y]) for r in store.widget_rows(dataset_id, q)]
+        assert merged == [tuple(r) for r in _sql(path, y)], y
+    only_changed = store.widget_rows(dataset_id, queries["SUM(revenue)"], keys=[("South",)])
+    assert only_changed == [{"region": "South", "SUM(revenue)": 7}]
+
+
+def test_rollup_rebuilds_after_outside_change(dataset):
+    dataset_id, path = dataset
+    store = RollupStore()
+    q = WidgetQuery("region", "SUM(revenue)")
+    assert store.widget_rows(dataset_id, q)[0] == {"region": "North", "SUM(revenue)": 14}
+    with open(path, "a") as f:
+        f.write("2024-01-05,North,1\n")
+    assert store.widget_rows(dataset_id, q)[0] == {"region": "North", "SUM(revenue)": 15}
+
+
+def test_append_endpoint_pushes_changed_groups(client, dataset):
+    dataset_id, path = dataset
+    widgets = [
+        {"id": "w1", "config": {"x_column": "region", "y_column": "SUM(revenue)"}},
+        {"id": "w2", "config": {"x_column": "day", "y_column": "revenue"}},
+    ]
+    dash_id = client.post("/api/dashboard/save", json={"name": "Daily", "widgets": widgets, "dataset_id": dataset_id}).json()["id"]
+    before = client.get(f"/api/datasets/{dataset_id}/widget-data", params={"x": "region", "y": "SUM(revenue)"}).json()["rows"]
+    assert before == [{"region": "North", "SUM(revenue)": 14}, {"region": "South", "SUM(revenue)": None}]
+    seq = feed.last_seq
+
+    delta = "region,day,revenue\nSouth,2024-01-03,5\n"
+    r = client.post(f"/api/datasets/{dataset_id}/append", files={"file": ("today.csv", io.BytesIO(delta.encode()), "text/csv")})
+    assert r.status_code == 200, r.text
+    assert r.json()["rows_appended"] == 1 and r.json()["dashboards"] == [dash_id]
+
+    events = {data["widget_id"]: (event, data) for _, event, data in feed.wait(dash_id, seq, timeout=1)}
+    assert events["w1"][0] == "widget_data" and events["w1"][1]["partial"]
+    assert events["w1"][1]["rows"] == [{"region": "South", "SUM(revenue)": 5}]
+    assert events["w2"][0] == "widget_stale"
+    assert open(path).read().endswith("2024-01-03,South,5\n")
+
+    bad = client.post(f"/api/datasets/{dataset_id}/append", files={"file": ("x.csv", io.BytesIO(b"a,b\n1,2\n"), "text/csv")})
+    assert bad.status_code == 400
+
+
+def test_dashboard_subscribers_wait_on_the_event_loop(client, monkeypatch):
+    monkeypatch.setattr(dashboard_endpoint, "STREAM_TIMEOUT", 0.8)
+    monkeypatch.setattr(dashboard_endpoint, "KEEPALIVE_INTERVAL", 0.5)
+    dash_id = client.post("/api/dashboard/save", json={"name": "Live", "widgets": []}).json()["id"]
+
+    async def scenario():
+        # one threadpool worker: a subscriber holding it would stall every sync endpoint
+        anyio.to_thread.current_default_thread_limiter().total_tokens = 1
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            stream = asyncio.create_task(c.get(f"/api/dashboard/{dash_id}/events"))
+            await asyncio.sleep(0.1)
+            assert (await asyncio.wait_for(c.get("/api/dashboard"), 0.3)).status_code == 200
+            seq = await asyncio.to_thread(feed.publish, dash_id, "widget_stale", {"widget_id": "w1"})
+            return seq, await asyncio.wait_for(stream, 5)
+
+    seq, r = asyncio.run(scenario())
+    assert f'id: {seq}\nevent: widget_stale\ndata: {{"widget_id": "w1"}}' in r.text
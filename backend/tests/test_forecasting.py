@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from app.services.forecasting import forecast, forecast_records
+
+
+def test_holt_winters_recovers_trend_and_seasonality():
+    t = np.arange(48)
+    season = 10 * np.sin(2 * np.pi * t / 12)
+    series = np.stack([100 + 2 * t + season, 50 + 0.5 * t - season])
+    result = forecast(series, horizon=12, season_length=12)
+
+    assert result.method == "holt_winters"
+    assert result.point.shape == (2, 12)
+    future = np.arange(48, 60)
+    expected = np.stack([
+        100 + 2 * future + 10 * np.sin(2 * np.pi * future / 12),
+        50 + 0.5 * future - 10 * np.sin(2 * np.pi * future / 12),
+    ])
+    assert np.allclose(result.point, expected, rtol=0.05)
+    assert np.all(result.lower <= result.point) and np.all(result.point <= result.upper)
+
+
+def test_short_history_uses_trend_models_and_intervals_widen():
+    holt = forecast(np.array([10.0, 12, 14, 16, 18, 20]), horizon=3, season_length=12)
+    assert holt.method == "holt"
+    assert np.allclose(holt.point[0], [22, 24, 26], atol=0.5)
+
+    linear = forecast(np.array([[1.0, 2.0, 4.0]]), horizon=4)
+    assert linear.method == "linear_trend"
+    width = linear.upper[0] - linear.lower[0]
+    assert np.all(np.diff(width) > 0)
+
+
+def test_forecast_records_derives_profit_and_is_deterministic():
+    rows = [{"month": f"M{i}", "revenue": 1000 + 50 * i, "expenses": 700 + 20 * i} for i in range(12)]
+    first = forecast_records(rows, horizon=6)
+    second = forecast_records(rows, horizon=6)
+
+    assert first == second
+    assert set(first["predictions"]) == {"revenue", "expenses", "profit"}
+    assert len(first["predictions"]["profit"]) == 6
+    assert first["predictions"]["profit"][0] == round(
+        first["predictions"]["revenue"][0] - first["predictions"]["expenses"][0], 2
+    )
+    assert first["confidence"] == "high"
+
+
+def test_batch_chunks_match_single_pass_and_dataset_is_stored(tmp_path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    import pandas as pd
+
+    from app.services import batch_forecast, datasets
+    from app.services.forecasting import forecast_batch
+
+    rng = np.random.default_rng(0)
+    Y = 100 + np.arange(30) + rng.normal(0, 2, (25, 30))
+    with ThreadPoolExecutor(2) as pool:
+        chunked = forecast_batch(Y, 4, season_length=12, executor=pool, chunk_size=10)
+    single = forecast_batch(Y, 4, season_length=12)
+    assert np.allclose(chunked.point, single.point) and np.allclose(chunked.upper, single.upper)
+
+    monkeypatch.setattr(datasets, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(batch_forecast.settings, "forecast_workers", 1)
+    dates = pd.date_range("2023-01-01", periods=24, freq="MS").strftime("%Y-%m-%d")
+    rows = pd.DataFrame({
+        "date": np.tile(dates, 2),
+        "region": np.repeat(["east", "west"], 24),
+        "sales": np.concatenate([np.arange(24) + 10.0, np.arange(24) * 2 + 5.0]),
+    })
+    rows.to_csv(tmp_path / "sales_parsed.csv", index=False)
+
+    result = batch_forecast.forecast_dataset("sales_parsed.csv", "date", "sales", group_by="region", horizon=3)
+    assert result["series"] == 2 and result["season_length"] == 12
+    assert result["periods"] == ["2025-01-01", "2025-02-01", "2025-03-01"]
+    derived = pd.read_csv(tmp_path / result["dataset_id"])
+    assert len(derived) == 2 * (24 + 3)
+    forecast_rows = derived[derived["kind"] == "forecast"]
+    assert np.allclose(forecast_rows[forecast_rows["region"] == "west"]["sales"], [53, 55, 57], atol=1.0)
+
+    # without freq the raw dates are kept: future periods step from the last one, not from an anchor
+    for name, dates, expected in (
+        ("month_end", pd.date_range("2022-04-30", periods=24, freq="ME"), ["2024-04-30", "2024-05-31", "2024-06-30"]),
+        ("wednesdays", pd.date_range("2024-01-03", periods=24, freq="W-WED"), ["2024-06-19", "2024-06-26", "2024-07-03"]),
+    ):
+        pd.DataFrame({"date": dates.strftime("%Y-%m-%d"), "sales": np.arange(24) + 10.0}).to_csv(tmp_path / f"{name}_parsed.csv", index=False)
+        result = batch_forecast.forecast_dataset(f"{name}_parsed.csv", "date", "sales", horizon=3)
+        assert result["periods"] == expected, name
+
+    for date_field, measure, group_by in (("date", "sales", "date"), ("date", "sales", "sales"), ("date", "kind", "region")):
+        with pytest.raises(ValueError):
+            batch_forecast.forecast_dataset("sales_parsed.csv", date_field, measure, group_by=group_by)
@@ -0,0 +1,69 @@
+import os
+import uuid
+
+import pytest
+
+from app.core.http_cache import etag_matches, strong_etag
+from app.services.datasets import UPLOAD_DIR
+
+
+@pytest.fixture
+def dataset():
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    dataset_id = f"{uuid.uuid4()}_sales_parsed.csv"
+    path = os.path.join(UPLOAD_DIR, dataset_id)
+    with open(path, "w") as f:
+        f.write("region,revenue\nNorth,10\nSouth,5\nNorth,7\n")
+    yield dataset_id, path
+    os.remove(path)
+
+
+def test_etag_matching():
+    etag = strong_etag("dashboard", "d1", 3)
+    assert etag.startswith('"') and etag == strong_etag("dashboard", "d1", 3)
+    assert etag != strong_etag("dashboard", "d1", 4)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag) and not etag_matches('"other"', etag)
+
+
+def test_dashboard_conditional_get(client, dataset):
+    dataset_id, path = dataset
+    saved = client.post("/api/dashboard/save", json={"name": "Shared", "widgets": [{"id": "w1"}], "dataset_id": dataset_id}).json()
+    url = f"/api/dashboard/{saved['id']}"
+
+    first = client.get(url)
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and first.headers["cache-control"] == "private, no-cache"
+    again = client.get(url, headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b"" and again.headers["etag"] == etag
+
+    client.put(url, json={"version": saved["version"], "name": "Renamed"})
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.json()["name"] == "Renamed"
+
+    etag = changed.headers["etag"]
+    with open(path, "a") as f:
+        f.write("East,3\n")
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_dataset_reads_are_cacheable(client, dataset):
+    dataset_id, path = dataset
+    preview = client.get(f"/api/datasets/{dataset_id}/preview", params={"limit": 2})
+    assert preview.status_code == 200 and len(preview.json()["rows"]) == 2
+    assert "max-age" in preview.headers["cache-control"]
+    assert client.get(f"/api/datasets/{dataset_id}/preview", params={"limit": 2},
+                      headers={"If-None-Match": preview.headers["etag"]}).status_code == 304
+
+    params = {"x": "region", "y": "SUM(revenue)"}
+    data = client.get(f"/api/datasets/{dataset_id}/widget-data", params=params)
+    assert data.json()["rows"] == [{"region": "North", "SUM(revenue)": 17}, {"region": "South", "SUM(revenue)": 5}]
+    assert data.headers["etag"] != preview.headers["etag"]
+
+    with open(path, "a") as f:
+        f.write("South,1\n")
+    refreshed = client.get(f"/api/datasets/{dataset_id}/widget-data", params=params, headers={"If-None-Match": data.headers["etag"]})
+    assert refreshed.status_code == 200 and refreshed.json()["rows"][1]["SUM(revenue)"] == 6
+
+    assert client.get("/api/datasets/missing.csv/preview").status_code == 404
@@ -0,0 +1,73 @@
+import asyncio
+import json
+import threading
+
+import anyio
+import httpx
+
+from app.services.jobs import DONE, ERROR, JobRegistry, jobs
+from app.services.rate_limiter import current_tenant
+from app.main import app
+
+
+def test_registry_runs_jobs_and_carries_tenant():
+    registry = JobRegistry(max_workers=2, ttl_seconds=60)
+    release = threading.Event()
+    token = current_tenant.set("biz-1")
+    try:
+        job = registry.submit("test", lambda: (release.wait(5), current_tenant.get())[1])
+    finally:
+        current_tenant.reset(token)
+
+    assert registry.wait(job.id, seen_version=-1, timeout=5).status in ("pending", "running")
+    release.set()
+    finished = registry.wait(job.id, seen_version=99, timeout=5)
+    assert finished.status == DONE and finished.result == "biz-1"
+
+    failed = registry.submit("test", lambda: 1 / 0)
+    assert registry.wait(failed.id, seen_version=99, timeout=5).status == ERROR
+    assert "division" in registry.get(failed.id).error
+    assert registry.get("missing") is None
+
+
+def test_poll_and_subscribe_endpoints(client):
+    job = jobs.submit("test", lambda: {"widgets": [{"id": "w1"}]})
+    jobs.wait(job.id, seen_version=99, timeout=5)
+
+    r = client.get(f"/api/jobs/{job.id}")
+    assert r.status_code == 200
+    assert r.json()["status"] == "done" and r.json()["result"] == {"widgets": [{"id": "w1"}]}
+    assert client.get("/api/jobs/unknown").status_code == 404
+
+    r = client.get(f"/api/jobs/{job.id}/events")
+    events = [
+        (lines[0][len("event: "):], json.loads(lines[1][len("data: "):]))
+        for lines in (frame.split("\n") for frame in r.text.strip().split("\n\n"))
+    ]
+    assert events == [
+        ("status", {"job_id": job.id, "status": "done"}),
+        ("result", {"widgets": [{"id": "w1"}]}),
+        ("done", {"job_id": job.id}),
+    ]
+
+
+def test_subscribers_wait_on_the_event_loop():
+    release = threading.Event()
+    job = jobs.submit("test", lambda: release.wait(5) and {"ok": True})
+
+    async def scenario():
+        # one threadpool worker: a subscriber holding it would stall every sync endpoint
+        anyio.to_thread.current_default_thread_limiter().total_tokens = 1
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            streams = [asyncio.create_task(c.get(f"/api/jobs/{job.id}/events")) for _ in range(3)]
+            await asyncio.sleep(0.2)
+            assert not any(s.done() for s in streams)
+            assert (await c.get(f"/api/jobs/{job.id}")).json()["status"] == "running"
+            assert (await asyncio.wait_for(c.get("/api/dashboard"), 1)).status_code == 200
+            release.set()
+            return await asyncio.wait_for(asyncio.gather(*streams), 5)
+
+    for r in asyncio.run(scenario()):
+        assert 'event: result\ndata: {"ok": true}' in r.text
+        assert r.text.rstrip().endswith(f'data: {{"job_id": "{job.id}"}}')
@@ -0,0 +1,228 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.services.llm_gateway import SingleFlight, prompt_hash
+from app.services.llm_resilience import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, LatencyBudgetExceeded, ResilientCaller,
+)
+from app.services.rate_limiter import LLMGovernor, RateLimitExceeded
+
+
+def test_prompt_hash_is_order_independent_for_params():
+    msgs = [{"role": "user", "content": "hi"}]
+    assert prompt_hash("m", msgs, {"a": 1, "b": 2}) == prompt_hash("m", msgs, {"b": 2, "a": 1})
+    assert prompt_hash("m", msgs, {"a": 1}) != prompt_hash("m", msgs, {"a": 2})
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def slow():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return "result"
+
+    results = []
+
+    def worker():
+        results.append(flight.do("k", slow))
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    threads[0].start()
+    started.wait()
+    for t in threads[1:]:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == ["result"] * 5
+    assert flight.shared_hits == 4
+    assert flight.in_flight() == 0
+
+
+def test_single_flight_shares_errors_and_does_not_cache():
+    flight = SingleFlight()
+
+    def boom():
+        raise RuntimeError("upstream down")
+
+    try:
+        flight.do("k", boom)
+        assert False, "expected error"
+    except RuntimeError:
+        pass
+
+    assert flight.do("k", lambda: 42) == 42
+
+
+def test_governor_serves_interactive_before_background():
+    gov = LLMGovernor(
+        requests_per_minute=600, tokens_per_minute=100000,
+        max_concurrency=1, queue_size=10, queue_timeout=5,
+    )
+    first = gov.acquire(10)
+    order = []
+
+    def worker(priority):
+        permit = gov.acquire(10, priority=priority, tenant=priority)
+        order.append(priority)
+        gov.release(permit)
+
+    bg = threading.Thread(target=worker, args=("background",))
+    bg.start()
+    time.sleep(0.05)
+    fg = threading.Thread(target=worker, args=("interactive",))
+    fg.start()
+    time.sleep(0.05)
+    gov.release(first)
+    bg.join()
+    fg.join()
+
+    assert order == ["interactive", "background"]
+
+
+def test_governor_rejects_when_queue_full_or_budget_exhausted():
+    gov = LLMGovernor(
+        requests_per_minute=1, tokens_per_minute=1000,
+        max_concurrency=4, queue_size=0, queue_timeout=0.1,
+    )
+    with pytest.raises(RateLimitExceeded):
+        gov.acquire(10)
+
+    gov = LLMGovernor(
+        requests_per_minute=1, tokens_per_minute=1000,
+        max_concurrency=4, queue_size=5, queue_timeout=0.1,
+    )
+    gov.release(gov.acquire(10))
+    with pytest.raises(RateLimitExceeded):
+        gov.acquire(10)
+    assert gov.stats()["rejected"] == 1
+
+
+def test_hedge_wins_when_primary_is_slow_and_budget_bounds_latency():
+    caller = ResilientCaller(max_workers=4, hedge_after=0.05, hedging=True)
+    release = threading.Event()
+
+    def slow():
+        release.wait(2)
+        return "slow"
+
+    started = time.monotonic()
+    assert caller.call(slow, budget=1.0, hedge=lambda: "hedge") == "hedge"
+    assert caller.hedges == 1 and caller.hedge_wins == 1
+
+    with pytest.raises(LatencyBudgetExceeded):
+        caller.call(slow, budget=0.2)
+    assert time.monotonic() - started < 1.0
+    assert caller.timeouts == 1
+    release.set()
+
+
+def test_breaker_opens_fails_fast_and_probes_after_cooldown():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=0.1)
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+    assert breaker.trips == 1 and breaker.rejected == 1
+
+    time.sleep(0.15)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() and not breaker.allow()  # a single probe
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    time.sleep(0.15)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+class SlowGroq:
+    """Stands in for the Groq HTTP session: every POST takes `delay` seconds"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.posts = 0
+
+    def post(self, *args, **kwargs):
+        self.posts += 1
+        time.sleep(self.delay)
+        return SimpleNamespace(
+            status_code=200, headers={}, raise_for_status=lambda: None,
+            json=lambda: {"choices": [{"message": {"content": "ok"}}], "usage": {"total_tokens": 5}},
+        )
+
+
+@pytest.fixture
+def slow_groq(monkeypatch):
+    from app.core.config import settings
+    from app.core.resources import resources
+
+    groq = SlowGroq(delay=0.8)
+    monkeypatch.setattr(settings, "groq_mode", "live")
+    monkeypatch.setattr(resources, "groq_session", lambda: groq)
+    return groq
+
+
+def test_slow_llm_call_does_not_stall_other_requests(slow_groq):
+    from app.main import app
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            start = time.perf_counter()
+            chat = asyncio.create_task(client.post("/api/ai/chat", params={"message": f"slow {time.time()}"}))
+            await asyncio.sleep(0.1)
+            stats = await client.get("/api/ai/llm/stats")
+            return time.perf_counter() - start, stats, await chat
+
+    elapsed, stats, chat = asyncio.run(scenario())
+    assert stats.status_code == 200 and chat.json()["response"] == "ok"
+    assert elapsed < 0.5  # answered while the 0.8 s LLM call was still in flight
+
+
+def test_single_flight_followers_time_out_on_a_stuck_leader():
+    flight = SingleFlight()
+    stuck, started = threading.Event(), threading.Event()
+
+    def leader():
+        started.set()
+        stuck.wait(5)
+        return "late"
+
+    t = threading.Thread(target=flight.do, args=("k", leader))
+    t.start()
+    started.wait()
+    begin = time.monotonic()
+    with pytest.raises(LatencyBudgetExceeded):
+        flight.do("k", lambda: "never runs", timeout=0.1)
+    assert time.monotonic() - begin < 1.0
+    stuck.set()
+    t.join()
+
+
+def test_concurrent_identical_http_requests_share_one_upstream_call(slow_groq):
+    from app.main import app
+
+    message = f"same question {time.time()}"
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(
+                client.post("/api/ai/chat", params={"message": message}) for _ in range(4)
+            ))
+
+    responses = asyncio.run(scenario())
+    assert [r.json()["response"] for r in responses] == ["ok"] * 4
+    assert slow_groq.posts == 1
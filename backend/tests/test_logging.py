@@ -0,0 +1,64 @@
+import json
+import logging
+import queue
+
+from app.core.config import settings
+from app.core.logging import JSONFormatter, NonBlockingQueueHandler, log_event, log_llm_exchange, log_payload
+
+
+class _Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _logger(name):
+    logger = logging.getLogger(name)
+    logger.handlers = [_Collect()]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger, logger.handlers[0]
+
+
+def test_queue_handler_never_blocks_and_records_are_json():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=2))
+    logger, _ = _logger("test.queue")
+    logger.handlers = [handler]
+    for i in range(5):
+        log_event(logger, f"event {i}", step=i)
+    assert handler.dropped == 3
+
+    record = handler.queue.get_nowait()
+    doc = json.loads(JSONFormatter().format(record))
+    assert doc["msg"] == "event 0" and doc["step"] == 0 and doc["level"] == "INFO"
+
+
+def test_payloads_are_sampled_truncated_and_rendered_lazily(monkeypatch):
+    logger, sink = _logger("test.payload")
+    rendered = []
+
+    monkeypatch.setattr(settings, "log_payload_sample_rate", 0.0)
+    log_payload(logger, "preview", lambda: rendered.append(1) or "x")
+    assert sink.records == [] and rendered == []
+
+    monkeypatch.setattr(settings, "log_payload_sample_rate", 1.0)
+    monkeypatch.setattr(settings, "log_payload_max_chars", 10)
+    log_payload(logger, "widgets", [{"title": "Revenue by region"}])
+    fields = sink.records[0].fields
+    assert len(fields["payload"]) == 10 and fields["truncated_chars"] > 0
+
+
+def test_llm_exchanges_log_sizes_unless_recording(monkeypatch):
+    logger, sink = _logger("test.llm")
+    messages = [{"role": "system", "content": "secret prompt"}, {"role": "user", "content": "revenue by region"}]
+
+    log_llm_exchange(logger, "m", messages, "completion", tokens=42)
+    fields = sink.records[-1].fields
+    assert fields == {"model": "m", "message_count": 2, "prompt_chars": 30, "response_chars": 10, "tokens": 42}
+
+    monkeypatch.setattr(settings, "log_llm_exchanges", True)
+    log_llm_exchange(logger, "m", messages, "completion")
+    assert sink.records[-1].fields["messages"] == messages and sink.records[-1].fields["response"] == "completion"
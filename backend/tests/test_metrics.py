@@ -0,0 +1,39 @@
+from app.core.metrics import Histogram, Registry, stage, stage_latency
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    h = registry.register(Histogram("t_seconds", "test", ("stage",), buckets=(0.1, 1.0)))
+    for v in (0.05, 0.5, 0.7, 3.0):
+        h.observe(v, stage="parse")
+    text = registry.render()
+    assert 't_seconds_bucket{stage="parse",le="0.1"} 1' in text
+    assert 't_seconds_bucket{stage="parse",le="1"} 3' in text
+    assert 't_seconds_bucket{stage="parse",le="+Inf"} 4' in text
+    assert 't_seconds_count{stage="parse"} 4' in text
+    assert "# TYPE t_seconds histogram" in text
+
+
+def test_upload_records_stages_and_route_templates(client, tmp_path):
+    before = stage_latency.count(stage="parse")
+
+    csv = tmp_path / "sales.csv"
+    csv.write_text("date,region,revenue\n2024-01-01,North,10\n2024-02-01,South,12\n")
+    with open(csv, "rb") as f:
+        r = client.post("/api/upload", files={"file": ("sales.csv", f, "text/csv")},
+                        data={"domain": "sales", "intent": "trends"})
+    assert r.status_code == 200
+    assert stage_latency.count(stage="parse") == before + 1
+    client.get("/api/dashboard/does-not-exist")
+
+    text = client.get("/metrics").text
+    for stage_name in ("save", "parse", "validate", "profile", "preview", "serialize"):
+        assert f'vizpilot_stage_duration_seconds_count{{stage="{stage_name}"}}' in text
+    assert 'vizpilot_files_parsed_total{type="CSV/TXT"}' in text
+    assert 'vizpilot_ingested_bytes_total{type="csv"}' in text
+    assert 'route="/api/dashboard/{dash_id}",status="404"' in text
+    assert "vizpilot_llm_gateway_breaker_state" in text
+
+    with stage("custom"):
+        pass
+    assert 'stage="custom"' in client.get("/metrics").text
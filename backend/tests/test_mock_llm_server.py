@@ -0,0 +1,43 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from mock_llm_server import MockConfig, create_app, request_key
+
+
+def _client(**options):
+    return TestClient(create_app(MockConfig(latency_median=0, tokens_per_second=0, seed=1, **options)))
+
+
+def test_completion_streaming_and_rerank_shape():
+    client = _client()
+    messages = [
+        {"role": "system", "content": "You rank dashboard widget candidates."},
+        {"role": "user", "content": 'DATA: {"candidates": [{"id": "w1"}, {"id": "w2"}]}'},
+    ]
+    r = client.post("/openai/v1/chat/completions", json={"model": "m", "messages": messages})
+    assert r.status_code == 200
+    body = r.json()
+    assert json.loads(body["choices"][0]["message"]["content"]) == ["w1", "w2"]
+    assert body["usage"]["total_tokens"] > 0
+
+    r = client.post("/openai/v1/chat/completions", json={"model": "m", "messages": messages, "stream": True})
+    frames = [line[len("data: "):] for line in r.text.split("\n") if line.startswith("data: ")]
+    assert frames[-1] == "[DONE]"
+    text = "".join(json.loads(f)["choices"][0]["delta"].get("content", "") for f in frames[:-1])
+    assert text == body["choices"][0]["message"]["content"]
+
+
+def test_error_injection_and_replay(tmp_path):
+    assert _client(rate_429=1.0).post(
+        "/openai/v1/chat/completions", json={"messages": []}
+    ).headers["retry-after"] == "2.0"
+
+    messages = [{"role": "user", "content": "hello"}]
+    recording = tmp_path / "recorded.jsonl"
+    recording.write_text(json.dumps({"messages": messages, "response": "recorded answer"}) + "\n")
+    client = _client(replay=[str(recording)])
+    r = client.post("/openai/v1/chat/completions", json={"messages": messages})
+    assert r.json()["choices"][0]["message"]["content"] == "recorded answer"
+    assert client.get("/health").json()["replayed"] == 1
+    assert request_key(messages) != request_key([{"role": "user", "content": "hi"}])
@@ -0,0 +1,58 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.db import postgres as pg
+from app.db.postgres import PostgresRepository, businesses, invitations, metadata, users
+from app.services.auth_service import AuthService
+from app.services.invitation_service import InvitationService
+
+BIZ, USER = str(uuid.uuid4()), str(uuid.uuid4())
+NOW = datetime.now(timezone.utc)
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """SQLite stand-in for the Supabase Postgres schema"""
+    repo = PostgresRepository(f"sqlite:///{tmp_path / 'pg.db'}")
+    metadata.create_all(repo.engine)
+    with repo.engine.begin() as conn:
+        conn.execute(businesses.insert(), [{"id": BIZ, "name": "Acme", "industry": "Retail", "is_active": True}])
+        conn.execute(users.insert(), [{"id": USER, "business_id": BIZ, "email": "a@acme.io", "full_name": "Ann",
+                                       "role": "admin", "is_active": True}])
+        conn.execute(invitations.insert(), [{"id": str(uuid.uuid4()), "business_id": BIZ, "email": "b@acme.io",
+                                             "role": "employee", "token": "tok", "status": "pending",
+                                             "expires_at": NOW + timedelta(days=7)}])
+    monkeypatch.setattr(settings, "supabase_db_url", repo.engine.url.render_as_string())
+    monkeypatch.setattr(pg, "postgres", repo)
+    yield repo
+    repo.dispose()
+
+
+def test_hot_queries_match_rest_shapes(repo):
+    profile = AuthService.load_profile(USER)
+    assert profile["business_name"] == "Acme" and profile["role"] == "admin" and profile["id"] == USER
+    assert AuthService.load_profile(str(uuid.uuid4())) is None
+
+    invitation = repo.invitation_by_token("tok")
+    assert invitation["businesses"] == {"name": "Acme", "industry": "Retail"}
+    assert isinstance(invitation["expires_at"], str)
+    assert repo.invitation_by_token("missing") is None
+
+
+def test_get_invitation_uses_pool_without_rest_client(repo, monkeypatch):
+    from fastapi import HTTPException
+    from app.db import supabase_client
+
+    # only SUPABASE_DB_URL configured: the REST client must not be needed
+    monkeypatch.setattr(supabase_client, "SUPABASE_URL", None)
+    monkeypatch.setattr(supabase_client.SupabaseClient, "_client", None)
+
+    invitation = asyncio.run(InvitationService.get_invitation("tok"))
+    assert invitation["email"] == "b@acme.io" and invitation["business_name"] == "Acme"
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(InvitationService.get_invitation("missing"))
+    assert e.value.status_code == 404
@@ -0,0 +1,56 @@
+import json
+
+from app.services.prompt_builder import columnar, fit_items, fit_rows, prune
+from app.services.token_counter import count_tokens
+
+
+def _rows(n):
+    return [{"month": f"2024-{i:04d}", "revenue": 1000.0 + i * 10, "expenses": 800.0 + i} for i in range(n)]
+
+
+def test_columnar_writes_keys_once():
+    table = columnar([{"a": 1, "b": 2}, {"b": 3, "c": 4}])
+    assert table == {"cols": ["a", "b", "c"], "rows": [[1, 2, None], [None, 3, 4]]}
+
+
+def test_fit_rows_keeps_small_payloads_intact():
+    rows = _rows(6)
+    out = json.loads(fit_rows(rows, budget=500))
+    assert out["cols"] == ["month", "revenue", "expenses"]
+    assert len(out["rows"]) == 6
+
+
+def test_fit_rows_summarizes_large_payloads_within_budget():
+    rows = _rows(2000)
+    text = fit_rows(rows, budget=300)
+    assert count_tokens(text) <= 300
+
+    out = json.loads(text)
+    assert out["summary"]["n"] == 2000
+    assert out["summary"]["revenue"]["slope"] == 10.0
+    recent = out["recent"]["rows"]
+    assert recent and recent[-1][0] == "2024-1999"
+
+
+def test_fit_items_drops_whole_items_and_prune_removes_empties():
+    items = [prune({"id": i, "title": "x" * 50, "data": {}, "config": None}) for i in range(50)]
+    assert items[0] == {"id": 0, "title": "x" * 50}
+    text = fit_items(items, budget=100)
+    kept, note = text.split("\n")
+    assert all("title" in w for w in json.loads(kept))
+    assert note.endswith("more omitted)")
+
+
+def test_fit_rows_shrinks_wide_summaries_structurally():
+    rows = [{f"metric_{c:03d}": float(i * c) for c in range(80)} for i in range(50)]
+    for budget, expect in ((1500, "min"), (700, "cols"), (120, "omitted_cols")):
+        text = fit_rows(rows, budget=budget)
+        assert count_tokens(text) <= budget
+        summary = json.loads(text)["summary"]
+        assert summary["n"] == 50
+        if expect == "min":
+            assert set(summary["metric_001"]) == {"min", "max", "mean"}
+        elif expect == "cols":
+            assert len(summary["cols"]) == 80
+        else:
+            assert summary["cols"][0] == "metric_000" and len(summary["cols"]) + summary["omitted_cols"] == 80
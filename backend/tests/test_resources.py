@@ -0,0 +1,61 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.resources import Resources, resources
+from app.main import app
+
+
+def test_duckdb_cursors_are_pooled_and_exclusive():
+    res = Resources()
+    with res.duckdb() as first:
+        assert first.execute("SELECT 42").fetchall() == [(42,)]
+    with res.duckdb() as again:
+        assert again is first  # reused, no new connection
+
+    seen, barrier = [], threading.Barrier(3)
+
+    def worker():
+        with res.duckdb() as con:
+            barrier.wait()
+            seen.append(id(con))
+            con.execute("SELECT 1").fetchall()
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(set(seen)) == 3  # concurrent users never share a cursor
+    asyncio.run(res.aclose())
+
+
+def test_aclose_closes_clients_and_executors():
+    res = Resources()
+    closed = []
+    res.on_close(lambda: closed.append("pool"))
+    tracked = ThreadPoolExecutor(max_workers=1)
+    res.track_executor(tracked)
+
+    async def use_and_close():
+        client = res.http()
+        assert res.http() is client
+        name = await asyncio.get_running_loop().run_in_executor(
+            res.executor("worker", 2), lambda: threading.current_thread().name
+        )
+        await res.aclose(grace=1)
+        return client, name
+
+    client, name = asyncio.run(use_and_close())
+    assert name.startswith("worker")
+    assert client.is_closed and closed == ["pool"]
+    with pytest.raises(RuntimeError):
+        tracked.submit(print)  # shut down with the container
+    with res.duckdb() as con:  # recreated on use after close
+        assert con.execute("SELECT 1").fetchall() == [(1,)]
+
+
+def test_app_exposes_container():
+    assert app.state.resources is resources
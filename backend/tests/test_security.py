@@ -0,0 +1,130 @@
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+from app.core import security
+from app.core.config import settings
+from app.core.security import InvalidToken, TokenVerifier
+
+
+def rsa_jwk(kid):
+    """(private PEM for signing, public JWK for the key file)"""
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    public_jwk = jwk.construct(pem.decode(), "RS256").public_key().to_dict()
+    return pem.decode(), {**public_jwk, "kid": kid}
+
+
+def token(key, kid=None, alg="RS256", **claims):
+    payload = {"sub": "user-1", "aud": "authenticated", "exp": int(time.time()) + 300, **claims}
+    return jwt.encode(payload, key, algorithm=alg, headers={"kid": kid} if kid else None)
+
+
+@pytest.fixture
+def key_file(tmp_path, monkeypatch):
+    path = tmp_path / "jwks.json"
+    monkeypatch.setattr(settings, "jwt_key_file", str(path))
+    monkeypatch.setattr(settings, "supabase_jwt_secret", "hs-secret")
+    monkeypatch.setattr(settings, "jwt_audience", "authenticated")
+    return path
+
+
+def test_verifies_locally_and_picks_up_rotated_keys(key_file, monkeypatch):
+    private_a, public_a = rsa_jwk("a")
+    key_file.write_text(json.dumps({"keys": [public_a]}))
+    verifier = TokenVerifier()
+
+    assert verifier.verify(token(private_a, "a"))["sub"] == "user-1"
+    assert verifier.verify(token("hs-secret", alg="HS256"))["sub"] == "user-1"
+
+    with pytest.raises(InvalidToken):
+        verifier.verify(token(private_a, "a", exp=int(time.time()) - 10))
+    with pytest.raises(InvalidToken):
+        verifier.verify(token(private_a, "a", aud="other"))
+    with pytest.raises(InvalidToken):
+        verifier.verify(token("wrong-secret", alg="HS256"))
+    with pytest.raises(InvalidToken):
+        verifier.verify("not-a-jwt")
+
+    # rotation: a token signed by a new key id triggers an early reload
+    monkeypatch.setattr(security, "KEY_MISS_INTERVAL", 0.0)
+    private_b, public_b = rsa_jwk("b")
+    key_file.write_text(json.dumps({"keys": [public_a, public_b]}))
+    assert verifier.verify(token(private_b, "b"))["sub"] == "user-1"
+
+    start = time.perf_counter()
+    hs_token = token("hs-secret", alg="HS256")
+    for _ in range(200):
+        verifier.verify(hs_token)
+    assert (time.perf_counter() - start) / 200 < 0.002
+
+
+def test_current_user_uses_profile_cache(key_file, monkeypatch):
+    from app.services import auth_service
+    from app.services.auth_service import AuthService, profiles
+
+    key_file.write_text(json.dumps({"keys": []}))
+    monkeypatch.setattr(auth_service, "token_verifier", TokenVerifier())
+    loads = []
+    monkeypatch.setattr(AuthService, "load_profile", staticmethod(lambda uid: loads.append(uid) or {"id": uid, "role": "admin"}))
+    profiles.invalidate("user-1")
+
+    access_token = token("hs-secret", alg="HS256")
+    for _ in range(3):
+        assert asyncio.run(AuthService.get_current_user(access_token))["id"] == "user-1"
+    assert loads == ["user-1"]
+
+    profiles.invalidate("user-1")
+    asyncio.run(AuthService.get_current_user(access_token))
+    assert loads == ["user-1", "user-1"]
+
+
+def test_current_user_falls_back_to_supabase_without_keys(key_file, monkeypatch):
+    from app.services import auth_service
+    from app.services.auth_service import AuthService, profiles
+
+    key_file.write_text(json.dumps({"keys": []}))
+    monkeypatch.setattr(settings, "supabase_jwt_secret", "")
+    monkeypatch.setattr(auth_service, "token_verifier", TokenVerifier())
+    checked = []
+    legacy, revoked = token("legacy-secret", alg="HS256"), token("legacy-secret", alg="HS256", sub="gone")
+
+    def get_user(access_token):
+        checked.append(access_token)
+        return SimpleNamespace(user=SimpleNamespace(id="user-2") if access_token == legacy else None)
+
+    monkeypatch.setattr(auth_service, "get_supabase", lambda: SimpleNamespace(auth=SimpleNamespace(get_user=get_user)))
+    monkeypatch.setattr(AuthService, "load_profile", staticmethod(lambda uid: {"id": uid, "role": "viewer"}))
+    profiles.invalidate("user-2")
+
+    with pytest.raises(security.NoSigningKeys):
+        TokenVerifier().verify(legacy)
+    assert asyncio.run(AuthService.get_current_user(legacy))["id"] == "user-2"
+    with pytest.raises(auth_service.HTTPException) as e:
+        asyncio.run(AuthService.get_current_user(revoked))
+    assert e.value.status_code == 401 and checked == [legacy, revoked]
+
+
+def test_key_reload_runs_off_the_event_loop(key_file, monkeypatch):
+    private_a, public_a = rsa_jwk("a")
+    key_file.write_text(json.dumps({"keys": [public_a]}))
+    verifier = TokenVerifier()
+    fetched_on = []
+    fetch = verifier._fetch_jwks
+    monkeypatch.setattr(verifier, "_fetch_jwks", lambda: fetched_on.append(threading.current_thread()) or fetch())
+
+    async def verify_twice():
+        first = await verifier.verify_async(token(private_a, "a"))
+        second = await verifier.verify_async(token(private_a, "a"))
+        return first, second, threading.current_thread()
+
+    first, second, loop_thread = asyncio.run(verify_twice())
+    assert first["sub"] == second["sub"] == "user-1"
+    assert len(fetched_on) == 1 and fetched_on[0] is not loop_thread
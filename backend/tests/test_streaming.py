@@ -0,0 +1,49 @@
+import json
+
+from app.services.json_stream import JSONArrayStream
+
+
+def test_json_array_stream_emits_elements_as_they_complete():
+    text = 'Here you go:\n```json\n[{"id": "a", "title": "Sales [2024]"}, {"id": "b", "config": {"x": [1, 2]}}]\n```'
+    parser = JSONArrayStream()
+    emitted = []
+    for i in range(0, len(text), 7):
+        emitted.extend(parser.feed(text[i:i + 7]))
+
+    assert emitted == [
+        {"id": "a", "title": "Sales [2024]"},
+        {"id": "b", "config": {"x": [1, 2]}},
+    ]
+    assert parser.finished
+
+
+def test_json_array_stream_handles_scalars_and_escapes():
+    parser = JSONArrayStream()
+    assert parser.feed('[1, "a\\"]", ') == [1, "a\"]"]
+    assert parser.feed('true]') == [True]
+
+
+def test_refine_stream_falls_back_in_mock_mode(client):
+    payload = {
+        "dashboard_id": "d1",
+        "dataset_id": "ds1",
+        "role": "finance",
+        "user_instruction": "show only bar charts",
+        "constraints": {"chartType": "bar"},
+        "current_widgets": [{"id": "w1", "type": "line", "title": "Revenue", "data": {}}],
+    }
+    r = client.post("/api/dashboard/refine/stream", json=payload)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+
+    events = []
+    for frame in r.text.strip().split("\n\n"):
+        name, data = frame.split("\n")
+        events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+
+    assert events[0][0] == "widget"
+    assert events[0][1]["type"] == "bar"
+    assert events[-1] == ("done", {
+        "success": True, "mode": "fallback", "count": 1,
+        "message": "Widgets refined using deterministic strategy",
+    })
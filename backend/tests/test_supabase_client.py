@@ -0,0 +1,25 @@
+import asyncio
+import threading
+import time
+
+from app.db.supabase_client import run_db
+from app.services.rate_limiter import current_tenant
+
+
+def test_run_db_offloads_and_overlaps_blocking_calls():
+    def blocking_call(tag):
+        time.sleep(0.2)
+        return tag, threading.current_thread().name, current_tenant.get()
+
+    async def handler():
+        current_tenant.set("biz-1")
+        loop_thread = threading.current_thread().name
+        start = time.perf_counter()
+        results = await asyncio.gather(*(run_db(blocking_call, i) for i in range(4)))
+        return loop_thread, time.perf_counter() - start, results
+
+    loop_thread, elapsed, results = asyncio.run(handler())
+    assert [r[0] for r in results] == [0, 1, 2, 3]
+    assert all(r[1].startswith("supabase") and r[1] != loop_thread for r in results)
+    assert all(r[2] == "biz-1" for r in results)
+    assert elapsed < 0.6  # four 0.2 s round trips overlapped, not 0.8 s in sequence
@@ -0,0 +1,44 @@
+from app.core.tracing import parse_traceparent, span, trace_spans
+
+
+def test_nested_spans_share_a_trace_and_record_errors():
+    with span("outer", rows=3) as outer:
+        with span("inner") as inner:
+            inner.set_attribute("tokens", 42)
+        try:
+            with span("failing"):
+                raise ValueError("boom")
+        except ValueError:
+            pass
+
+    spans = {s["name"]: s for s in trace_spans(outer.trace_id)}
+    assert spans["inner"]["parentSpanId"] == outer.span_id
+    assert spans["inner"]["attributes"] == {"tokens": 42}
+    assert spans["outer"]["attributes"] == {"rows": 3} and spans["outer"]["parentSpanId"] is None
+    assert spans["failing"]["status"] == "error" and "boom" in spans["failing"]["error"]
+    assert parse_traceparent(outer.traceparent) == (outer.trace_id, outer.span_id, True)
+    assert parse_traceparent("garbage") is None
+
+
+def test_upload_trace_covers_pipeline(client, tmp_path):
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    csv = tmp_path / "sales.csv"
+    csv.write_text("date,region,revenue\n2024-01-01,North,10\n2024-02-01,South,12\n")
+    with open(csv, "rb") as f:
+        r = client.post(
+            "/api/upload",
+            files={"file": ("sales.csv", f, "text/csv")},
+            data={"domain": "sales", "intent": "trends"},
+            headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"},
+        )
+    assert r.status_code == 200
+    assert r.headers["traceparent"].startswith(f"00-{trace_id}-")
+
+    spans = {s["name"]: s for s in trace_spans(trace_id)}
+    root = spans["POST /api/upload"]
+    assert root["parentSpanId"] == "00f067aa0ba902b7"
+    assert root["attributes"]["http.status_code"] == 200 and root["attributes"]["bytes"] > 0
+    assert spans["parse_file"]["attributes"]["rows"] == 2
+    assert spans["duckdb.preview"]["attributes"]["rows"] == 2
+    for name in ("generate_quick_viz", "duckdb.read_sample", "profile_frame", "propose_widgets"):
+        assert name in spans
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from app.services.widget_recommender import profile_frame, profile_from_hints, recommend, recommend_frame
+
+
+def _sales(n=200):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "order_id": range(n),
+        "order_date": pd.date_range("2023-01-01", periods=n, freq="3D").strftime("%Y-%m-%d"),
+        "region": rng.choice(["East", "West", "North", "South"], n),
+        "product": rng.choice([f"P{i}" for i in range(25)], n),
+        "revenue": rng.gamma(2, 100, n),
+        "discount_rate": rng.uniform(0, 0.3, n),
+    })
+    df["cost"] = df["revenue"] * 0.6 + rng.normal(0, 1, n)
+    return df
+
+
+def test_profile_roles_and_redundant_measures():
+    profile = profile_frame(_sales())
+    roles = {name: col.role for name, col in profile.columns.items()}
+    assert roles == {
+        "order_id": "identifier", "order_date": "temporal", "region": "category", "product": "category",
+        "revenue": "measure", "discount_rate": "measure", "cost": "measure",
+    }
+    assert profile.columns["order_date"].periods >= 12
+
+    # string dtypes (pd.read_csv(dtype_backend="pyarrow"), pandas 3's default str) are parsed too
+    typed = _sales().astype({"order_date": "string", "region": "string"})
+    assert profile_frame(typed).columns["order_date"].role == "temporal"
+    assert profile.redundant == ["cost"] or profile.redundant == ["revenue"]
+
+
+def test_recommends_six_ranked_diverse_widgets():
+    widgets = recommend_frame(_sales(), intent="sales trends")
+    assert len(widgets) == 6
+    assert [w["score"] for w in widgets] == sorted((w["score"] for w in widgets), reverse=True)
+    assert (widgets[0]["chart"], widgets[0]["x"]) == ("line", "order_date")
+    # revenue and cost are near-duplicates: only the stronger one leads
+    assert widgets[0]["y"] in ("SUM(revenue)", "SUM(cost)")
+    assert len({w["chart"] for w in widgets}) >= 3
+    assert any(w["y"] == "AVG(discount_rate)" for w in widgets)
+    assert not any(w["x"] == "order_id" or w["group_by"] == "order_id" for w in widgets)
+
+
+def test_hints_only_profile_and_intent_boost():
+    profile = profile_from_hints(["amount", "region"], {"date_field": "date", "measures": ["amount"], "categories": ["region"]})
+    assert recommend(profile)[0]["chart"] == "line"
+    assert recommend(profile, intent="compare region performance")[0]["chart"] == "bar"